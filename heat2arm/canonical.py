@@ -0,0 +1,132 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the canonicalization of ARM templates; which renders templates
+    with the same contents into the very same JSON and stamps them with the
+    fingerprint of their contents.
+"""
+
+import collections
+import hashlib
+import json
+
+from heat2arm.optimizers import utils
+
+
+# FINGERPRINT_ALGORITHM is the name of the hashlib algorithm of fingerprints:
+FINGERPRINT_ALGORITHM = "sha256"
+
+
+def canonicalize(template_data):
+    """ canonicalize returns the canonical form of the given ARM template; in
+    which the keys of all dicts are in sorted order and the resources and
+    their dependencies are sorted, stamped with the fingerprint of its
+    contents within its metadata.
+
+    NOTE: the json module keeps the order of the keys of OrderedDicts, so
+    the JSON of templates with the same contents is the same byte for byte.
+    """
+    template_data = _canonicalize(template_data)
+
+    metadata = dict(template_data.get("metadata", {}))
+    metadata["fingerprint"] = get_fingerprint(template_data)
+    template_data["metadata"] = _sorted_dict(metadata)
+
+    return _sorted_dict(template_data)
+
+
+def get_fingerprint(template_data):
+    """ get_fingerprint returns the fingerprint of the contents of the given
+    ARM template; which is the digest of its canonical JSON without the
+    fingerprint it may have been stamped with.
+    """
+    template_data = _canonicalize(template_data)
+
+    metadata = dict(template_data.get("metadata", {}))
+    metadata.pop("fingerprint", None)
+    if metadata:
+        template_data["metadata"] = metadata
+    else:
+        template_data.pop("metadata", None)
+
+    digest = hashlib.new(FINGERPRINT_ALGORITHM, json.dumps(
+        template_data, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8"))
+    return "%s:%s" % (FINGERPRINT_ALGORITHM, digest.hexdigest())
+
+
+def _canonicalize(template_data):
+    """ _canonicalize is a helper function which returns a copy of the given
+    ARM template with its resources (including those of any nested templates)
+    and their dependencies sorted and the keys of all dicts in sorted order.
+    """
+    resources = [
+        _canonicalize_resource(resource)
+        for resource in template_data.get("resources", [])
+    ]
+    resources.sort(key=lambda resource: (
+        resource.get("type", ""), resource.get("name", ""),
+        json.dumps(resource, sort_keys=True)
+    ))
+
+    template_data = _sort_keys(template_data)
+    template_data["resources"] = resources
+    return template_data
+
+
+def _canonicalize_resource(resource):
+    """ _canonicalize_resource is a helper function which returns the
+    canonical form of the given resource.
+
+    NOTE: the order of the dependencies of a resource is irrelevant, unlike
+    that of all other lists within it (ex: the security rules of a group).
+    """
+    resource = _sort_keys(resource)
+    if "dependsOn" in resource:
+        resource["dependsOn"] = sorted(resource["dependsOn"])
+
+    template = resource.get("properties", {}).get("template")
+    if utils.is_nested_template(template):
+        resource["properties"]["template"] = _sorted_dict(
+            _canonicalize(template)
+        )
+
+    return resource
+
+
+def _sort_keys(data):
+    """ _sort_keys is a helper function which returns a copy of the
+    given data with the keys of all its dicts in sorted order.
+    """
+    if isinstance(data, dict):
+        return _sorted_dict(
+            (key, _sort_keys(value)) for key, value in data.items()
+        )
+
+    if isinstance(data, list):
+        return [_sort_keys(value) for value in data]
+
+    return data
+
+
+def _sorted_dict(items):
+    """ _sorted_dict is a helper function which returns the dict
+    of the given items (or dict) with its keys in sorted order.
+    """
+    if isinstance(items, dict):
+        items = items.items()
+
+    return collections.OrderedDict(sorted(items, key=lambda item: item[0]))
@@ -184,11 +184,288 @@ CONF.register_opts([
             }
         }]
     ),
+    # ####################### VM size solver options:
+    cfg.StrOpt(
+        'vm_size_catalog',
+        default=None,
+        help='Optional path to a JSON/YAML catalog of Azure VM sizes; which'
+             ' the cheapest size satisfying the specs of the flavor of each'
+             ' instance and its numbers of NICs and data disks is picked'
+             ' from, ahead of the flavor to size maps.'
+    ),
+    cfg.DictOpt(
+        'nova_flavor_specs',
+        default={
+            'm1.tiny': "1;512",
+            'm1.small': "1;2048",
+            'm1.medium': "2;4096",
+            'm1.large': "4;8192",
+            'm1.xlarge': "8;16384",
+        },
+        help='A mapping between OpenStack Nova flavors and their'
+             ' "vcpus;memory_mb[;bandwidth_mbps]" specs.'
+    ),
+    cfg.DictOpt(
+        'ec2_flavor_specs',
+        default={
+            'm1.tiny': "1;512",
+            'm1.small': "1;2048",
+            'm1.medium': "2;4096",
+            'm1.large': "4;8192",
+            'm1.xlarge': "8;16384",
+        },
+        help='A mapping between EC2 Instance flavors and their'
+             ' "vcpus;memory_mb[;bandwidth_mbps]" specs.'
+    ),
+    # ####################### Instance userdata options:
+    cfg.BoolOpt(
+        'deduplicate_custom_data',
+        default=False,
+        help='Flag on whether or not to have all the VMs with identical'
+             ' userdata share a single customData variable.'
+    ),
+    cfg.BoolOpt(
+        'compress_custom_data',
+        default=False,
+        help='Flag on whether or not to gzip-compress and base64-encode the'
+             ' userdata of VMs beforehand; which requires cloud-init to be'
+             ' the one consuming it.'
+    ),
+    # ####################### Output template optimization options:
+    cfg.BoolOpt(
+        'compile_security_rules',
+        default=False,
+        help='Flag on whether or not to merge, prune and reprioritize the'
+             ' rules of all the network security groups.'
+    ),
+    cfg.BoolOpt(
+        'deduplicate_security_groups',
+        default=False,
+        help='Flag on whether or not to merge all the network security groups'
+             ' which define identical sets of rules.'
+    ),
+    cfg.BoolOpt(
+        'deduplicate_variables',
+        default=False,
+        help='Flag on whether or not to merge all the variables of the'
+             ' resulting template which hold identical values.'
+    ),
+    cfg.BoolOpt(
+        'reduce_dependencies',
+        default=False,
+        help='Flag on whether or not to drop all the dependencies between'
+             ' resources which are implied by others, failing on any'
+             ' dependencies on undefined resources.'
+    ),
+    cfg.BoolOpt(
+        'compact_copy_loops',
+        default=False,
+        help='Flag on whether or not to fold structurally identical resources'
+             ' of the resulting template into ARM copy loops.'
+    ),
+    cfg.IntOpt(
+        'copy_loop_min_resources',
+        default=3,
+        help='The minimum number of structurally identical resources which'
+             ' will be folded into a copy loop.'
+    ),
+    # ####################### Deployment analysis options:
+    cfg.DictOpt(
+        'arm_provisioning_times',
+        default={
+            "Microsoft.Storage/storageAccounts": "25",
+            "Microsoft.Network/virtualNetworks": "15",
+            "Microsoft.Network/networkSecurityGroups": "10",
+            "Microsoft.Network/publicIPAddresses": "10",
+            "Microsoft.Network/networkInterfaces": "10",
+            "Microsoft.Network/loadBalancers": "15",
+            "Microsoft.Compute/availabilitySets": "5",
+            "Microsoft.Compute/virtualMachines": "240",
+            "Microsoft.Insights/autoscaleSettings": "10",
+        },
+        help='A mapping between ARM resource types and the estimated number'
+             ' of seconds their provisioning takes.'
+    ),
+    cfg.FloatOpt(
+        'arm_default_provisioning_time',
+        default=30.0,
+        help='The estimated number of seconds the provisioning of resources'
+             ' of types not listed in arm_provisioning_times takes.'
+    ),
+    cfg.IntOpt(
+        'arm_deployment_concurrency',
+        default=16,
+        help='The maximum number of resources assumed to be provisioned'
+             ' concurrently when simulating a deployment (0 for no limit).'
+    ),
+    # ####################### Linked templates options:
+    cfg.IntOpt(
+        'linked_template_max_resources',
+        default=800,
+        help='The maximum number of resources (counting each instance of a'
+             ' copy loop) of each linked template the output is split into.'
+    ),
+    cfg.IntOpt(
+        'linked_template_max_size',
+        default=1048576,
+        help='The maximum estimated size in bytes of each linked template'
+             ' the output is split into.'
+    ),
+    cfg.StrOpt(
+        'arm_deployments_api_version',
+        default="2015-01-01",
+        help='The ARM API version to be used when declaring the deployments'
+             ' of linked templates.'
+    ),
+    # ####################### Nested stacks-related options:
+    cfg.StrOpt(
+        'arm_nested_deployments_api_version',
+        default="2019-10-01",
+        help='The ARM API version to be used when declaring the deployments'
+             ' of nested stacks; which must support inner-scoped evaluation'
+             ' of the expressions of nested templates.'
+    ),
+    # ####################### Canonical output options:
+    cfg.BoolOpt(
+        'canonical_output',
+        default=False,
+        help='Flag on whether or not to output templates in canonical form;'
+             ' with all keys and resources in a stable order, and stamped'
+             ' with the fingerprint of their contents.'
+    ),
+    # ####################### Parsed stack cache options:
+    cfg.StrOpt(
+        'parsed_stack_cache_dir',
+        default=None,
+        help='Optional directory to cache the parsed stacks of templates in;'
+             ' so that templates which were already parsed are loaded from'
+             ' it instead of being parsed again.'
+    ),
     # ####################### General converter-related options:
     cfg.BoolOpt(
         'validate_arm_template_data',
         default=False,
         help='Flag on whether or not to perform schema validation on the'
              'resulting template.'
+    ),
+    cfg.IntOpt(
+        'translation_workers',
+        default=1,
+        help='The number of threads to run the resource translators on. The'
+             ' resulting template is the same regardless of their number.'
     )
 ])
+
+
+class FrozenDict(dict):
+    """ FrozenDict is a read-only dict; used for holding the values of dict
+    options within ConfigSnapshots so that they may not be altered in place.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        """ _readonly is the stand-in for all the methods which would
+        otherwise alter the dict.
+        """
+        raise TypeError("'%s' is read-only." % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        """ __copy__ returns the FrozenDict itself, as it is immutable. """
+        return self
+
+    def __deepcopy__(self, memo):
+        """ __deepcopy__ returns the FrozenDict itself, as it is immutable. """
+        return self
+
+    def __reduce__(self):
+        """ __reduce__ allows FrozenDicts to be pickled. """
+        return (self.__class__, (dict(self),))
+
+
+def _freeze(value):
+    """ _freeze is a helper function which returns an immutable
+    version of the given value of a configuration option.
+    """
+    if isinstance(value, (FrozenDict, tuple)):
+        return value
+
+    if isinstance(value, dict):
+        return FrozenDict(
+            (key, _freeze(item)) for key, item in value.items()
+        )
+
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
+class ConfigSnapshot(object):
+    """ ConfigSnapshot is an immutable snapshot of the values of all the
+    configuration options, which are available as its plain attributes.
+
+    A snapshot is taken at the start of each conversion and passed on to the
+    Context and translators; so that changes to CONF in the meantime do not
+    affect the ongoing conversion and conversions with different settings may
+    be carried out concurrently.
+    """
+
+    def __init__(self, values):
+        """ A ConfigSnapshot is created from the dict of the values
+        of the options; which are frozen in the process.
+        """
+        self.__dict__.update(
+            (name, _freeze(value)) for name, value in values.items()
+        )
+
+        # derived is the mapping between the keys of all the values derived
+        # from the options through get_derived and the values themselves:
+        self.__dict__["_ConfigSnapshot__derived"] = {}
+
+    def __setattr__(self, name, value):
+        """ __setattr__ forbids altering the snapshot. """
+        raise AttributeError("ConfigSnapshot is read-only.")
+
+    def __delattr__(self, name):
+        """ __delattr__ forbids altering the snapshot. """
+        raise AttributeError("ConfigSnapshot is read-only.")
+
+    def replace(self, **overrides):
+        """ replace returns a new ConfigSnapshot with the values
+        of the given options overridden.
+        """
+        values = dict(self.__dict__)
+        del values["_ConfigSnapshot__derived"]
+
+        for name in overrides:
+            if name not in values:
+                raise ValueError("Unknown configuration option '%s'." % name)
+
+        values.update(overrides)
+        return ConfigSnapshot(values)
+
+    def get_derived(self, key, factory):
+        """ get_derived returns the value derived from the options which is
+        identified by the given key; calling the given factory with the
+        snapshot to derive it the first time it is asked for.
+
+        NOTE: as the snapshot is immutable, values derived from it (ex: the
+        compiled forms of mapping options) need only be computed once.
+        """
+        derived = self.__derived
+        if key not in derived:
+            derived.setdefault(key, factory(self))
+
+        return derived[key]
+
+
+def snapshot():
+    """ snapshot returns a ConfigSnapshot of the current
+    values of all the configuration options.
+    """
+    return ConfigSnapshot({
+        name: getattr(CONF, name)
+        for name in CONF if not isinstance(getattr(CONF, name), CONF.GroupAttr)
+    })
@@ -19,15 +19,86 @@
     which have already been declared.
 """
 
+import collections
+import copy
 import json
 import logging
+import threading
 
-from heat2arm.config import CONF
+from heat2arm import expressions
+from heat2arm import config
+from heat2arm.dependency_graph import DependencyGraph
+from heat2arm.translators import fragments
 
 
 LOG = logging.getLogger("__heat2arm__.context")
 
 
+class _Stage(object):
+    """ _Stage holds all the changes to the context made by a translator
+    method which is run concurrently with others, until they are committed.
+    """
+
+    def __init__(self, origin, version):
+        """ A _Stage is created from the origin which the dependencies declared
+        within it are attributed to and the version of the context it reads.
+        """
+        self.origin = origin
+        self.version = version
+
+        self.parameters = {}
+        self.variables = {}
+        # resources is the list of the resources added within the stage:
+        self.resources = []
+        # copies is the ordered dict between the ids of the resources of the
+        # context fetched within the stage and the (resource, copy) pairs of
+        # them and their private copies which the stage may alter:
+        self.copies = collections.OrderedDict()
+        # queries is the list of the (properties, match) pairs of all the
+        # resources fetched, as returned by the Context's __match_resource:
+        self.queries = []
+        # availability_set_names is the list of the names of the
+        # availability sets registered within the stage:
+        self.availability_set_names = []
+        # reads is the set of the keys of all the parts of the
+        # context whose state the stage has relied on:
+        self.reads = set()
+
+        self.new_storage_acc_required = False
+        self.new_virtual_network_required = False
+
+        # exception is the exception raised from within the stage, if any:
+        self.exception = None
+
+
+def _merge(target, source):
+    """ _merge is a helper function which returns the target with the changes
+    of the given source (an altered copy of it) applied. Dicts are updated in
+    place and any parts which were not changed are kept as they are; so that
+    fragments shared between resources remain shared.
+    """
+    if target == source:
+        return target
+
+    if isinstance(target, dict) and isinstance(source, dict):
+        for key in [key for key in target if key not in source]:
+            del target[key]
+        for key, value in source.items():
+            target[key] = _merge(target[key], value) if key in target else (
+                value
+            )
+        return target
+
+    if isinstance(target, list) and isinstance(source, list):
+        target[:] = [
+            original if original == value else value
+            for original, value in zip(target, source)
+        ] + source[len(target):]
+        return target
+
+    return source
+
+
 class Context(object):
     """ Context represents the specific context of the ongoing translation.
     It holds and provides access to all already declared parameters, variables
@@ -35,24 +106,65 @@ class Context(object):
     regarding the current translation (ex: should a default storage account be
     created to support the translated deployment).
     """
-    def __init__(self, heat_resource_stack):
+    def __init__(self, heat_resource_stack, config_snapshot=None,
+                 parent=None, diagnostics=None):
         """ A Context object is created from the full Heat resource stack
-        (simply a dict of resource names to resource data mappings).
+        (simply a dict of resource names to resource data mappings),
+        the ConfigSnapshot to be used throughout the translation (defaulting
+        to a snapshot of the current configuration), the Context of the
+        template the translated one is nested within, if any, and the
+        Diagnostics to record the errors of the translation to, if they are
+        to be collected rather than raised.
         """
         self.heat_resource_stack = heat_resource_stack
+
+        # parent is the Context of the template this one's is nested within;
+        # which provides the storage account and virtual network it requires:
+        self.parent = parent
+
+        # diagnostics are the Diagnostics all the errors of the translation
+        # are recorded to; or None if the first error is to be raised:
+        self.diagnostics = diagnostics
+
+        # nested_templates is the mapping between the keys of the nested
+        # stacks of the template and the ARM templates they translate to:
+        self.nested_templates = {}
+
+        # config is the ConfigSnapshot which all the translators read:
+        self.config = config_snapshot
+        if self.config is None:
+            self.config = config.snapshot()
+
+        # strings is the StringPool which all the expressions and variable
+        # names of the conversion are interned to; nested templates share the
+        # one of the template they are nested within:
+        self.strings = expressions.StringPool()
+        if parent:
+            self.strings = parent.strings
+
         self.heat_resources = heat_resource_stack.values()
 
         self.parameters = {}
         self.variables = {
-            "location": CONF.azure_location
+            "location": self.strings.intern(self.config.azure_location)
         }
         self.resources = []
 
         # availability_set_names is a list of the names of availability sets
         # registered so far to exist. It is necessary due to the fact that it
         # is mostly the translator's jobs to add new ones if necessary.
+        # NOTE: new ones should be added through register_availability_set.
         self.availability_set_names = []
 
+        # local holds the _Stage which the changes made from the current
+        # thread are staged to, if it runs one through run_staged:
+        self.__local = threading.local()
+        # version is the number of stages committed so far:
+        self.__version = 0
+        # written is the mapping between the keys of the parts of the context
+        # altered by committed stages and the version they were altered at:
+        self.__written = {}
+
         # new_storage_acc_required signals whether a new storage account should
         # be created in order to support any storage-related operations.
         self.__new_storage_acc_required = False
@@ -61,6 +173,21 @@ class Context(object):
         # is required to be created for the deployment
         self.__new_virtual_network_required = False
 
+        # origin is the name of the translator method currently being run
+        # (ex: "BaseInstanceARMTranslator.get_dependencies"), which all the
+        # dependencies declared in the meantime are attributed to:
+        self.__origin = None
+        # touched_resources is the list of all the resources added or fetched
+        # since the origin was last set, each paired with the number of its
+        # dependencies which were declared beforehand:
+        self.__touched_resources = []
+        # dependency_origins is the mapping between the (resource id, entry)
+        # of each declared dependency and the origin which declared it:
+        self.__dependency_origins = {}
+        # origin_template_data is the snapshot of the template data returned
+        # by get_template_data, before any optimizations were applied:
+        self.__origin_template_data = None
+
     def __str__(self):
         """ __str__ simply returns the name of the class. """
         return self.__class__.__name__
@@ -79,6 +206,12 @@ class Context(object):
                         "required for supporting the deployment.")
             self.__set_virtual_network_resource()
 
+        self.set_origin(None)
+        self.__origin_template_data = {
+            "variables": dict(self.variables),
+            "resources": list(self.resources),
+        }
+
         return {
             "parameters": self.parameters,
             "variables": self.variables,
@@ -92,6 +225,11 @@ class Context(object):
             "'%s': adding parameters: %s",
             self, json.dumps(parameters, indent=4)
         )
+        stage = self.__get_stage()
+        if stage:
+            stage.parameters.update(parameters)
+            return
+
         self.parameters.update(parameters)
 
     def add_variables(self, variables):
@@ -101,8 +239,47 @@ class Context(object):
             "'%s': adding variables: %s", self,
             json.dumps(variables, indent=4)
         )
+        stage = self.__get_stage()
+        if stage:
+            stage.variables.update(variables)
+            return
+
         self.variables.update(variables)
 
+    def get_parameters(self):
+        """ get_parameters returns the dict of all the parameters declared so
+        far; including those added by the stage run from the current thread.
+
+        NOTE: the result must be treated as read-only; and staged functions
+        must read the parameters through it so that their stages do not get
+        committed should other stages add parameters in the meantime.
+        """
+        stage = self.__get_stage()
+        if not stage:
+            return self.parameters
+
+        stage.reads.add(("parameters",))
+        parameters = dict(self.parameters)
+        parameters.update(stage.parameters)
+        return parameters
+
+    def get_variables(self):
+        """ get_variables returns the dict of all the variables declared so
+        far; including those added by the stage run from the current thread.
+
+        NOTE: the result must be treated as read-only; and staged functions
+        must read the variables through it so that their stages do not get
+        committed should other stages add variables in the meantime.
+        """
+        stage = self.__get_stage()
+        if not stage:
+            return self.variables
+
+        stage.reads.add(("variables",))
+        variables = dict(self.variables)
+        variables.update(stage.variables)
+        return variables
+
     def add_resource(self, resource):
         """ add_resource adds a resource to the context's resources.
         """
@@ -110,19 +287,175 @@ class Context(object):
             "'%s': adding resource: %s", self,
             json.dumps(resource, indent=4)
         )
+        stage = self.__get_stage()
+        if stage:
+            stage.resources.append(resource)
+            return
+
         self.resources.append(resource)
+        self.__touched_resources.append((resource, 0))
+
+    def register_availability_set(self, name):
+        """ register_availability_set registers the availability set with the
+        given name to exist; returning whether it had not been registered yet
+        and thus the caller is the one which should add its resource.
+        """
+        stage = self.__get_stage()
+        if stage:
+            stage.reads.add(("availability_set", name))
+            if (name in self.availability_set_names or
+                    name in stage.availability_set_names):
+                return False
+
+            stage.availability_set_names.append(name)
+            return True
+
+        if name in self.availability_set_names:
+            return False
+
+        self.availability_set_names.append(name)
+        return True
+
+    def run_staged(self, origin, func):
+        """ run_staged runs the given function (ex: a translator's
+        update_context) with all the changes it makes to the context being
+        staged rather than applied; returning the stage to be passed to
+        commit_stage. Any exception raised by the function is set as the
+        'exception' attribute of the stage rather than being propagated.
+
+        The function is run against the context as it is at the time of the
+        call, so any number of functions may be run concurrently through
+        run_staged from different threads as long as no stage is committed
+        in the meantime.
+        """
+        stage = _Stage(origin, self.__version)
+        self.__local.stage = stage
+        try:
+            func()
+        except Exception as ex:
+            stage.exception = ex
+        finally:
+            self.__local.stage = None
+
+        return stage
+
+    def commit_stage(self, stage):
+        """ commit_stage applies all the changes of the given stage to the
+        context; returning False without applying any of them if the stage
+        relied on any part of the context which was altered by stages
+        committed after it was started.
+
+        Committing the stages of several functions in the order they would
+        have been run in yields the same context as running them one by one;
+        provided those which could not be committed are run again.
+        """
+        if not self.__is_current(stage):
+            return False
+
+        self.__version = self.__version + 1
+        self.set_origin(stage.origin)
+
+        self.parameters.update(stage.parameters)
+        if stage.parameters:
+            self.__written[("parameters",)] = self.__version
+        self.variables.update(stage.variables)
+        if stage.variables:
+            self.__written[("variables",)] = self.__version
+
+        for resource, altered in stage.copies.values():
+            self.__touched_resources.append(
+                (resource, len(resource.get("dependsOn", [])))
+            )
+            _merge(resource, altered)
+            self.__written[("resource", id(resource))] = self.__version
+
+        for resource in stage.resources:
+            self.resources.append(resource)
+            self.__touched_resources.append((resource, 0))
+        if stage.resources:
+            self.__written[("resources",)] = self.__version
+
+        for name in stage.availability_set_names:
+            self.availability_set_names.append(name)
+            self.__written[("availability_set", name)] = self.__version
+
+        if stage.new_storage_acc_required:
+            self.set_storage_account_required()
+        if stage.new_virtual_network_required:
+            self.set_virtual_network_required()
+
+        return True
+
+    def set_origin(self, origin):
+        """ set_origin sets the name of the translator method which all the
+        dependencies declared from now on are to be attributed to.
+        """
+        stage = self.__get_stage()
+        if stage:
+            stage.origin = origin
+            return
+
+        for resource, start in self.__touched_resources:
+            for entry in resource.get("dependsOn", [])[start:]:
+                self.__dependency_origins.setdefault(
+                    (id(resource), entry), self.__origin
+                )
+
+        self.__origin = origin
+        self.__touched_resources = []
+
+    def get_dependency_origins(self):
+        """ get_dependency_origins returns the mapping between the pairs of
+        (type, name) tuples of each resource instance and of each resource
+        instance it depends on and the name of the translator method which
+        declared the dependency.
+
+        NOTE: it may only be called after get_template_data.
+        """
+        graph = DependencyGraph(self.__origin_template_data)
+        resources = self.__origin_template_data["resources"]
+
+        origins = {}
+        for index, resource in enumerate(resources):
+            for entry, targets in graph.get_entries(index):
+                origin = self.__dependency_origins.get((id(resource), entry))
+                if not origin or not targets:
+                    continue
+
+                for copy_index, nodes in targets.items():
+                    source = graph.get_identity((index, copy_index))
+                    for node in nodes:
+                        origins.setdefault(
+                            (source, graph.get_identity(node)), origin
+                        )
+
+        return origins
 
     def set_storage_account_required(self):
         """ set_storage_account_required sets the
         __new_storage_acc_required flag.
         """
+        stage = self.__get_stage()
+        if stage:
+            stage.new_storage_acc_required = True
+            return
+
         self.__new_storage_acc_required = True
+        if self.parent:
+            self.parent.set_storage_account_required()
 
     def set_virtual_network_required(self):
         """ set_virtual_network_required sets the
         __new_virtual_network_required flag.
         """
+        stage = self.__get_stage()
+        if stage:
+            stage.new_virtual_network_required = True
+            return
+
         self.__new_virtual_network_required = True
+        if self.parent:
+            self.parent.set_virtual_network_required()
 
     def get_arm_resource(self, resource_props):
         """ get_arm_resource returns the dict of the existing ARM resource
@@ -133,14 +466,28 @@ class Context(object):
             self, json.dumps(resource_props, indent=4)
         )
 
-        for res in self.resources:
-            if all((k in res and res[k] == v) for k, v in
-                   resource_props.items()):
-                LOG.debug(
-                    "'%s': found arm resource: %s",
-                    self, json.dumps(res, indent=4)
+        stage = self.__get_stage()
+        match, res = self.__match_resource(resource_props, stage)
+        if stage:
+            stage.queries.append((resource_props, match))
+            if match and match[0] == "resource":
+                # NOTE: the stage is given a private copy of the resource to
+                # alter, whose changes are applied when it is committed:
+                if match[1] not in stage.copies:
+                    stage.reads.add(match)
+                    stage.copies[match[1]] = (res, copy.deepcopy(res))
+                res = stage.copies[match[1]][1]
+
+        if res is not None:
+            LOG.debug(
+                "'%s': found arm resource: %s",
+                self, json.dumps(res, indent=4)
+            )
+            if not stage:
+                self.__touched_resources.append(
+                    (res, len(res.get("dependsOn", [])))
                 )
-                return res
+            return res
 
     def get_heat_resources(self, resource_props):
         """ get_heat_resources returns the list of all Heat resource present in
@@ -166,6 +513,55 @@ class Context(object):
 
         return resources
 
+    def __get_stage(self):
+        """ __get_stage is a helper method which returns the _Stage run from
+        the current thread or None if its changes are to be applied directly.
+        """
+        return getattr(self.__local, "stage", None)
+
+    def __match_resource(self, resource_props, stage=None):
+        """ __match_resource is a helper method which returns the first
+        resource which matches the provided properties, out of those of the
+        context and those added within the given stage; along with a key which
+        identifies it (or a pair of Nones if none matches).
+
+        NOTE: the resources of the context are matched by the copies of them
+        which the stage may have altered, if any.
+        """
+        for res in self.resources:
+            view = res
+            if stage and id(res) in stage.copies:
+                view = stage.copies[id(res)][1]
+            if all((k in view and view[k] == v) for k, v in
+                   resource_props.items()):
+                return ("resource", id(res)), res
+
+        if stage:
+            for index, res in enumerate(stage.resources):
+                if all((k in res and res[k] == v) for k, v in
+                       resource_props.items()):
+                    return ("staged", index), res
+
+        return None, None
+
+    def __is_current(self, stage):
+        """ __is_current is a helper method which returns whether none of the
+        parts of the context which the given stage relied on have been altered
+        by the stages committed after it was started.
+        """
+        if any(self.__written.get(key, 0) > stage.version
+               for key in stage.reads):
+            return False
+
+        # NOTE: the resources added by the stages committed in the meantime
+        # may precede the ones the queries of the stage matched otherwise:
+        if self.__written.get(("resources",), 0) > stage.version:
+            for resource_props, match in stage.queries:
+                if self.__match_resource(resource_props, stage)[0] != match:
+                    return False
+
+        return True
+
     def __set_storage_account_resource(self):
         """ __set_storage_account_resource is a helper method which sets the
         parameters, variables and resource data for the default storage account
@@ -182,20 +578,21 @@ class Context(object):
         })
 
         self.variables.update({
-            'storageAccountType': CONF.azure_storage_account_type,
+            'storageAccountType': self.config.azure_storage_account_type,
             "vmStorageAccountContainerName":
-                CONF.azure_storage_container_name
+                self.config.azure_storage_container_name
         })
 
-        self.resources.append({
-            "type": "Microsoft.Storage/storageAccounts",
-            "name": "[parameters('newStorageAccountName')]",
-            "apiVersion": CONF.arm_api_version,
-            "location": "[variables('location')]",
-            "properties": {
-                "accountType": "[variables('storageAccountType')]"
-            }
-        })
+        # NOTE: nested templates reference the one of their parent instead:
+        if self.parent:
+            return
+
+        frags = fragments.get_fragment_factory(self.config)
+        self.resources.append(frags.resource(
+            "Microsoft.Storage/storageAccounts",
+            self.strings.parameter("newStorageAccountName"),
+            properties=frags.storage_account_properties()
+        ))
 
     def __set_virtual_network_resource(self):
         """ __set_virtual_network_resource is a helper method which sets the
@@ -221,14 +618,18 @@ class Context(object):
                                 "'/subnets/',variables('defaultSubnetName'))]"
         })
 
+        # NOTE: nested templates reference the one of their parent instead:
+        if self.parent:
+            return
+
         self.resources.append({
             "type": "Microsoft.Network/virtualNetworks",
-            "name": "[parameters('newVirtualNetworkName')]",
-            "apiVersion": CONF.arm_api_version,
-            "location": "[variables('location')]",
+            "name": self.strings.parameter("newVirtualNetworkName"),
+            "apiVersion": self.config.arm_api_version,
+            "location": expressions.LOCATION,
             "properties": {
                 "subnets": [{
-                    "name": "[variables('defaultSubnetName')]",
+                    "name": self.strings.variable("defaultSubnetName"),
                     "properties": {
                         "addressPrefix": "10.0.0.0/24"
                     }
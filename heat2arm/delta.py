@@ -0,0 +1,208 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the logic for computing the delta between a previous ARM template
+    and the result of a new conversion; which is a template of only the
+    changed resources to be deployed in ARM's incremental mode.
+"""
+
+import json
+import logging
+
+from heat2arm.dependency_graph import DependencyGraph
+from heat2arm.linked_templates import make_template
+from heat2arm.optimizers import utils
+
+
+LOG = logging.getLogger("__heat2arm__.%s" % __name__)
+
+
+class TemplateDelta(object):
+    """ TemplateDelta compares the resources of a previous ARM template with
+    those of a new one; each resource being identified by its type and name.
+
+    A resource is considered changed if it was added or if its definition or
+    the values of any of the variables or parameter definitions it references
+    differ between the templates. Resources which were removed are only
+    reported; as deployments in incremental mode never delete any resources.
+    """
+
+    def __init__(self, previous, current, config_snapshot):
+        """ A TemplateDelta is created from the dicts of parameters, variables
+        and resources of the previous template and those of the new one and
+        the ConfigSnapshot the latter was converted with.
+        """
+        self._config = config_snapshot
+        self._current = current
+        self._graph = DependencyGraph(current)
+
+        self._previous = self._get_signatures(
+            previous, DependencyGraph(previous)
+        )
+        self._signatures = self._get_signatures(current, self._graph)
+
+    def get_summary(self):
+        """ get_summary returns the dict between the kinds of the changes
+        ("added", "modified", "removed") and the sorted lists of the names of
+        the resources they apply to, along with the number of unchanged ones.
+        """
+        summary = {"added": [], "modified": [], "removed": [], "unchanged": 0}
+        for identity, (name, signature) in self._signatures.items():
+            if identity not in self._previous:
+                summary["added"].append(name)
+            elif self._previous[identity][1] != signature:
+                summary["modified"].append(name)
+            else:
+                summary["unchanged"] += 1
+
+        summary["removed"] = [
+            name for identity, (name, _) in self._previous.items()
+            if identity not in self._signatures
+        ]
+
+        for kind in ("added", "modified", "removed"):
+            summary[kind].sort()
+        return summary
+
+    def get_changed_indexes(self):
+        """ get_changed_indexes returns the sorted list of the indexes of the
+        resources of the new template which were added or modified.
+        """
+        return sorted(
+            index for index in range(len(self._current["resources"]))
+            if self._is_changed(index)
+        )
+
+    def make_template(self):
+        """ make_template returns the template of only the changed resources
+        of the new template; along with the parameters and variables they
+        reference.
+
+        NOTE: the dependencies of the changed resources on unchanged ones are
+        dropped; as the latter are already deployed and are not part of the
+        template. Those which cannot be statically evaluated are kept as-is.
+        """
+        indexes = self.get_changed_indexes()
+        resources = [
+            self._get_delta_resource(index, set(indexes))
+            for index in indexes
+        ]
+
+        variables = self._current.get("variables", {})
+        parameters = self._current.get("parameters", {})
+        variable_names, parameter_names = utils.get_references(
+            resources, variables
+        )
+
+        return make_template(
+            {
+                name: parameters[name]
+                for name in sorted(parameter_names) if name in parameters
+            },
+            {
+                name: variables[name]
+                for name in sorted(variable_names) if name in variables
+            },
+            resources, self._config
+        )
+
+    def _is_changed(self, index):
+        """ _is_changed is a helper method which returns whether the resource
+        of the new template with the given index was added or modified.
+        """
+        identity = self._graph.get_identity((index, None))
+        previous = self._previous.get(identity)
+        return (
+            previous is None or
+            previous[1] != self._signatures[identity][1]
+        )
+
+    def _get_delta_resource(self, index, indexes):
+        """ _get_delta_resource is a helper method which returns the resource
+        with the given index without any of its dependencies on resources
+        which are not amongst the ones with the given indexes.
+        """
+        resource = self._current["resources"][index]
+        if "dependsOn" not in resource:
+            return resource
+
+        entries = []
+        for entry, targets in self._graph.get_entries(index):
+            if targets is not None and any(
+                    node[0] not in indexes
+                    for nodes in targets.values() for node in nodes):
+                continue
+            entries.append(entry)
+
+        return dict(resource, dependsOn=entries)
+
+    @staticmethod
+    def _get_signatures(template_data, graph):
+        """ _get_signatures is a helper method which returns the mapping
+        between the identities of all the resources of the given template
+        and the pairs of their names and the signatures of their definitions.
+
+        NOTE: the order of the dependencies of a resource is irrelevant, and
+        the variables and parameters it references are part of its signature.
+        """
+        variables = template_data.get("variables", {})
+        parameters = template_data.get("parameters", {})
+
+        signatures = {}
+        for index, resource in enumerate(template_data["resources"]):
+            variable_names, parameter_names = utils.get_references(
+                resource, variables
+            )
+
+            definition = dict(resource)
+            if "dependsOn" in definition:
+                definition["dependsOn"] = sorted(definition["dependsOn"])
+
+            identity = graph.get_identity((index, None))
+            signatures[identity] = (
+                graph.get_resource_name((index, None)), json.dumps([
+                    definition,
+                    {name: variables.get(name) for name in variable_names},
+                    {name: parameters.get(name) for name in parameter_names},
+                ], sort_keys=True)
+            )
+
+        return signatures
+
+
+def get_delta(previous, current, config_snapshot):
+    """ get_delta returns the template of only the resources of the given new
+    template which changed since the previous one, along with the summary of
+    all the changes between them. The template is made with the given
+    ConfigSnapshot.
+    """
+    delta = TemplateDelta(previous, current, config_snapshot)
+    summary = delta.get_summary()
+
+    LOG.info(
+        "%d resources were added, %d modified and %d removed since the"
+        " previous template; %d are unchanged.", len(summary["added"]),
+        len(summary["modified"]), len(summary["removed"]),
+        summary["unchanged"]
+    )
+    if summary["removed"]:
+        LOG.warning(
+            "Resources removed since the previous template are not deleted by"
+            " incremental deployments: %s", ", ".join(summary["removed"])
+        )
+
+    return delta.make_template(), summary
+
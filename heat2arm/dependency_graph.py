@@ -0,0 +1,345 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the definition of the graph of the dependencies declared between
+    the resources of the resulting ARM template.
+"""
+
+import logging
+
+from heat2arm import evaluator
+
+
+LOG = logging.getLogger("__heat2arm__.%s" % __name__)
+
+
+class DependencyGraphException(Exception):
+    """ DependencyGraphException is the base class for all the exceptions
+    raised while building the graph of the dependencies of a template.
+    """
+    pass
+
+
+class DanglingDependencyException(DependencyGraphException):
+    """ DanglingDependencyException is raised whenever a resource depends
+    on a resource which is not defined within the template.
+    """
+    pass
+
+
+class CircularDependencyException(DependencyGraphException):
+    """ CircularDependencyException is raised whenever the dependencies
+    between the resources of the template form a cycle.
+    """
+    pass
+
+
+class DependencyGraph(object):
+    """ DependencyGraph is the graph of the dependencies declared through the
+    'dependsOn' fields of the resources of an ARM template.
+
+    Its nodes are the individual instances of the resources; a resource which
+    is not part of a copy loop having a single node whose copy index is None.
+    Each node is identified by a (resource index, copy index) tuple.
+
+    NOTE: entries of 'dependsOn' fields which cannot be statically evaluated
+    (ex: ones using reference()) are left out of the graph altogether.
+    """
+
+    def __init__(self, template_data):
+        """ A DependencyGraph is created from the dict of parameters,
+        variables and resources of the template.
+        """
+        self.resources = template_data["resources"]
+        self._evaluator = evaluator.StaticEvaluator(
+            template_data.get("variables", {})
+        )
+
+        # nodes is the list of the nodes of the graph:
+        self.nodes = []
+        # edges is the mapping between each node and the set
+        # of all the nodes it directly depends on:
+        self.edges = {}
+
+        # _entries is the mapping between each resource index and the list of
+        # its 'dependsOn' entries, each paired with the mapping between its
+        # copy indexes and the sets of nodes the entry points to (or None
+        # if the entry could not be evaluated):
+        self._entries = {}
+        # _instances is the mapping between resource indexes and their nodes:
+        self._instances = {}
+        # _by_id is the mapping between the (type, name) of each resource
+        # instance and its node:
+        self._by_id = {}
+        # _by_name is the mapping between the names of the resource instances
+        # or copy loops and the list of the nodes they refer to:
+        self._by_name = {}
+
+        self._add_nodes()
+        self._add_edges()
+        self.order = self._get_topological_order()
+
+        # _reach is the mapping between each node and the bitmask
+        # of all the nodes it depends on, directly or indirectly:
+        self._reach = self._get_reachability()
+
+    def get_resource_name(self, node):
+        """ get_resource_name returns the name which the
+        given node is referenced by in messages.
+        """
+        name = "%s/%s" % self._get_type_and_name(*node)
+        if node[1] is not None:
+            name = "%s[%d]" % (name, node[1])
+        return name
+
+    def get_identity(self, node):
+        """ get_identity returns the (type, name) tuple which identifies the
+        resource instance of the given node regardless of its position in the
+        template (ex: after being folded into a copy loop).
+
+        NOTE: as ARM, it is case insensitive.
+        """
+        res_type, name = self._get_type_and_name(*node)
+        return res_type.lower(), name.lower()
+
+    def get_entries(self, index):
+        """ get_entries returns the list of the 'dependsOn' entries of the
+        resource with the given index; each paired with the mapping between
+        the copy indexes of the resource and the sets of nodes the entry
+        points to, or None if the entry could not be evaluated.
+        """
+        return self._entries.get(index, [])
+
+    def get_resource_dependencies(self):
+        """ get_resource_dependencies returns the mapping between the index
+        of each resource and the set of the indexes of the resources any of
+        its instances directly depend on.
+        """
+        deps = {}
+        for (index, _), targets in self.edges.items():
+            deps.setdefault(index, set()).update(
+                target[0] for target in targets
+            )
+        return deps
+
+    def reduce(self):
+        """ reduce returns the mapping between the index of each resource and
+        the list of its 'dependsOn' entries which are not implied by any of the
+        others through the transitive dependencies of the resources.
+
+        NOTE: dependencies are reduced entry by entry; so an entry of a copy
+        loop is only dropped if it is implied for all of its instances.
+        """
+        bits = {node: 1 << i for i, node in enumerate(self.nodes)}
+
+        reduced = {}
+        for index, entries in self._entries.items():
+            masks = []
+            for _, targets in entries:
+                if targets is None:
+                    masks.append(None)
+                    continue
+
+                masks.append({
+                    copy_index: (
+                        sum(bits[node] for node in nodes),
+                        self._get_mask(nodes, bits)
+                    )
+                    for copy_index, nodes in targets.items()
+                })
+
+            # NOTE: entries are considered last to first so that
+            # the first of any duplicate entries is the one kept:
+            kept = list(range(len(entries)))
+            for i in reversed(range(len(entries))):
+                if masks[i] is None:
+                    continue
+
+                others = [j for j in kept if j != i and masks[j] is not None]
+                if all((direct & ~self._or(
+                        masks[j][copy_index][1] for j in others)) == 0
+                       for copy_index, (direct, _) in masks[i].items()):
+                    kept.remove(i)
+
+            reduced[index] = [entries[i][0] for i in kept]
+
+        return reduced
+
+    def _or(self, masks):
+        """ _or is a helper method which returns the union of the masks. """
+        result = 0
+        for mask in masks:
+            result |= mask
+        return result
+
+    def _get_mask(self, nodes, bits):
+        """ _get_mask is a helper method which returns the bitmask of the
+        given nodes and all the nodes they depend on.
+        """
+        mask = 0
+        for node in nodes:
+            mask |= bits[node] | self._reach[node]
+        return mask
+
+    def _evaluate(self, value, copy_index):
+        """ _evaluate is a helper method which returns the statically evaluated
+        value of the given expression or None if it cannot be evaluated.
+        """
+        try:
+            return self._evaluator.evaluate(value, copy_index)
+        except evaluator.ExpressionEvaluationException as ex:
+            LOG.debug("Unable to evaluate '%s': %s", value, ex)
+            return None
+
+    def _get_type_and_name(self, index, copy_index):
+        """ _get_type_and_name is a helper method which returns the type and
+        evaluated name of the given instance of the given resource.
+
+        NOTE: names which cannot be evaluated are identified by their
+        unevaluated expressions.
+        """
+        resource = self.resources[index]
+        name = self._evaluate(resource.get("name", ""), copy_index)
+        if not isinstance(name, str):
+            name = resource.get("name", "")
+        return resource.get("type", ""), name
+
+    def _add_nodes(self):
+        """ _add_nodes is a helper method which adds the nodes of all the
+        instances of all the resources of the template.
+        """
+        for index, resource in enumerate(self.resources):
+            copy_indexes = [None]
+            if "copy" in resource:
+                count = self._evaluate(resource["copy"].get("count"), None)
+                if isinstance(count, int):
+                    copy_indexes = list(range(count))
+
+            nodes = [(index, copy_index) for copy_index in copy_indexes]
+            self._instances[index] = nodes
+            for node in nodes:
+                self.nodes.append(node)
+                self.edges[node] = set()
+
+                identity = self.get_identity(node)
+                self._by_id[identity] = node
+                self._by_name.setdefault(identity[1], []).append(node)
+
+            if "copy" in resource:
+                self._by_name.setdefault(
+                    resource["copy"].get("name", "").lower(), []
+                ).extend(nodes)
+
+    def _add_edges(self):
+        """ _add_edges is a helper method which resolves all the 'dependsOn'
+        entries of all the resources to the nodes they point to.
+        """
+        for index, resource in enumerate(self.resources):
+            entries = []
+            for entry in resource.get("dependsOn", []):
+                targets = {}
+                for node in self._instances[index]:
+                    nodes = self._resolve(node, entry)
+                    if nodes is None:
+                        targets = None
+                        break
+                    targets[node[1]] = nodes
+                    self.edges[node].update(nodes)
+                entries.append((entry, targets))
+
+            if entries:
+                self._entries[index] = entries
+
+    def _resolve(self, node, entry):
+        """ _resolve is a helper method which returns the set of nodes the
+        given 'dependsOn' entry points to for the given node.
+
+        It raises a DanglingDependencyException if the entry does
+        not point to any resource defined within the template.
+        """
+        value = self._evaluate(entry, node[1])
+        if not isinstance(value, str):
+            return None
+
+        # NOTE: both fully qualified resource IDs and the "<type>/<name>"
+        # form are accepted; as are simple names of resources or copy loops:
+        if "/providers/" in value:
+            value = value.rsplit("/providers/", 1)[1]
+        parts = value.split("/")
+        if len(parts) > 2:
+            target = self._by_id.get(
+                ("/".join(parts[:2]).lower(), "/".join(parts[2:]).lower())
+            )
+            nodes = [target] if target else []
+        else:
+            nodes = self._by_name.get(value.lower(), [])
+
+        if not nodes:
+            raise DanglingDependencyException(
+                "Resource '%s' depends on '%s', which is not defined within"
+                " the template." % (self.get_resource_name(node), value)
+            )
+
+        return set(nodes) - set([node])
+
+    def _get_topological_order(self):
+        """ _get_topological_order is a helper method which returns the list
+        of all the nodes of the graph with each one following all of its
+        dependencies.
+
+        It raises a CircularDependencyException if the dependencies
+        form a cycle.
+        """
+        dependents = {node: [] for node in self.nodes}
+        pending = {}
+        for node, targets in self.edges.items():
+            pending[node] = len(targets)
+            for target in targets:
+                dependents[target].append(node)
+
+        order = [node for node in self.nodes if not pending[node]]
+        for node in order:
+            for dependent in dependents[node]:
+                pending[dependent] = pending[dependent] - 1
+                if not pending[dependent]:
+                    order.append(dependent)
+
+        if len(order) != len(self.nodes):
+            cycle = sorted(
+                self.get_resource_name(node)
+                for node in self.nodes if pending[node]
+            )
+            raise CircularDependencyException(
+                "Circular dependencies block the deployment of resources:"
+                " %s." % ", ".join("'%s'" % name for name in cycle)
+            )
+
+        return order
+
+    def _get_reachability(self):
+        """ _get_reachability is a helper method which returns the mapping
+        between each node and the bitmask of all its dependencies.
+        """
+        bits = {node: 1 << i for i, node in enumerate(self.nodes)}
+
+        reach = {}
+        for node in self.order:
+            mask = 0
+            for target in self.edges[node]:
+                mask |= bits[target] | reach[target]
+            reach[node] = mask
+
+        return reach
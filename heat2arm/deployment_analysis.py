@@ -0,0 +1,294 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the analysis of how the deployment of a resulting ARM template
+    would unfold; estimating its duration and pointing out the translators
+    whose declared dependencies serialize it.
+"""
+
+import heapq
+
+from heat2arm import config
+from heat2arm.dependency_graph import DependencyGraph
+
+
+# UNKNOWN_ORIGIN is the origin reported for dependencies
+# which cannot be attributed to any translator method:
+UNKNOWN_ORIGIN = "<unknown>"
+
+
+class DeploymentAnalysis(object):
+    """ DeploymentAnalysis analyses the graph of the dependencies of a
+    template; computing its depth, width and critical path and simulating
+    its deployment, with each resource taking the time listed for its type
+    to provision and at most a given number of resources being provisioned
+    at the same time.
+
+    NOTE: the simulation is a local stand-in for ARM; which starts deploying
+    each resource as soon as all of its dependencies have been deployed.
+    """
+
+    def __init__(self, template_data, dependency_origins=None,
+                 config_snapshot=None, provisioning_times=None,
+                 default_provisioning_time=None, concurrency=None):
+        """ A DeploymentAnalysis is created from the dict of parameters,
+        variables and resources of the template, the mapping between
+        dependencies and their origins returned by the Context's
+        get_dependency_origins and the ConfigSnapshot (defaulting to a
+        snapshot of the current configuration). The remaining arguments
+        default to their respective options of the latter.
+        """
+        if config_snapshot is None:
+            config_snapshot = config.snapshot()
+
+        self._graph = DependencyGraph(template_data)
+        self._origins = dependency_origins or {}
+
+        if provisioning_times is None:
+            provisioning_times = config_snapshot.arm_provisioning_times
+        self._times = {
+            res_type.lower(): float(duration)
+            for res_type, duration in provisioning_times.items()
+        }
+
+        self._default_time = default_provisioning_time
+        if self._default_time is None:
+            self._default_time = config_snapshot.arm_default_provisioning_time
+
+        self._concurrency = concurrency
+        if self._concurrency is None:
+            self._concurrency = config_snapshot.arm_deployment_concurrency
+
+        # finish_times is the mapping between each node and the time its
+        # deployment would finish at given no limit on the concurrency:
+        self._finish_times = {}
+        for node in self._graph.order:
+            self._finish_times[node] = self.get_duration(node) + max(
+                [self._finish_times[dep] for dep in self._graph.edges[node]]
+                or [0]
+            )
+
+    def get_duration(self, node):
+        """ get_duration returns the estimated number of seconds the
+        provisioning of the resource of the given node takes.
+        """
+        res_type, _ = self._graph.get_identity(node)
+        return self._times.get(res_type, self._default_time)
+
+    def get_origin(self, node, dependency):
+        """ get_origin returns the name of the translator method which
+        declared the dependency of the given node on the given one.
+        """
+        return self._origins.get(
+            (self._graph.get_identity(node),
+             self._graph.get_identity(dependency)),
+            UNKNOWN_ORIGIN
+        )
+
+    def get_levels(self):
+        """ get_levels returns the list of the sets of nodes on each level of
+        the graph; the nodes of each level only depending on previous ones.
+        """
+        depths = {}
+        levels = []
+        for node in self._graph.order:
+            depth = max(
+                [depths[dep] + 1 for dep in self._graph.edges[node]] or [0]
+            )
+            depths[node] = depth
+            if depth == len(levels):
+                levels.append(set())
+            levels[depth].add(node)
+
+        return levels
+
+    def get_critical_path(self):
+        """ get_critical_path returns the list of the nodes on the longest
+        chain of dependencies by provisioning time; in order of deployment.
+        """
+        if not self._finish_times:
+            return []
+
+        node = max(self._graph.order, key=lambda n: self._finish_times[n])
+        path = [node]
+        while self._graph.edges[node]:
+            node = max(
+                self._graph.edges[node], key=lambda n: self._finish_times[n]
+            )
+            path.append(node)
+
+        return list(reversed(path))
+
+    def get_delay(self, node, dependency):
+        """ get_delay returns how many seconds later the given node can start
+        deploying because of its dependency on the given node; as opposed to
+        only depending on its dependencies which finish deploying earlier.
+
+        NOTE: dependencies which finish deploying at the same time are
+        all considered to delay the node by the same amount.
+        """
+        finish = self._finish_times[dependency]
+        finishes = [self._finish_times[dep] for dep in self._graph.edges[node]]
+        if finish < max(finishes):
+            return 0
+
+        return finish - max([f for f in finishes if f < finish] or [0])
+
+    def simulate(self):
+        """ simulate simulates the deployment of the template with the
+        configured concurrency; returning the mapping between each node and
+        the (start, finish) times of its deployment.
+        """
+        pending = {}
+        dependents = {node: [] for node in self._graph.nodes}
+        for node, deps in self._graph.edges.items():
+            pending[node] = len(deps)
+            for dep in deps:
+                dependents[dep].append(node)
+
+        positions = {node: i for i, node in enumerate(self._graph.order)}
+        ready = [
+            (0, positions[node], node)
+            for node in self._graph.nodes if not pending[node]
+        ]
+        heapq.heapify(ready)
+
+        times = {}
+        running = []
+        now = 0
+        while ready or running:
+            while ready and (not self._concurrency or
+                             len(running) < self._concurrency):
+                _, position, node = heapq.heappop(ready)
+                heapq.heappush(
+                    running, (now + self.get_duration(node), position, node)
+                )
+                times[node] = (now, now + self.get_duration(node))
+
+            now, _, node = heapq.heappop(running)
+            for dependent in dependents[node]:
+                pending[dependent] = pending[dependent] - 1
+                if not pending[dependent]:
+                    heapq.heappush(
+                        ready, (now, positions[dependent], dependent)
+                    )
+
+        return times
+
+    def get_report(self):
+        """ get_report returns the JSON-serializable dict of the results of
+        all the analyses of the deployment of the template.
+        """
+        levels = self.get_levels()
+        path = self.get_critical_path()
+
+        critical = set(zip(path[1:], path[:-1]))
+        serialization = {}
+        for node, deps in self._graph.edges.items():
+            for dep in deps:
+                delay = self.get_delay(node, dep)
+                if not delay:
+                    continue
+
+                origin = serialization.setdefault(self.get_origin(node, dep), {
+                    "dependencies": 0, "delay": 0, "critical_delay": 0
+                })
+                origin["dependencies"] = origin["dependencies"] + 1
+                origin["delay"] = origin["delay"] + delay
+                if (node, dep) in critical:
+                    origin["critical_delay"] = (
+                        origin["critical_delay"] + delay
+                    )
+
+        times = self.simulate()
+        peak = 0
+        events = sorted(
+            [(start, 1) for start, _ in times.values()] +
+            [(finish, -1) for _, finish in times.values()]
+        )
+        running = 0
+        for _, change in events:
+            running = running + change
+            peak = max(peak, running)
+
+        return {
+            "resources": len(self._graph.nodes),
+            "dependencies": sum(
+                len(deps) for deps in self._graph.edges.values()
+            ),
+            "depth": len(levels),
+            "width": max([len(level) for level in levels] or [0]),
+            "critical_path": {
+                "duration": max(self._finish_times.values() or [0]),
+                "resources": [{
+                    "name": self._graph.get_resource_name(node),
+                    "duration": self.get_duration(node),
+                    "finish": self._finish_times[node],
+                } for node in path],
+            },
+            "simulation": {
+                "concurrency": self._concurrency,
+                "duration": max(
+                    [finish for _, finish in times.values()] or [0]
+                ),
+                "peak_concurrency": peak,
+            },
+            "serialization": sorted([
+                dict(stats, origin=origin)
+                for origin, stats in serialization.items()
+            ], key=lambda stats: (-stats["critical_delay"], -stats["delay"],
+                                  stats["origin"])),
+        }
+
+
+def format_report(report):
+    """ format_report returns the human-readable text of the given report
+    returned by a DeploymentAnalysis' get_report.
+    """
+    lines = [
+        "Resources: %d" % report["resources"],
+        "Dependencies: %d" % report["dependencies"],
+        "Depth: %d" % report["depth"],
+        "Width: %d" % report["width"],
+        "",
+        "Critical path (%ds):" % report["critical_path"]["duration"],
+    ]
+    for resource in report["critical_path"]["resources"]:
+        lines.append("    %6ds  +%-4d %s" % (
+            resource["finish"], resource["duration"], resource["name"]
+        ))
+
+    lines.extend([
+        "",
+        "Simulated deployment (%s): %ds, peak of %d concurrent resources." % (
+            "concurrency %d" % report["simulation"]["concurrency"]
+            if report["simulation"]["concurrency"] else "no concurrency limit",
+            report["simulation"]["duration"],
+            report["simulation"]["peak_concurrency"]
+        ),
+        "",
+        "Dependencies delaying the deployment by origin:",
+        "    %-8s %-8s %-12s %s" % (
+            "count", "delay", "critical", "origin"
+        ),
+    ])
+    for stats in report["serialization"]:
+        lines.append("    %-8d %-8s %-12s %s" % (
+            stats["dependencies"], "%ds" % stats["delay"],
+            "%ds" % stats["critical_delay"], stats["origin"]
+        ))
+
+    return "\n".join(lines) + "\n"
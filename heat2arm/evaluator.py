@@ -0,0 +1,200 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the static evaluator of the subset of the ARM template expression
+    language used for naming resources and declaring their dependencies.
+"""
+
+import re
+
+
+class ExpressionEvaluationException(Exception):
+    """ ExpressionEvaluationException is raised whenever an ARM expression
+    cannot be statically evaluated.
+    """
+    pass
+
+
+# _TOKEN_REGEX matches the individual tokens of an ARM expression; capturing
+# either a string literal, an integer, an identifier or a single character:
+_TOKEN_REGEX = re.compile(
+    r"\s*(?:'((?:[^']|'')*)'|(\d+)|([A-Za-z_][A-Za-z0-9_]*)|(\S))"
+)
+
+
+def symbolic(expression):
+    """ symbolic returns the placeholder which stands for the value of the
+    given expression in the results of evaluate when it can only be known
+    at deployment time (ex: "parameters('name')").
+    """
+    return "<%s>" % expression
+
+
+class StaticEvaluator(object):
+    """ StaticEvaluator statically evaluates the subset of the ARM template
+    expression language required for resolving the names and dependencies
+    of resources:
+        - string and integer literals, indexing with []
+        - variables(), concat(), copyIndex() and resourceId()
+        - parameters() and resourceGroup(), which evaluate to placeholders
+    """
+
+    def __init__(self, variables):
+        """ A StaticEvaluator is created from the variables of the template;
+        whose values are evaluated once and cached on their first reference.
+        """
+        self._variables = variables
+        self._evaluated = {}
+
+    def evaluate(self, value, copy_index=None):
+        """ evaluate returns the value of the given template value; evaluating
+        it if it is an expression and using the given copyIndex() value.
+        """
+        if isinstance(value, list):
+            return [self.evaluate(item, copy_index) for item in value]
+        if isinstance(value, dict):
+            return {
+                key: self.evaluate(item, copy_index)
+                for key, item in value.items()
+            }
+        if not isinstance(value, str) or not value.startswith("["):
+            return value
+        if value.startswith("[["):
+            return value[1:]
+        if not value.endswith("]"):
+            return value
+
+        tokens = [
+            match.groups() for match in _TOKEN_REGEX.finditer(value[1:-1])
+            if any(group is not None for group in match.groups())
+        ]
+        result, pos = self._parse(tokens, 0, copy_index)
+        if pos != len(tokens):
+            raise ExpressionEvaluationException(
+                "Unexpected trailing characters in expression '%s'." % value
+            )
+
+        return result
+
+    def _parse(self, tokens, pos, copy_index):
+        """ _parse evaluates the expression starting at the given position
+        of the list of tokens; returning its value and the following position.
+        """
+        if pos >= len(tokens):
+            raise ExpressionEvaluationException(
+                "Unexpected end of expression."
+            )
+
+        string, number, function, char = tokens[pos]
+        pos = pos + 1
+        if string is not None:
+            value = string.replace("''", "'")
+        elif number is not None:
+            value = int(number)
+        elif function is not None:
+            args = []
+            pos = self._expect(tokens, pos, "(")
+            if pos < len(tokens) and tokens[pos][3] == ")":
+                pos = pos + 1
+            else:
+                while True:
+                    arg, pos = self._parse(tokens, pos, copy_index)
+                    args.append(arg)
+                    if pos < len(tokens) and tokens[pos][3] == ",":
+                        pos = pos + 1
+                        continue
+                    pos = self._expect(tokens, pos, ")")
+                    break
+            value = self._call(function, args, copy_index)
+        else:
+            raise ExpressionEvaluationException(
+                "Unexpected character '%s' in expression." % char
+            )
+
+        while pos < len(tokens) and tokens[pos][3] == "[":
+            index, pos = self._parse(tokens, pos + 1, copy_index)
+            pos = self._expect(tokens, pos, "]")
+            try:
+                value = value[index]
+            except (IndexError, KeyError, TypeError):
+                raise ExpressionEvaluationException(
+                    "Unable to index '%s' with '%s'." % (value, index)
+                )
+
+        return value, pos
+
+    def _expect(self, tokens, pos, char):
+        """ _expect checks that the token at the given position is the given
+        character and returns the following position.
+        """
+        if pos >= len(tokens) or tokens[pos][3] != char:
+            raise ExpressionEvaluationException(
+                "Expected '%s' within expression." % char
+            )
+        return pos + 1
+
+    def _call(self, function, args, copy_index):
+        """ _call returns the result of the given function applied
+        over the given arguments.
+        """
+        if function == "variables":
+            if args[0] not in self._variables:
+                raise ExpressionEvaluationException(
+                    "Reference to undefined variable '%s'." % args[0]
+                )
+            if args[0] not in self._evaluated:
+                self._evaluated[args[0]] = self.evaluate(
+                    self._variables[args[0]]
+                )
+            return self._evaluated[args[0]]
+
+        if function == "parameters":
+            return symbolic("parameters('%s')" % args[0])
+
+        if function == "resourceGroup":
+            return {"id": symbolic("resourceGroup().id")}
+
+        if function == "copyIndex":
+            if copy_index is None:
+                raise ExpressionEvaluationException(
+                    "copyIndex() used outside of a copy loop."
+                )
+            return copy_index + (args[0] if args else 0)
+
+        if function == "concat":
+            if args and all(isinstance(arg, list) for arg in args):
+                return [item for arg in args for item in arg]
+            return "".join(str(arg) for arg in args)
+
+        if function == "resourceId":
+            # NOTE: resource IDs get evaluated to the same "<type>/<name>"
+            # form as the dependencies declared using concat():
+            return "/".join(str(arg) for arg in args)
+
+        raise ExpressionEvaluationException(
+            "Unsupported function '%s'." % function
+        )
+
+
+def evaluate(value, variables, copy_index=None):
+    """ evaluate statically evaluates the given template value given the dict
+    of variables of the template and the current copyIndex() (if applicable).
+
+    Parts which may only be evaluated at deployment time are represented
+    through the placeholders returned by symbolic. It raises an
+    ExpressionEvaluationException for any unsupported expressions.
+    """
+    return StaticEvaluator(variables).evaluate(value, copy_index)
@@ -0,0 +1,98 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains helpers for building the ARM template expression strings which
+    are shared between the context and all the resource translators.
+"""
+
+
+def variable(name):
+    """ variable returns the ARM expression referencing
+    the variable with the given name.
+    """
+    return "[variables('%s')]" % name
+
+
+def parameter(name):
+    """ parameter returns the ARM expression referencing
+    the parameter with the given name.
+    """
+    return "[parameters('%s')]" % name
+
+
+def resource_id(resource_type, name_expression):
+    """ resource_id returns the ARM expression for the ID of the resource of
+    the given type whose name is given by the provided inner expression.
+
+    ex: resource_id("Microsoft.Network/publicIPAddresses",
+                    "variables('publicIPAddressName_ip')")
+    """
+    return "[resourceId('%s', %s)]" % (resource_type, name_expression)
+
+
+def dependency(resource_type, name_expression):
+    """ dependency returns the ARM expression to be used within a dependsOn
+    field for the resource of the given type whose name is given by the
+    provided inner expression.
+    """
+    return "[concat('%s/', %s)]" % (resource_type, name_expression)
+
+
+# LOCATION is the expression for the location all resources get deployed in:
+LOCATION = variable("location")
+
+
+class StringPool(object):
+    """ StringPool represents the set of strings interned throughout a single
+    conversion; so that the same expression or variable name (ex: a reference
+    to a variable used by dozens of resources) is only held in memory once
+    within the resulting template.
+
+    It provides the same builders as this module, whose results are interned.
+    NOTE: the pool is owned by the Context of the converted template and
+    shared with those of its nested templates; it goes away along with them.
+    """
+    # LOCATION is a single constant string already:
+    LOCATION = LOCATION
+
+    def __init__(self):
+        # strings is the mapping of each interned string to its single
+        # shared instance:
+        self._strings = {}
+
+    def __len__(self):
+        """ __len__ returns the number of strings interned so far. """
+        return len(self._strings)
+
+    def intern(self, string):
+        """ intern returns the pooled instance of the given string. """
+        return self._strings.setdefault(string, string)
+
+    def variable(self, name):
+        """ variable returns the interned variable expression. """
+        return self.intern(variable(name))
+
+    def parameter(self, name):
+        """ parameter returns the interned parameter expression. """
+        return self.intern(parameter(name))
+
+    def resource_id(self, resource_type, name_expression):
+        """ resource_id returns the interned resource ID expression. """
+        return self.intern(resource_id(resource_type, name_expression))
+
+    def dependency(self, resource_type, name_expression):
+        """ dependency returns the interned dependency expression. """
+        return self.intern(dependency(resource_type, name_expression))
@@ -0,0 +1,332 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the logic for splitting the resulting ARM template into several
+    linked templates which are all deployed through a master template.
+"""
+
+import collections
+import json
+import logging
+
+from heat2arm import config
+from heat2arm import expressions
+from heat2arm.dependency_graph import DependencyGraph
+from heat2arm.optimizers import utils
+
+
+LOG = logging.getLogger("__heat2arm__.%s" % __name__)
+
+# BASE_URI_PARAMETER is the name of the parameter of the master template
+# holding the URI which all the linked templates are uploaded under:
+BASE_URI_PARAMETER = "linkedTemplatesBaseUri"
+
+
+class LinkedTemplatesException(Exception):
+    """ LinkedTemplatesException is raised whenever the template cannot be
+    split into linked templates within the configured limits.
+    """
+    pass
+
+
+def make_template(parameters, variables, resources, config_snapshot):
+    """ make_template returns the dict which is directly renderable into the
+    JSON of an ARM template with the given parameters, variables and resources
+    and the versions of the given ConfigSnapshot.
+    """
+    return collections.OrderedDict([
+        ("contentVersion", config_snapshot.arm_template_version),
+        ("$schema", config_snapshot.arm_schema_url),
+        ("parameters", parameters),
+        ("variables", variables),
+        ("resources", resources)
+    ])
+
+
+class TemplateSplitter(object):
+    """ TemplateSplitter partitions the resources of a template along the
+    graph of their dependencies into several linked templates; each within
+    the configured limits on the number of resources and size.
+
+    The resources are grouped by the first resource no other one depends on
+    (ex: a VM) whose dependencies they are; so that each group holds a chain
+    of resources (ex: the VM, its NICs and public IPs) which only depends on
+    the resources of previous groups (ex: the virtual network and storage
+    account shared by all VMs). The groups are then packed in linked
+    templates which never depend on following ones, so that the templates of
+    independent groups may all be deployed concurrently and the number of
+    cross-template dependencies is kept minimal.
+    """
+
+    def __init__(self, template_data, config_snapshot=None,
+                 max_resources=None, max_size=None):
+        """ A TemplateSplitter is created from the dict of parameters,
+        variables and resources of the template and the ConfigSnapshot
+        (defaulting to a snapshot of the current configuration). The limits
+        default to their respective options of the latter.
+        """
+        if config_snapshot is None:
+            config_snapshot = config.snapshot()
+
+        self._config = config_snapshot
+        self._template_data = template_data
+        self._resources = template_data["resources"]
+        self._variables = template_data["variables"]
+        self._graph = DependencyGraph(template_data)
+
+        self._max_resources = max_resources or (
+            config_snapshot.linked_template_max_resources
+        )
+        self._max_size = max_size or config_snapshot.linked_template_max_size
+
+        # deps is the mapping between the index of each resource and the set
+        # of the indexes of all the other resources it depends on:
+        self._deps = {index: set() for index in range(len(self._resources))}
+        for index, deps in self._graph.get_resource_dependencies().items():
+            self._deps[index].update(deps - set([index]))
+
+        self._counts = {}
+        for node in self._graph.nodes:
+            self._counts[node[0]] = self._counts.get(node[0], 0) + 1
+        self._sizes = {
+            index: len(json.dumps(resource))
+            for index, resource in enumerate(self._resources)
+        }
+
+    def get_partitions(self):
+        """ get_partitions returns the list of the lists of the indexes of
+        the resources within each linked template, ordered such that each
+        linked template only depends on the ones preceding it.
+        """
+        partitions = []
+        weights = []
+        owners = {}
+        for group in self._get_groups():
+            weight = self._get_weight(group)
+            if not self._fits(weight):
+                # NOTE: groups which do not fit in a template on their own are
+                # split into their resources; which are in dependency order:
+                units = [[index] for index in group]
+            else:
+                units = [group]
+
+            for unit in units:
+                self._pack(unit, partitions, weights, owners)
+
+        return [sorted(partition) for partition in partitions]
+
+    def split(self):
+        """ split returns the master template and the ordered dict between
+        the names of the linked templates and the templates themselves.
+        """
+        partitions = self.get_partitions()
+        owners = {
+            index: i
+            for i, partition in enumerate(partitions) for index in partition
+        }
+        names = ["linkedTemplate%d" % i for i in range(len(partitions))]
+
+        linked = collections.OrderedDict()
+        deployments = []
+        for i, partition in enumerate(partitions):
+            resources = []
+            for index in partition:
+                resources.append(self._get_linked_resource(index, owners))
+
+            variable_names, parameter_names = utils.get_references(
+                resources, self._variables
+            )
+            parameters = self._template_data["parameters"]
+            linked[names[i]] = make_template(
+                {
+                    name: parameters[name]
+                    for name in sorted(parameter_names) if name in parameters
+                },
+                {
+                    name: self._variables[name]
+                    for name in sorted(variable_names)
+                    if name in self._variables
+                },
+                resources, self._config
+            )
+
+            deployments.append({
+                "apiVersion": self._config.arm_deployments_api_version,
+                "type": "Microsoft.Resources/deployments",
+                "name": names[i],
+                "dependsOn": [
+                    expressions.dependency(
+                        "Microsoft.Resources/deployments", "'%s'" % names[j]
+                    )
+                    for j in sorted(set(
+                        owners[dep] for index in partition
+                        for dep in self._deps[index]
+                    ) - set([i]))
+                ],
+                "properties": {
+                    "mode": "Incremental",
+                    "templateLink": {
+                        "uri": "[concat(parameters('%s'), '/%s.json')]" % (
+                            BASE_URI_PARAMETER, names[i]
+                        ),
+                        "contentVersion": self._config.arm_template_version,
+                    },
+                    "parameters": {
+                        name: {"value": expressions.parameter(name)}
+                        for name in linked[names[i]]["parameters"]
+                    },
+                },
+            })
+
+        LOG.info(
+            "Split the template's %d resources into %d linked templates.",
+            len(self._resources), len(partitions)
+        )
+
+        parameters = dict(self._template_data["parameters"])
+        parameters[BASE_URI_PARAMETER] = {
+            "type": "string",
+            "metadata": {
+                "description": "Base URI the linked templates of the"
+                               " deployment were uploaded under."
+            }
+        }
+
+        # lastly; drop the dependencies between the deployments
+        # of linked templates which are implied by other ones:
+        master = make_template(parameters, {}, deployments, self._config)
+        for index, entries in DependencyGraph(master).reduce().items():
+            deployments[index]["dependsOn"] = entries
+
+        return master, linked
+
+    def _get_linked_resource(self, index, owners):
+        """ _get_linked_resource is a helper method which returns the given
+        resource without any of its dependencies on resources which are in
+        other linked templates; which get declared between the deployments
+        of the linked templates within the master template instead.
+        """
+        resource = self._resources[index]
+        if "dependsOn" not in resource:
+            return resource
+
+        entries = []
+        for entry, targets in self._graph.get_entries(index):
+            if targets is not None and any(
+                    owners[node[0]] != owners[index]
+                    for nodes in targets.values() for node in nodes):
+                continue
+            entries.append(entry)
+
+        return dict(resource, dependsOn=entries)
+
+    def _get_weight(self, indexes):
+        """ _get_weight is a helper method which returns the number of
+        resources and the estimated size of a template with the resources
+        of the given indexes.
+        """
+        variable_names, _ = utils.get_references(
+            [self._resources[index] for index in indexes], self._variables
+        )
+        size = sum(self._sizes[index] for index in indexes) + sum(
+            len(json.dumps({name: self._variables[name]}))
+            for name in variable_names if name in self._variables
+        )
+
+        return sum(self._counts[index] for index in indexes), size
+
+    def _fits(self, weight):
+        """ _fits is a helper method which returns whether a template
+        of the given weight is within the configured limits.
+        """
+        count, size = weight
+        return count <= self._max_resources and size <= self._max_size
+
+    def _get_groups(self):
+        """ _get_groups is a helper method which returns the list of the lists
+        of the indexes of the resources grouped by the first resource which no
+        other resource depends on which they are dependencies of. The resources
+        are listed in dependency order, within and across groups.
+        """
+        dependents = set()
+        for deps in self._deps.values():
+            dependents.update(deps)
+        roots = [
+            index for index in sorted(self._deps) if index not in dependents
+        ]
+
+        groups = []
+        visited = set()
+        for root in roots:
+            group = []
+            stack = [(root, False)]
+            while stack:
+                index, expanded = stack.pop()
+                if expanded:
+                    group.append(index)
+                    continue
+                if index in visited:
+                    continue
+
+                visited.add(index)
+                stack.append((index, True))
+                for dep in sorted(self._deps[index], reverse=True):
+                    if dep not in visited:
+                        stack.append((dep, False))
+
+            groups.append(group)
+
+        return groups
+
+    def _pack(self, unit, partitions, weights, owners):
+        """ _pack is a helper method which adds the given list of resource
+        indexes to the first partition it fits in which does not precede any
+        partition holding its dependencies; or to a new one.
+        """
+        weight = self._get_weight(unit)
+        if not self._fits(weight):
+            raise LinkedTemplatesException(
+                "Resource '%s' alone exceeds the limits of a linked"
+                " template." % self._resources[unit[0]].get("name")
+            )
+
+        first = max([
+            owners[dep] for index in unit for dep in self._deps[index]
+            if dep in owners
+        ] or [0])
+        for i in range(first, len(partitions)):
+            total = (weights[i][0] + weight[0], weights[i][1] + weight[1])
+            if self._fits(total):
+                break
+        else:
+            i = len(partitions)
+            partitions.append([])
+            weights.append((0, 0))
+            total = weight
+
+        partitions[i].extend(unit)
+        weights[i] = total
+        for index in unit:
+            owners[index] = i
+
+
+def split_template(template_data, config_snapshot=None):
+    """ split_template splits the given template data into linked templates
+    with the given ConfigSnapshot; returning the master template and the
+    ordered dict between the names of the linked templates and the templates
+    themselves.
+    """
+    return TemplateSplitter(template_data, config_snapshot).split()
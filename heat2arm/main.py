@@ -20,11 +20,22 @@
 import argparse
 import json
 import logging
+import os
 import sys
+import yaml
 
 from heat2arm.config import CONF
 
+from heat2arm import canonical
+from heat2arm import config
+from heat2arm import delta
+from heat2arm import deployment_analysis
+from heat2arm import linked_templates
 from heat2arm import translation_engine as engine
+from heat2arm.parser.common.diagnostics import Diagnostics, format_report
+from heat2arm.preflight import (
+    check_files, format_result, get_summary
+)
 
 
 def _parse_args():
@@ -33,19 +44,114 @@ def _parse_args():
     """
     parser = argparse.ArgumentParser(
         description='OpenStack Heat to Azure ARM template converter.')
-    parser.add_argument("--in", dest="heat_template", required=True,
-                        help="Path to the OpenStack Heat template to convert",
-                        type=argparse.FileType('rb'))
     parser.add_argument("--out", dest="arm_template",
                         help="Optional Azure ARM template output path",
                         type=argparse.FileType('w'),
                         default=sys.stdout)
+    parser.add_argument("--variants",
+                        help="Optional path to a YAML/JSON file mapping the "
+                             "names of configuration variants to the options "
+                             "to be overridden for them; converting the "
+                             "template once for each variant",
+                        type=argparse.FileType('rb'))
+    parser.add_argument("--out-dir",
+                        help="Directory to write the ARM template of each "
+                             "variant to as <variant name>.json",
+                        default=".",
+                        type=str)
+    parser.add_argument("--linked-templates-dir",
+                        help="Optional directory to write linked templates "
+                             "to; splitting the output into a master "
+                             "template and several linked ones",
+                        type=str)
+    parser.add_argument("--collect-errors",
+                        help="Record all the errors of the conversion and "
+                             "report them at the end, rather than aborting "
+                             "on the first one",
+                        action="store_true")
+    parser.add_argument("--errors-out",
+                        help="Optional path to write the report of the "
+                             "collected errors to",
+                        type=argparse.FileType('w'),
+                        default=sys.stderr)
+    parser.add_argument("--errors-json",
+                        help="Output the report of the collected errors in "
+                             "JSON format.",
+                        action="store_true")
+    parser.add_argument("--partial-output",
+                        help="Write out the ARM template even if errors were "
+                             "collected; lacking the failed resources",
+                        action="store_true")
+    parser.add_argument("--previous",
+                        help="Optional path to the previously deployed ARM "
+                             "template; outputting a template of only the "
+                             "resources changed since, to be deployed in "
+                             "incremental mode",
+                        type=argparse.FileType('r'))
+    parser.add_argument("--delta-summary",
+                        help="Optional path to write the JSON summary of the "
+                             "changes since the previous ARM template to",
+                        type=argparse.FileType('w'))
+    _add_common_args(parser)
+    args = parser.parse_args()
+
+    if args.variants and (args.collect_errors or args.linked_templates_dir):
+        parser.error("--variants cannot be used with --collect-errors or "
+                     "--linked-templates-dir")
+    if args.previous and (args.variants or args.linked_templates_dir):
+        parser.error("--previous cannot be used with --variants or "
+                     "--linked-templates-dir")
+    if args.delta_summary and not args.previous:
+        parser.error("--delta-summary requires --previous")
+
+    return args
+
+
+def _parse_analysis_args():
+    """ _parse_analysis_args is a helper function which sets up the command
+    line arguments of the deployment analysis and returns the parsed ones.
+    """
+    parser = argparse.ArgumentParser(
+        description='Analysis of the deployment of the Azure ARM template '
+                    'resulting from an OpenStack Heat template.')
+    parser.add_argument("--out", dest="report",
+                        help="Optional analysis report output path",
+                        type=argparse.FileType('w'),
+                        default=sys.stdout)
+    parser.add_argument("--json",
+                        help="Output the report in JSON format.",
+                        action="store_true")
+    _add_common_args(parser)
+    return parser.parse_args()
+
+
+def _parse_preflight_args():
+    """ _parse_preflight_args is a helper function which sets up the command
+    line arguments of the pre-flight checks and returns the parsed ones.
+    """
+    parser = argparse.ArgumentParser(
+        description='Pre-flight checks of OpenStack Heat templates for their '
+                    'conversion to Azure ARM templates.')
+    parser.add_argument("templates", nargs="+",
+                        help="Paths to the OpenStack Heat templates to check")
+    parser.add_argument("--out", dest="report",
+                        help="Optional check results output path",
+                        type=argparse.FileType('w'),
+                        default=sys.stdout)
+    parser.add_argument("--json",
+                        help="Output the results as JSON lines; one for each "
+                             "template followed by a summary.",
+                        action="store_true")
+    parser.add_argument("--workers",
+                        help="Number of processes to check the templates on; "
+                             "defaults to the number of CPUs",
+                        type=int)
     parser.add_argument("--config-file",
                         help="Path to an optional configuration file",
                         type=str)
     parser.add_argument("--loglevel",
                         help="The logging level to be used.",
-                        default="WARNING",
+                        default="ERROR",
                         type=str)
     parser.add_argument("--logfile",
                         help="The file to be used for logging.",
@@ -54,6 +160,26 @@ def _parse_args():
     return parser.parse_args()
 
 
+def _add_common_args(parser):
+    """ _add_common_args is a helper function which adds the command line
+    arguments common to all the commands to the given parser.
+    """
+    parser.add_argument("--in", dest="heat_template", required=True,
+                        help="Path to the OpenStack Heat template to convert",
+                        type=argparse.FileType('rb'))
+    parser.add_argument("--config-file",
+                        help="Path to an optional configuration file",
+                        type=str)
+    parser.add_argument("--loglevel",
+                        help="The logging level to be used.",
+                        default="WARNING",
+                        type=str)
+    parser.add_argument("--logfile",
+                        help="The file to be used for logging.",
+                        type=argparse.FileType('w'),
+                        default=sys.stderr)
+
+
 def _setup_logging(file, level):
     """ _setup_logging is a helper method which sets up the logging
     process to the given file and with the given level (as a string).
@@ -71,6 +197,17 @@ def _setup_logging(file, level):
     logger.addHandler(stdoutsh)
 
 
+def _get_base_path(template_file):
+    """ _get_base_path is a helper function which returns the path of the
+    directory which the files referenced by the given template file (ex:
+    provider templates) are relative to.
+    """
+    if template_file is sys.stdin or not os.path.isfile(template_file.name):
+        return os.getcwd()
+
+    return os.path.dirname(os.path.abspath(template_file.name))
+
+
 def main():
     """ main is the entry point of the application. """
     args = _parse_args()
@@ -82,17 +219,143 @@ def main():
     # setup logging:
     _setup_logging(args.logfile, args.loglevel)
 
+    # snapshot the configuration for the whole of the conversion:
+    config_snapshot = config.snapshot()
+
     # read the contents of the template:
     heat_template_data = args.heat_template.read()
     args.heat_template.close()
+    base_path = _get_base_path(args.heat_template)
 
-    # do the conversion:
-    arm_template_data = engine.convert_template(heat_template_data)
+    # if variants were given, convert the template for each of them:
+    if args.variants:
+        variants = yaml.safe_load(args.variants.read())
+        args.variants.close()
+
+        results = engine.convert_template_variants(
+            heat_template_data, variants, base_path
+        )
+        for name, arm_template_data in results.items():
+            path = os.path.join(args.out_dir, "%s.json" % name)
+            with open(path, "w") as out_file:
+                out_file.write(json.dumps(arm_template_data, indent=4))
+        return
+
+    # do the conversion; collecting all errors if requested:
+    diagnostics = Diagnostics() if args.collect_errors else None
+    arm_template_data = engine.convert_template(
+        heat_template_data, config_snapshot, base_path, diagnostics
+    )
+
+    if diagnostics:
+        report = diagnostics.get_report()
+        if args.errors_json:
+            args.errors_out.write(json.dumps(report, indent=4))
+        else:
+            args.errors_out.write(format_report(report))
+        # NOTE: the conversion goes on logging to stderr afterwards:
+        if args.errors_out is not sys.stderr:
+            args.errors_out.close()
+
+        if arm_template_data is None or not args.partial_output:
+            sys.exit(1)
+
+    # only keep the changes since the previous template, if requested:
+    if args.previous:
+        previous = json.load(args.previous)
+        args.previous.close()
+
+        arm_template_data, summary = delta.get_delta(
+            previous, arm_template_data, config_snapshot
+        )
+        if config_snapshot.canonical_output:
+            arm_template_data = canonical.canonicalize(arm_template_data)
+        if args.delta_summary:
+            args.delta_summary.write(json.dumps(summary, indent=4))
+            args.delta_summary.close()
+
+    # split it into linked templates, if requested:
+    if args.linked_templates_dir:
+        arm_template_data, linked = linked_templates.split_template(
+            arm_template_data, config_snapshot
+        )
+        if config_snapshot.canonical_output:
+            arm_template_data = canonical.canonicalize(arm_template_data)
+            for name, template in linked.items():
+                linked[name] = canonical.canonicalize(template)
+        if not os.path.isdir(args.linked_templates_dir):
+            os.makedirs(args.linked_templates_dir)
+        for name, template in linked.items():
+            path = os.path.join(args.linked_templates_dir, "%s.json" % name)
+            with open(path, "w") as linked_file:
+                linked_file.write(json.dumps(template, indent=4))
 
     # write out the result:
     args.arm_template.write(json.dumps(arm_template_data, indent=4))
     args.arm_template.close()
 
+    if diagnostics:
+        sys.exit(1)
+
+
+def analyze():
+    """ analyze is the entry point of the deployment analysis. """
+    args = _parse_analysis_args()
+
+    if args.config_file:
+        CONF(["--config-file", args.config_file])
+
+    _setup_logging(args.logfile, args.loglevel)
+
+    heat_template_data = args.heat_template.read()
+    args.heat_template.close()
+    config_snapshot = config.snapshot()
+
+    # translate the template and analyse the result:
+    arm_template_data, context = engine.translate_template(
+        heat_template_data, config_snapshot,
+        _get_base_path(args.heat_template)
+    )
+    analysis = deployment_analysis.DeploymentAnalysis(
+        arm_template_data, context.get_dependency_origins(), config_snapshot
+    )
+    report = analysis.get_report()
+
+    if args.json:
+        args.report.write(json.dumps(report, indent=4))
+    else:
+        args.report.write(deployment_analysis.format_report(report))
+    args.report.close()
+
+
+def preflight():
+    """ preflight is the entry point of the pre-flight checks. """
+    args = _parse_preflight_args()
+
+    _setup_logging(args.logfile, args.loglevel)
+
+    results = []
+    for result in check_files(args.templates, args.workers, args.config_file):
+        results.append(result)
+        if args.json:
+            args.report.write(json.dumps(result) + "\n")
+        else:
+            args.report.write(format_result(result))
+
+    summary = get_summary(results)
+    if args.json:
+        args.report.write(json.dumps({"summary": summary}) + "\n")
+    else:
+        args.report.write("\nChecked %d templates; %d with issues.\n" % (
+            summary["templates"], summary["failed_templates"]
+        ))
+        for kind, count in sorted(summary["issues"].items()):
+            args.report.write("    %-20s %d\n" % (kind, count))
+    args.report.close()
+
+    if summary["failed_templates"]:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
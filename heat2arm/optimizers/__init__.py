@@ -0,0 +1,27 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains the definitions of the optimizers which
+    may be applied over the resulting ARM template data.
+"""
+
+from heat2arm.optimizers.copy_loops import CopyLoopOptimizer
+from heat2arm.optimizers.dependencies import DependencyReductionOptimizer
+from heat2arm.optimizers.security_groups import (
+    SecurityGroupDeduplicationOptimizer
+)
+from heat2arm.optimizers.security_rules import SecurityRuleCompiler
+from heat2arm.optimizers.variables import VariableDeduplicationOptimizer
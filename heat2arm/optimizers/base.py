@@ -0,0 +1,70 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Defines the base class for all the optimizers
+    of the resulting ARM template.
+"""
+
+import logging
+
+from heat2arm import config
+
+
+class BaseARMTemplateOptimizer(object):
+    """ BaseARMTemplateOptimizer is the base class for all ARM template
+    optimizers; which operate over the template data after the translation
+    of all the resources has been completed.
+
+    It defines stubs for common functions required of an optimizer.
+    """
+    # config_option is the name of the boolean configuration option
+    # which specifies whether the optimizer should be run at all:
+    config_option = None
+
+    def __init__(self, template_data, config_snapshot=None):
+        """ An optimizer is created from the dict of parameters, variables and
+        resources returned by the Context's get_template_data and the
+        ConfigSnapshot of the conversion (defaulting to a snapshot of the
+        current configuration).
+        """
+        self._template_data = template_data
+        self._config = config_snapshot
+        if self._config is None:
+            self._config = config.snapshot()
+        self._logger = logging.getLogger("__heat2arm__.%s" % (self,))
+
+    def __str__(self):
+        """ __str__ simply returns the name of the class. """
+        return self.__class__.__name__
+
+    def is_enabled(self):
+        """ is_enabled returns whether or not the optimizer
+        was enabled through the configuration.
+        """
+        if not self.config_option:
+            return False
+
+        return getattr(self._config, self.config_option)
+
+    def optimize(self):
+        """ optimize applies the optimization over the template data in place.
+
+        NOTE: it is stubbed and must be implemented in all inheriting classes.
+        NOTE: the fragments of the resources may be shared between resources
+        (see heat2arm.translators.fragments), so optimizers must build new
+        fragments in place of any ones they wish to alter.
+        """
+        self._logger.debug("optimize was called.")
@@ -0,0 +1,362 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the definition of the optimizer which folds groups of
+    structurally identical resources into ARM copy loops.
+
+    ARM copy loops:
+https://azure.microsoft.com/en-us/documentation/articles/resource-group-create-multiple/
+"""
+
+import json
+import os
+import re
+
+from heat2arm.optimizers import utils
+from heat2arm.optimizers.base import BaseARMTemplateOptimizer
+
+
+# MAX_COPY_COUNT is the maximum number of iterations of an ARM copy loop:
+MAX_COPY_COUNT = 800
+
+# _LITERAL_SLOT is the placeholder which stands in for the plain string values
+# of a resource which may differ between the members of a copy loop:
+_LITERAL_SLOT = "\x00"
+
+# _REFERENCE_SLOTS are the placeholders which stand in for the references to
+# variables or parameters within the expressions of a resource:
+_REFERENCE_SLOTS = {
+    "variables": "\x01",
+    "parameters": "\x02",
+}
+
+# _REFERENCE_SLOTS_REGEX matches any of the _REFERENCE_SLOTS:
+_REFERENCE_SLOTS_REGEX = re.compile("[%s]" % "".join(
+    _REFERENCE_SLOTS.values()
+))
+
+# _UNMASKED_FIELDS are the top-level fields of a resource which may never be
+# expressions; and thus must be identical for resources to be folded together:
+_UNMASKED_FIELDS = ["type", "apiVersion"]
+
+
+class CopyLoopOptimizer(BaseARMTemplateOptimizer):
+    """ CopyLoopOptimizer folds all the groups of resources which are
+    identical save for their names and the variables or parameters they
+    reference (ex: dozens of VMs spawned from the same Heat definition)
+    into a single resource with an ARM copy loop.
+
+    Every value which differs between the resources of a group is moved
+    into an array variable indexed by copyIndex(). Plain variables are
+    inlined into the array and dropped if no longer referenced; all other
+    references are made through an array of the referenced names. As the
+    names of the resources are unchanged, any references to them remain valid.
+    """
+    config_option = "compact_copy_loops"
+
+    def __init__(self, template_data, config_snapshot=None):
+        super(CopyLoopOptimizer, self).__init__(template_data, config_snapshot)
+
+        # _inlined_variables is the set of the names of all the variables
+        # whose values were inlined into the arrays of a copy loop:
+        self._inlined_variables = set()
+
+        # _name_arrays is the set of the names of all the array variables
+        # containing names of variables or parameters:
+        self._name_arrays = set()
+
+    def optimize(self):
+        """ optimize folds all the groups of at least 'copy_loop_min_resources'
+        identical resources into copy loops.
+        """
+        super(CopyLoopOptimizer, self).optimize()
+
+        groups = {}
+        masks = {}
+        for resource in self._template_data["resources"]:
+            mask = self._mask_resource(resource)
+            masks[id(resource)] = mask
+            if mask:
+                groups.setdefault(mask[0], []).append(resource)
+
+        folded = {}
+        loop_count = 0
+        for group in groups.values():
+            if len(group) < self._config.copy_loop_min_resources:
+                continue
+
+            if self._has_dependencies_within(group):
+                self._logger.debug(
+                    "'%s': not folding group of '%s' resources as they depend"
+                    " on one another.", self, group[0]["type"]
+                )
+                continue
+
+            for i in range(0, len(group), MAX_COPY_COUNT):
+                chunk = group[i:i + MAX_COPY_COUNT]
+                if len(chunk) < self._config.copy_loop_min_resources:
+                    continue
+
+                loop_name = "%sLoop%d" % (
+                    chunk[0]["type"].split("/")[-1], loop_count
+                )
+                loop_count = loop_count + 1
+
+                folded[id(chunk[0])] = self._fold(loop_name, chunk, masks)
+                for resource in chunk[1:]:
+                    folded[id(resource)] = None
+
+                self._logger.info(
+                    "'%s': folded %d '%s' resources into copy loop '%s'.",
+                    self, len(chunk), chunk[0]["type"], loop_name
+                )
+
+        resources = self._template_data["resources"]
+        self._template_data["resources"] = [
+            folded.get(id(res), res) for res in resources
+            if folded.get(id(res), res) is not None
+        ]
+
+        self._remove_inlined_variables()
+
+    def _mask_resource(self, resource):
+        """ _mask_resource is a helper method which returns a tuple containing
+        the key of the group the resource belongs to, the resource with all
+        the values which may differ within a copy loop masked and the dict
+        between the paths of all the masked values and the values themselves.
+
+        It returns None for resources which cannot be part of a copy loop.
+        """
+        if "copy" in resource or "resources" in resource:
+            return None
+
+        # NOTE: nested templates are left out as their references are scoped:
+        if utils.is_nested_template(
+                resource.get("properties", {}).get("template")):
+            return None
+
+        slots = {}
+        masked = dict(resource)
+        for key in resource:
+            if key not in _UNMASKED_FIELDS:
+                masked[key] = self._mask(resource[key], (key,), slots)
+
+        return json.dumps(masked, sort_keys=True), masked, slots
+
+    def _mask(self, data, path, slots):
+        """ _mask is a helper method which returns the given data with all its
+        string values and variable or parameter references replaced by
+        placeholders; adding the kind of the reference (or None for strings)
+        and the original values under their paths in the provided dict.
+        """
+        if isinstance(data, dict):
+            return {
+                key: self._mask(value, path + (key,), slots)
+                for key, value in data.items()
+            }
+
+        if isinstance(data, list):
+            return [
+                self._mask(value, path + (i,), slots)
+                for i, value in enumerate(data)
+            ]
+
+        if utils.is_expression(data):
+            refs = []
+
+            def _mask_ref(match):
+                """ _mask_ref masks the matched reference. """
+                slots[path + (len(refs),)] = (match.group(1), match.group(2))
+                refs.append(match.group(2))
+                return _REFERENCE_SLOTS[match.group(1)]
+
+            return utils.REFERENCE_REGEX.sub(_mask_ref, data)
+
+        if isinstance(data, str):
+            slots[path] = (None, data)
+            return _LITERAL_SLOT
+
+        return data
+
+    def _has_dependencies_within(self, group):
+        """ _has_dependencies_within is a helper method which returns whether
+        any of the resources of the given group depends on another one.
+        """
+        names = set()
+        for resource in group:
+            if utils.is_expression(resource["name"]):
+                names.add("[concat('%s/', %s)]" % (
+                    resource["type"], resource["name"][1:-1]
+                ))
+            else:
+                names.add("%s/%s" % (resource["type"], resource["name"]))
+
+        return any(
+            dependency in names
+            for resource in group
+            for dependency in resource.get("dependsOn", [])
+        )
+
+    def _is_inlinable(self, variable_name):
+        """ _is_inlinable is a helper method which returns whether the value of
+        the variable with the given name may be inlined into an array.
+        """
+        variables = self._template_data["variables"]
+        if variable_name not in variables:
+            return False
+
+        value = variables[variable_name]
+        if isinstance(value, str):
+            return not utils.is_expression(value)
+
+        return isinstance(value, (int, float, bool))
+
+    def _fold(self, loop_name, group, masks):
+        """ _fold is a helper method which returns the resource defining the
+        copy loop with the given name over the given group of resources.
+        """
+        all_slots = [masks[id(res)][2] for res in group]
+        first_masked = masks[id(group[0])][1]
+        variables = self._template_data["variables"]
+
+        arrays = {}
+        values = {}
+        for path in all_slots[0]:
+            kind = all_slots[0][path][0]
+            names = [slots[path][1] for slots in all_slots]
+
+            if all(name == names[0] for name in names):
+                if kind:
+                    values[path] = "%s('%s')" % (kind, names[0])
+                else:
+                    values[path] = names[0]
+                continue
+
+            if not kind:
+                array_name = self._get_array_variable(
+                    loop_name, names, names, arrays
+                )
+                values[path] = "[variables('%s')[copyIndex()]]" % array_name
+            elif kind == "variables" and all(
+                    self._is_inlinable(name) for name in names):
+                self._inlined_variables.update(names)
+                inlined = [variables[name] for name in names]
+
+                # NOTE: distinct variables holding the same value
+                # (ex: the vmSize of each VM) are all served by the first:
+                if all(value == inlined[0] for value in inlined):
+                    values[path] = "variables('%s')" % names[0]
+                    continue
+
+                array_name = self._get_array_variable(
+                    loop_name, names, inlined, arrays
+                )
+                values[path] = "variables('%s')[copyIndex()]" % array_name
+            else:
+                array_name = self._get_array_variable(
+                    loop_name, names, names, arrays
+                )
+                self._name_arrays.add(array_name)
+                values[path] = "%s(variables('%s')[copyIndex()])" % (
+                    kind, array_name
+                )
+
+        resource = self._unmask(first_masked, (), values)
+        resource["copy"] = {
+            "name": loop_name,
+            "count": len(group),
+        }
+
+        return resource
+
+    def _unmask(self, data, path, values):
+        """ _unmask is a helper method which returns the given masked data with
+        all the placeholders replaced by the values given under their paths.
+        """
+        if isinstance(data, dict):
+            return {
+                key: (self._unmask(value, path + (key,), values)
+                      if len(path) or key not in _UNMASKED_FIELDS else value)
+                for key, value in data.items()
+            }
+
+        if isinstance(data, list):
+            return [
+                self._unmask(value, path + (i,), values)
+                for i, value in enumerate(data)
+            ]
+
+        if data == _LITERAL_SLOT:
+            return values[path]
+
+        if isinstance(data, str) and _REFERENCE_SLOTS_REGEX.search(data):
+            parts = _REFERENCE_SLOTS_REGEX.split(data)
+            result = [parts[0]]
+            for i, part in enumerate(parts[1:]):
+                result.append(values[path + (i,)])
+                result.append(part)
+            return "".join(result)
+
+        return data
+
+    def _get_array_variable(self, loop_name, names, values, arrays):
+        """ _get_array_variable is a helper method which returns the name of
+        the array variable holding the given values, declaring it if needed.
+        The array is named after the common prefix of the given names.
+
+        The variables declared so far are given by the provided dict between
+        the tuples of their values and their names.
+        """
+        key = tuple(values)
+        if key in arrays:
+            return arrays[key]
+
+        # NOTE: name the array after the common prefix of the names
+        # of the variables it indexes where available (ex: vmName_):
+        prefix = os.path.commonprefix(names)
+        prefix = prefix[:prefix.rfind("_") + 1]
+        if prefix:
+            name = "%s%s" % (prefix, loop_name)
+        else:
+            name = "%s_values%d" % (loop_name, len(arrays))
+
+        variables = self._template_data["variables"]
+        while name in variables:
+            name = "%s_" % name
+
+        variables[name] = list(values)
+        arrays[key] = name
+
+        return name
+
+    def _remove_inlined_variables(self):
+        """ _remove_inlined_variables is a helper method which removes all the
+        variables which were inlined into copy loops and are no longer
+        referenced anywhere within the template.
+        """
+        variables = self._template_data["variables"]
+
+        referenced = utils.get_variable_references(
+            self._template_data["resources"]
+        )
+        for name, value in variables.items():
+            if name in self._name_arrays:
+                referenced.update(value)
+            else:
+                referenced.update(utils.get_variable_references(value))
+
+        for name in self._inlined_variables - referenced:
+            del variables[name]
@@ -0,0 +1,56 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the definition of the optimizer which removes all the
+    dependencies between resources which are implied by other ones.
+"""
+
+from heat2arm.dependency_graph import DependencyGraph
+from heat2arm.optimizers.base import BaseARMTemplateOptimizer
+
+
+class DependencyReductionOptimizer(BaseARMTemplateOptimizer):
+    """ DependencyReductionOptimizer reduces the 'dependsOn' fields of all the
+    resources of the template to the minimal set of dependencies which still
+    yield the same ordering of the deployment (ex: a VM depending on both a
+    network interface and the virtual network the interface depends on only
+    needs to depend on the interface).
+
+    The graph of the dependencies is validated in the process; with the
+    DependencyGraphExceptions of any dependencies on undefined resources or
+    circular dependencies being propagated to the caller.
+    """
+    config_option = "reduce_dependencies"
+
+    def optimize(self):
+        """ optimize removes all the transitively implied dependencies. """
+        super(DependencyReductionOptimizer, self).optimize()
+
+        graph = DependencyGraph(self._template_data)
+
+        resources = self._template_data["resources"]
+        removed = 0
+        for index, entries in graph.reduce().items():
+            resource = resources[index]
+            if len(entries) == len(resource["dependsOn"]):
+                continue
+
+            removed = removed + len(resource["dependsOn"]) - len(entries)
+            resources[index] = dict(resource, dependsOn=entries)
+
+        self._logger.info(
+            "'%s': removed %d implied dependencies.", self, removed
+        )
@@ -0,0 +1,147 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the definition of the optimizer which merges all the
+    network security groups which define identical rule sets.
+"""
+
+import hashlib
+import json
+import re
+
+from heat2arm.optimizers import utils
+from heat2arm.optimizers.base import BaseARMTemplateOptimizer
+
+
+# _VARIABLE_NAME_REGEX matches resource names which are
+# simply a reference to a variable; capturing its name:
+_VARIABLE_NAME_REGEX = re.compile(r"^\[variables\('([^']*)'\)\]$")
+
+
+class SecurityGroupDeduplicationOptimizer(BaseARMTemplateOptimizer):
+    """ SecurityGroupDeduplicationOptimizer keeps a single network security
+    group for each distinct set of rules within the template, dropping all the
+    others and rewriting any references to them to the one kept.
+
+    The fingerprint of a security group covers all its properties and the
+    properties of its rules in the order of their priorities; but not its
+    name nor the names or absolute priorities of its rules.
+
+    NOTE: only security groups named after a variable (ex: secGroupName_*)
+    are merged, with their references being redirected by renaming all
+    references to the variable of the dropped group.
+    """
+    config_option = "deduplicate_security_groups"
+
+    def optimize(self):
+        """ optimize merges all the security groups with identical rules. """
+        super(SecurityGroupDeduplicationOptimizer, self).optimize()
+
+        kept = {}
+        renames = {}
+        for resource in self._template_data["resources"]:
+            if resource.get("type") != (
+                    "Microsoft.Network/networkSecurityGroups"):
+                continue
+
+            match = _VARIABLE_NAME_REGEX.match(resource.get("name", ""))
+            if not match:
+                continue
+
+            fingerprint = self.get_fingerprint(resource)
+            if fingerprint in kept:
+                renames[match.group(1)] = kept[fingerprint]
+            else:
+                kept[fingerprint] = match.group(1)
+
+        if not renames:
+            return
+
+        self._logger.info(
+            "'%s': merging %d duplicate security groups into %d.",
+            self, len(renames), len(set(renames.values()))
+        )
+
+        resources = [
+            res for res in self._template_data["resources"]
+            if not self._is_renamed_group(res, renames)
+        ]
+        resources = utils.rename_variable_references(resources, renames)
+        for resource in resources:
+            if "dependsOn" in resource:
+                resource["dependsOn"] = utils.unique(resource["dependsOn"])
+        self._template_data["resources"] = resources
+
+        # NOTE: nested templates hold their own copies of the variables naming
+        # the groups, which are pointed to the groups which were kept:
+        variables = self._template_data["variables"]
+        for resource in resources:
+            template = resource.get("properties", {}).get("template")
+            if not utils.is_nested_template(template):
+                continue
+            for name, kept_name in renames.items():
+                if name in template["variables"] and kept_name in variables:
+                    template["variables"][name] = variables[kept_name]
+
+        # lastly; drop the variables naming the groups which were dropped:
+        referenced = utils.get_variable_references(resources)
+        for value in variables.values():
+            referenced.update(utils.get_variable_references(value))
+        for name in renames:
+            if name in variables and name not in referenced:
+                del variables[name]
+
+    def get_fingerprint(self, resource):
+        """ get_fingerprint returns the fingerprint of the given security group
+        which identical groups have in common.
+        """
+        properties = resource.get("properties", {})
+        rules = sorted(
+            properties.get("securityRules", []),
+            key=lambda rule: rule.get("properties", {}).get("priority", 0)
+        )
+
+        data = {
+            "resource": {
+                key: value for key, value in resource.items() if key != "name"
+            },
+            "properties": {
+                key: value for key, value in properties.items()
+                if key != "securityRules"
+            },
+            "rules": [
+                {
+                    key: value
+                    for key, value in rule.get("properties", {}).items()
+                    if key != "priority"
+                } for rule in rules
+            ],
+        }
+        data["resource"].pop("properties", None)
+
+        return hashlib.sha256(
+            json.dumps(data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _is_renamed_group(self, resource, renames):
+        """ _is_renamed_group is a helper method which returns whether the
+        given resource is a security group which is to be dropped.
+        """
+        if resource.get("type") != "Microsoft.Network/networkSecurityGroups":
+            return False
+
+        match = _VARIABLE_NAME_REGEX.match(resource.get("name", ""))
+        return bool(match) and match.group(1) in renames
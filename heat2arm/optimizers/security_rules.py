@@ -0,0 +1,464 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the definition of the optimizer which compiles the rules of
+    all the network security groups into their smallest equivalent set.
+
+    ARM network security groups:
+https://azure.microsoft.com/en-us/documentation/articles/virtual-networks-nsg/
+"""
+
+import json
+
+from heat2arm.optimizers import utils
+from heat2arm.optimizers.base import BaseARMTemplateOptimizer
+
+
+# BASE_PRIORITY is the priority assigned to the first rule of each group:
+BASE_PRIORITY = 100
+
+# _ANY is the value which stands for any port, address or protocol in ARM:
+_ANY = "*"
+
+
+class _PortRange(object):
+    """ _PortRange handles port range rule fields (ex: "80", "80-90", "*").
+
+    Parsed values are (low, high) tuples, with any unparsable value
+    (ex: an ARM expression) being kept as-is.
+    """
+
+    @staticmethod
+    def parse(raw):
+        """ parse returns the parsed form of the given raw value. """
+        if raw == _ANY:
+            return (0, 65535)
+
+        try:
+            if isinstance(raw, int):
+                return (raw, raw)
+            low, _, high = str(raw).partition("-")
+            low = int(low)
+            high = int(high) if high else low
+            if 0 <= low <= high <= 65535:
+                return (low, high)
+        except ValueError:
+            pass
+
+        return raw
+
+    @staticmethod
+    def format(value):
+        """ format returns the raw form of the given parsed value. """
+        if value == (0, 65535):
+            return _ANY
+        if value[0] == value[1]:
+            return str(value[0])
+        return "%d-%d" % value
+
+    @staticmethod
+    def contains(outer, inner):
+        """ contains returns whether the outer value covers the inner one. """
+        if outer == inner or outer == (0, 65535):
+            return True
+        if isinstance(outer, tuple) and isinstance(inner, tuple):
+            return outer[0] <= inner[0] and inner[1] <= outer[1]
+        return False
+
+    @staticmethod
+    def collapse(values):
+        """ collapse returns the minimal list of values which cover exactly
+        the same ports as the given ones. Unparsable values are kept apart.
+        """
+        ranges = sorted(set(v for v in values if isinstance(v, tuple)))
+        others = [v for v in values if not isinstance(v, tuple)]
+
+        result = []
+        for low, high in ranges:
+            if result and low <= result[-1][1] + 1:
+                result[-1] = (result[-1][0], max(high, result[-1][1]))
+            else:
+                result.append((low, high))
+
+        return result + utils.unique(others)
+
+
+class _AddressPrefix(object):
+    """ _AddressPrefix handles address prefix rule fields
+    (ex: "10.0.0.0/24", "10.0.0.1", "*").
+
+    Parsed values are (network, prefix length) tuples for IPv4 CIDRs, with
+    any other value (ex: service tags such as 'Internet') being kept as-is.
+    """
+
+    @staticmethod
+    def parse(raw):
+        """ parse returns the parsed form of the given raw value. """
+        if raw == _ANY or not isinstance(raw, str):
+            return raw
+
+        address, _, length = raw.partition("/")
+        octets = address.split(".")
+        try:
+            length = int(length) if length else 32
+            octets = [int(octet) for octet in octets]
+        except ValueError:
+            return raw
+
+        if (len(octets) != 4 or not 0 <= length <= 32 or
+                any(not 0 <= octet <= 255 for octet in octets)):
+            return raw
+
+        network = 0
+        for octet in octets:
+            network = (network << 8) | octet
+
+        return (network & _netmask(length), length)
+
+    @staticmethod
+    def format(value):
+        """ format returns the raw form of the given parsed value. """
+        if not isinstance(value, tuple):
+            return value
+
+        network, length = value
+        return "%s/%d" % (".".join(
+            str((network >> shift) & 255) for shift in (24, 16, 8, 0)
+        ), length)
+
+    @staticmethod
+    def contains(outer, inner):
+        """ contains returns whether the outer value covers the inner one. """
+        if outer == inner or outer == _ANY:
+            return True
+        if isinstance(outer, tuple) and isinstance(inner, tuple):
+            return (
+                outer[1] <= inner[1] and
+                inner[0] & _netmask(outer[1]) == outer[0]
+            )
+        return False
+
+    @staticmethod
+    def collapse(values):
+        """ collapse returns the minimal list of values which cover exactly
+        the same addresses as the given ones. Other values are kept apart.
+        """
+        if _ANY in values:
+            return [_ANY]
+
+        nets = set(v for v in values if isinstance(v, tuple))
+        others = [v for v in values if not isinstance(v, tuple)]
+
+        # first; drop all the networks contained by larger ones:
+        nets = set(
+            net for net in nets
+            if not any(
+                other != net and _AddressPrefix.contains(other, net)
+                for other in nets
+            )
+        )
+
+        # then; repeatedly join sibling networks into their supernet:
+        merged = True
+        while merged:
+            merged = False
+            for network, length in sorted(nets):
+                if length == 0 or (network, length) not in nets:
+                    continue
+                sibling = (network ^ (1 << (32 - length)), length)
+                if sibling in nets:
+                    nets.discard((network, length))
+                    nets.discard(sibling)
+                    nets.add((network & _netmask(length - 1), length - 1))
+                    merged = True
+
+        return sorted(nets) + utils.unique(others)
+
+
+class _Protocol(object):
+    """ _Protocol handles the protocol rule field ("Tcp", "Udp" or "*").
+
+    Parsed values are the lowercased protocols.
+    NOTE: "*" stands for any protocol at all (ICMP included); so TCP and UDP
+    rules are never merged into one, as it would match more traffic.
+    """
+
+    @staticmethod
+    def parse(raw):
+        """ parse returns the parsed form of the given raw value. """
+        if isinstance(raw, str):
+            return raw.lower()
+        return raw
+
+    @staticmethod
+    def format(value):
+        """ format returns the raw form of the given parsed value. """
+        return value
+
+    @staticmethod
+    def contains(outer, inner):
+        """ contains returns whether the outer value covers the inner one. """
+        return outer == inner or outer == _ANY
+
+    @staticmethod
+    def collapse(values):
+        """ collapse returns the minimal list of values which cover exactly
+        the same protocols as the given ones.
+        """
+        if _ANY in values:
+            return [_ANY]
+        return utils.unique(values)
+
+
+# _FIELDS is the list of the names of the fields of a security rule which
+# define the traffic it matches, alongside their handlers:
+_FIELDS = [
+    ("protocol", _Protocol),
+    ("sourcePortRange", _PortRange),
+    ("destinationPortRange", _PortRange),
+    ("sourceAddressPrefix", _AddressPrefix),
+    ("destinationAddressPrefix", _AddressPrefix),
+]
+
+
+def _netmask(length):
+    """ _netmask returns the IPv4 netmask for the given prefix length. """
+    return (0xffffffff << (32 - length)) & 0xffffffff
+
+
+class _Rule(object):
+    """ _Rule is the parsed representation of an ARM security rule. """
+
+    def __init__(self, rule, index):
+        """ A _Rule is created from the rule's definition and its index
+        within the list of rules of its security group.
+        """
+        self.rules = [rule]
+        self.name = rule.get("name")
+        self.properties = rule.get("properties", {})
+        self.order = (self.properties.get("priority", float("inf")), index)
+        self.values = {
+            field: handler.parse(self.properties.get(field, _ANY))
+            for field, handler in _FIELDS
+        }
+
+        # NOTE: only rules which have all other properties (ex: the access,
+        # direction or description) in common may ever be merged together:
+        self.class_key = json.dumps({
+            key: value for key, value in self.properties.items()
+            if key != "priority" and key not in self.values
+        }, sort_keys=True)
+
+    def covers(self, other):
+        """ covers returns whether this rule matches all the traffic
+        matched by the other one.
+        """
+        return all(
+            handler.contains(self.values[field], other.values[field])
+            for field, handler in _FIELDS
+        )
+
+    def merge_key(self, merged_field):
+        """ merge_key returns the key which all rules which may be merged
+        together along the given field have in common.
+        """
+        return (self.class_key, tuple(
+            repr(self.values[field]) for field, _ in _FIELDS
+            if field != merged_field
+        ))
+
+    def derive(self, field, value, rules):
+        """ derive returns a new _Rule which matches the given value for the
+        given field and all of this rule's other values, which is obtained
+        from merging all the given rules.
+        """
+        new = _Rule.__new__(_Rule)
+        new.rules = [r for rule in rules for r in rule.rules]
+        first = min(rules, key=lambda rule: rule.order)
+        new.name = first.name
+        new.order = first.order
+        new.class_key = self.class_key
+        new.values = dict(self.values)
+        new.values[field] = value
+        new.properties = dict(self.properties)
+        if value != self.values[field]:
+            new.properties[field] = _get_raw(field, value, new.rules)
+        return new
+
+
+def _get_raw(field, value, rules):
+    """ _get_raw returns the raw form of the given parsed value for the given
+    field, reusing the one of the original rules if any of them defines it.
+    """
+    for field_name, handler in _FIELDS:
+        if field_name == field:
+            for rule in rules:
+                raw = rule.get("properties", {}).get(field, _ANY)
+                if handler.parse(raw) == value:
+                    return raw
+            return handler.format(value)
+
+
+class SecurityRuleCompiler(BaseARMTemplateOptimizer):
+    """ SecurityRuleCompiler compiles the rules of each network security
+    group into the smallest equivalent set of rules:
+        - rules whose traffic is wholly matched by another rule of a higher
+        priority are dropped, as they would never be applied
+        - rules with all the same properties save for a single traffic field
+        (the protocol, a port range or an address prefix) are merged into a
+        single one where their values can be joined (ex: ports "80" and
+        "81-90" or addresses "10.0.0.0/25" and "10.0.0.128/25")
+        - the priorities of the remaining rules are reassigned sequentially,
+        starting from BASE_PRIORITY, in the order of their initial priority
+
+    NOTE: as rules of the same direction are evaluated in the order of their
+    priorities until the first match, rules may only be freely merged when all
+    the rules of that direction have the same access. Otherwise, only rules
+    which are consecutive in the order of their priorities are merged.
+    """
+    config_option = "compile_security_rules"
+
+    def optimize(self):
+        """ optimize compiles the rules of all security groups. """
+        super(SecurityRuleCompiler, self).optimize()
+
+        resources = self._template_data["resources"]
+        for i, resource in enumerate(resources):
+            if resource.get("type") != (
+                    "Microsoft.Network/networkSecurityGroups"):
+                continue
+
+            properties = resource.get("properties", {})
+            rules = properties.get("securityRules")
+            if not rules:
+                continue
+
+            compiled = self.compile_rules(rules)
+            self._logger.info(
+                "'%s': compiled %d rules of '%s' into %d.",
+                self, len(rules), resource.get("name"), len(compiled)
+            )
+
+            resources[i] = dict(
+                resource, properties=dict(properties, securityRules=compiled)
+            )
+
+    def compile_rules(self, rules):
+        """ compile_rules returns the compiled list of the given rules. """
+        parsed = sorted(
+            [_Rule(rule, i) for i, rule in enumerate(rules)],
+            key=lambda rule: rule.order
+        )
+
+        directions = {}
+        for rule in parsed:
+            directions.setdefault(
+                rule.properties.get("direction"), []
+            ).append(rule)
+
+        compiled = []
+        for direction_rules in directions.values():
+            direction_rules = self._drop_shadowed(direction_rules)
+
+            accesses = set(
+                rule.properties.get("access") for rule in direction_rules
+            )
+            if len(accesses) == 1:
+                direction_rules = self._merge_all(direction_rules)
+            else:
+                direction_rules = self._merge_consecutive(direction_rules)
+
+            compiled.extend(self._drop_shadowed(direction_rules))
+
+        result = []
+        for i, rule in enumerate(sorted(compiled, key=lambda r: r.order)):
+            properties = dict(rule.properties, priority=BASE_PRIORITY + i)
+            result.append({"name": rule.name, "properties": properties})
+
+        return result
+
+    def _drop_shadowed(self, rules):
+        """ _drop_shadowed is a helper method which returns the given rules
+        (sorted by priority) without the ones shadowed by preceding ones.
+        """
+        result = []
+        for rule in rules:
+            if not any(other.covers(rule) for other in result):
+                result.append(rule)
+        return result
+
+    def _merge_all(self, rules):
+        """ _merge_all is a helper method which merges all the given rules
+        which differ along a single field until no more merges are possible.
+        """
+        count = None
+        while count != len(rules):
+            count = len(rules)
+            for field, handler in _FIELDS:
+                groups = {}
+                for rule in rules:
+                    groups.setdefault(rule.merge_key(field), []).append(rule)
+
+                rules = []
+                for group in groups.values():
+                    rules.extend(self._merge_group(field, handler, group))
+
+        return sorted(rules, key=lambda rule: rule.order)
+
+    def _merge_consecutive(self, rules):
+        """ _merge_consecutive is a helper method which merges all the given
+        rules (sorted by priority) which are consecutive and differ along a
+        single field.
+        """
+        result = []
+        for rule in rules:
+            merged = None
+            if result:
+                for field, handler in _FIELDS:
+                    if result[-1].merge_key(field) != rule.merge_key(field):
+                        continue
+                    group = self._merge_group(
+                        field, handler, [result[-1], rule]
+                    )
+                    if len(group) == 1:
+                        merged = group[0]
+                        break
+
+            if merged:
+                result[-1] = merged
+            else:
+                result.append(rule)
+
+        return result
+
+    def _merge_group(self, field, handler, group):
+        """ _merge_group is a helper method which returns the rules resulting
+        from merging the given group of rules along the given field.
+        """
+        if len(group) == 1:
+            return group
+
+        collapsed = handler.collapse([rule.values[field] for rule in group])
+        if len(collapsed) == len(group):
+            return group
+
+        return [
+            group[0].derive(field, value, [
+                rule for rule in group
+                if handler.contains(value, rule.values[field])
+            ])
+            for value in collapsed
+        ]
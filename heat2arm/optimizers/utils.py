@@ -0,0 +1,166 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains helper functions for inspecting and rewriting the
+    ARM template data which are shared between all the optimizers.
+"""
+
+import re
+
+
+# REFERENCE_REGEX matches all the literal references to variables or
+# parameters within an ARM expression; capturing the kind of the reference
+# ("variables" or "parameters") and the name of the referenced entity:
+REFERENCE_REGEX = re.compile(r"\b(variables|parameters)\('([^']*)'\)")
+
+# INDIRECT_REFERENCE_REGEX matches all the references to variables or
+# parameters whose names are read from an array variable; capturing the kind
+# of the reference and the name of the variable holding the array of names:
+INDIRECT_REFERENCE_REGEX = re.compile(
+    r"\b(variables|parameters)\(variables\('([^']*)'\)\["
+)
+
+
+def is_expression(value):
+    """ is_expression returns whether the given value is an ARM expression.
+
+    NOTE: strings starting with '[[' are escaped literals in ARM.
+    """
+    return (
+        isinstance(value, str) and value.startswith("[") and
+        value.endswith("]") and not value.startswith("[[")
+    )
+
+
+def unique(values):
+    """ unique returns the list of the given values without any duplicates,
+    in the order of their first occurrence.
+    """
+    result = []
+    for value in values:
+        if value not in result:
+            result.append(value)
+    return result
+
+
+def is_nested_template(data):
+    """ is_nested_template returns whether the given data is the template of a
+    nested deployment; whose parameters and variables are its own.
+    """
+    return isinstance(data, dict) and "$schema" in data
+
+
+def iter_strings(data):
+    """ iter_strings yields all the string values found within the given data.
+    The keys of any dicts and any nested templates are not included.
+    """
+    if is_nested_template(data):
+        return
+
+    if isinstance(data, dict):
+        for value in data.values():
+            for string in iter_strings(value):
+                yield string
+    elif isinstance(data, list):
+        for value in data:
+            for string in iter_strings(value):
+                yield string
+    elif isinstance(data, str):
+        yield data
+
+
+def get_variable_references(data):
+    """ get_variable_references returns the set of the names of all the
+    variables literally referenced within the given data.
+    """
+    return set(
+        name
+        for string in iter_strings(data) if is_expression(string)
+        for kind, name in REFERENCE_REGEX.findall(string)
+        if kind == "variables"
+    )
+
+
+def get_references(data, variables):
+    """ get_references returns the sets of the names of all the variables and
+    parameters referenced within the given data, be it directly or through
+    the given dict of variables of the template.
+
+    NOTE: references to variables or parameters whose names are themselves
+    read from an array variable (ex: "variables(variables('names')[0])") are
+    considered to reference all the names within the array.
+    """
+    names = {"variables": set(), "parameters": set()}
+
+    pending = [data]
+    while pending:
+        for string in iter_strings(pending.pop()):
+            if not is_expression(string):
+                continue
+
+            found = REFERENCE_REGEX.findall(string) + [
+                (kind, name)
+                for kind, array in INDIRECT_REFERENCE_REGEX.findall(string)
+                for name in variables.get(array, [])
+                if isinstance(name, str)
+            ]
+            for kind, name in found:
+                if name in names[kind]:
+                    continue
+                names[kind].add(name)
+                if kind == "variables" and name in variables:
+                    pending.append(variables[name])
+
+    return names["variables"], names["parameters"]
+
+
+def map_strings(data, func):
+    """ map_strings returns a copy of the given data with the given function
+    applied to all of its string values. The keys of any dicts and any nested
+    templates are left as-is.
+    """
+    if is_nested_template(data):
+        return data
+
+    if isinstance(data, dict):
+        return {key: map_strings(value, func) for key, value in data.items()}
+
+    if isinstance(data, list):
+        return [map_strings(value, func) for value in data]
+
+    if isinstance(data, str):
+        return func(data)
+
+    return data
+
+
+def rename_variable_references(data, renames):
+    """ rename_variable_references returns a copy of the given data with all
+    the references to variables renamed according to the given dict.
+    """
+    def _rename(match):
+        """ _rename returns the renamed version of the matched reference. """
+        if match.group(1) == "variables" and match.group(2) in renames:
+            return "variables('%s')" % renames[match.group(2)]
+        return match.group(0)
+
+    def _rename_all(string):
+        """ _rename_all renames all the references within the string. """
+        if is_expression(string):
+            return REFERENCE_REGEX.sub(_rename, string)
+        return string
+
+    return map_strings(data, _rename_all)
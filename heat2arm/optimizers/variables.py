@@ -0,0 +1,78 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the definition of the optimizer which merges
+    all the variables holding identical values.
+"""
+
+import json
+
+from heat2arm.optimizers import utils
+from heat2arm.optimizers.base import BaseARMTemplateOptimizer
+
+
+class VariableDeduplicationOptimizer(BaseARMTemplateOptimizer):
+    """ VariableDeduplicationOptimizer merges all the variables of the template
+    which hold identical values (ex: the vmSize_* of VMs of the same flavor)
+    into the one whose name comes first alphabetically, rewriting all the
+    references to the others accordingly.
+
+    NOTE: as merging variables whose values reference other variables may
+    render further variables identical, the merging is repeated until no
+    more identical variables remain.
+    """
+    config_option = "deduplicate_variables"
+
+    def optimize(self):
+        """ optimize merges all the variables with identical values. """
+        super(VariableDeduplicationOptimizer, self).optimize()
+
+        renames = self._get_renames(self._template_data["variables"])
+        while renames:
+            self._logger.info(
+                "'%s': merging %d duplicate variables.", self, len(renames)
+            )
+
+            self._template_data["resources"] = (
+                utils.rename_variable_references(
+                    self._template_data["resources"], renames
+                )
+            )
+
+            variables = self._template_data["variables"]
+            for name in renames:
+                del variables[name]
+            self._template_data["variables"] = (
+                utils.rename_variable_references(variables, renames)
+            )
+
+            renames = self._get_renames(self._template_data["variables"])
+
+    def _get_renames(self, variables):
+        """ _get_renames is a helper method which returns the dict between
+        the names of all the variables which duplicate another one and the
+        name of the variable they should be merged into.
+        """
+        groups = {}
+        for name in sorted(variables):
+            key = json.dumps(variables[name], sort_keys=True)
+            groups.setdefault(key, []).append(name)
+
+        return {
+            name: group[0]
+            for group in groups.values()
+            for name in group[1:]
+        }
@@ -0,0 +1,226 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the cache of parsed stacks; which stores the dicts of the parsed
+    resources of templates in a compact serialized form, so that templates
+    parsed before may be loaded without being parsed again.
+"""
+
+import errno
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from heat2arm.config import CONF
+from heat2arm.parser.cfn import RESOURCE_CLASS as cfn_resource_class
+from heat2arm.parser.common import files
+from heat2arm.parser.hot import RESOURCE_CLASS as heat_resource_class
+from heat2arm.parser.hot.nested import NestedStackResource
+
+
+LOG = logging.getLogger("__heat2arm__.%s" % __name__)
+
+# FORMAT_VERSION is the version of the serialized form of parsed stacks;
+# which is part of their digests, so that it changing invalidates all of them:
+FORMAT_VERSION = 2
+
+# _KINDS is the mapping between the resource classes of
+# parsed stacks and the kinds they are serialized as:
+_KINDS = {
+    heat_resource_class: "hot",
+    cfn_resource_class: "cfn",
+    NestedStackResource: "nested",
+}
+
+# _CLASSES is the mapping between the serialized
+# kinds of resources and their resource classes:
+_CLASSES = {kind: cls for cls, kind in _KINDS.items()}
+
+
+def get_digest(template, base_path=None):
+    """ get_digest returns the digest which identifies the parsed stack of
+    the given template (be it its string contents or its already loaded data)
+    with the given base path.
+
+    NOTE: the options the parsing depends on are part of the digest; whilst
+    the files referenced by the template are checked upon loading instead.
+    """
+    if not isinstance(template, str):
+        template = json.dumps(template, sort_keys=True, default=str)
+
+    return hashlib.sha256(json.dumps([
+        FORMAT_VERSION, template,
+        os.path.abspath(base_path or os.getcwd()),
+        CONF.cfn_ref_exceptions, CONF.cfn_getatt_exceptions,
+    ], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def dump_stack(stack, file_digests=None):
+    """ dump_stack returns the serialized form of the given dict of parsed
+    resources; along with the given dict between the paths of the files
+    referenced during the parsing and the digests of their contents.
+
+    It raises a TypeError if any of the resources cannot be serialized.
+    """
+    return json.dumps({
+        "version": FORMAT_VERSION,
+        "files": file_digests or {},
+        "stack": _dump_resources(stack),
+    }, separators=(",", ":"))
+
+
+def load_stack(serialized):
+    """ load_stack returns the dict of parsed resources from the given
+    serialized form; or None if any of the files referenced during the
+    parsing of the stack changed since.
+
+    It raises a ValueError if the serialized form is not a valid one.
+    """
+    data = json.loads(serialized)
+    if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+        raise ValueError("Unsupported serialized stack format.")
+
+    for path, digest in data["files"].items():
+        try:
+            if files.get_file_digest(path) != digest:
+                return None
+        except (IOError, OSError):
+            return None
+
+    return _load_resources(data["stack"])
+
+
+class StackCache(object):
+    """ StackCache is the cache of parsed stacks within a directory; with
+    each stack being stored as a file named after the digest of its template.
+
+    The stacks loaded from the cache are always new instances of their
+    resources; so they may be freely altered by their users.
+    """
+
+    def __init__(self, directory):
+        """ A StackCache is created from the path of the directory the parsed
+        stacks are stored within; which is created along with the first one.
+        """
+        self.directory = directory
+
+    def load(self, digest):
+        """ load returns the dict of parsed resources stored under the given
+        digest; or None if there is none or it is no longer valid.
+        """
+        try:
+            with open(self._get_path(digest)) as cache_file:
+                stack = load_stack(cache_file.read())
+        except (IOError, OSError):
+            return None
+        except (ValueError, KeyError, TypeError) as ex:
+            LOG.warning("Ignoring invalid cached stack '%s': %s", digest, ex)
+            return None
+
+        if stack is None:
+            LOG.debug("Cached stack '%s' is out of date.", digest)
+        return stack
+
+    def store(self, digest, stack, file_digests=None):
+        """ store stores the given dict of parsed resources under the given
+        digest; along with the dict between the paths of the files referenced
+        during the parsing and the digests of their contents.
+
+        NOTE: failures to store stacks are only logged; as the cache is
+        merely an optimization.
+        """
+        try:
+            serialized = dump_stack(stack, file_digests)
+        except (KeyError, TypeError, ValueError) as ex:
+            LOG.debug("Unable to serialize stack '%s': %s", digest, ex)
+            return
+
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+        except OSError as ex:
+            if ex.errno != errno.EEXIST:
+                LOG.warning("Unable to create the stack cache: %s", ex)
+                return
+
+        # NOTE: the stack is written to a temporary file first and renamed
+        # afterwards; so that concurrent users never read partial stacks:
+        path = None
+        try:
+            handle, path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(handle, "w") as cache_file:
+                cache_file.write(serialized)
+            os.rename(path, self._get_path(digest))
+        except (IOError, OSError) as ex:
+            LOG.warning("Unable to store stack '%s': %s", digest, ex)
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    def _get_path(self, digest):
+        """ _get_path is a helper method which returns the path of
+        the file the stack with the given digest is stored as.
+        """
+        return os.path.join(self.directory, "%s.json" % digest)
+
+
+def _dump_resources(stack):
+    """ _dump_resources is a helper function which returns the list of
+    the serialized forms of all the resources of the given stack; in the
+    order of the stack itself, as the resulting template follows it.
+    """
+    resources = []
+    for name, resource in stack.items():
+        entry = [
+            _KINDS[resource.__class__], name, resource.type,
+            resource.meta, resource.properties, resource.references
+        ]
+        if isinstance(resource, NestedStackResource):
+            entry.extend([
+                _dump_resources(resource.stack),
+                resource.count, resource.provider
+            ])
+        resources.append(entry)
+
+    return resources
+
+
+def _load_resources(entries):
+    """ _load_resources is a helper function which returns the
+    dict of the resources from the given serialized forms.
+    """
+    stack = {}
+    for entry in entries:
+        kind, name, res_type, meta, properties, references = entry[:6]
+        cls = _CLASSES[kind]
+
+        data = {
+            cls._type_field_name: res_type,
+            cls._properties_field_name: properties,
+        }
+        if cls._meta_field_name:
+            data[cls._meta_field_name] = meta
+
+        if cls is NestedStackResource:
+            stack[name] = cls(
+                name, data, _load_resources(entry[6]), entry[7], entry[8]
+            )
+        else:
+            stack[name] = cls(name, data)
+        stack[name].references = references
+
+    return stack
@@ -0,0 +1,230 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Defines the collection of the errors of a conversion which is run with all
+    the errors being recorded as diagnostics rather than aborting on the first.
+"""
+
+import collections
+import contextlib
+import logging
+import threading
+
+
+LOG = logging.getLogger("__heat2arm__.%s" % __name__)
+
+# Diagnostic is a single error encountered throughout a conversion; holding
+# the phase it occurred in (ex: "parsing"), the name of the resource it
+# concerns (if any), the name of the class of the error and its message:
+Diagnostic = collections.namedtuple(
+    "Diagnostic", ["phase", "resource", "error", "message"]
+)
+
+
+class Diagnostics(object):
+    """ Diagnostics collects all the errors encountered throughout a
+    conversion; along with the names of the resources which failed and of the
+    ones which were skipped as they reference failed resources.
+
+    The resources of nested stacks are accounted for by nested Diagnostics
+    which record their errors within the ones of the top-level template.
+    All the methods are safe to be called from several threads.
+    """
+
+    def __init__(self, parent=None, prefix=None):
+        """ A Diagnostics is created from the Diagnostics of the template
+        the resources of its own are nested within (if any) and the prefix
+        of the names of its resources within the reports.
+        """
+        self._parent = parent
+        self._prefix = prefix
+        self._lock = threading.Lock() if parent is None else parent._lock
+
+        # entries is the list of all the recorded Diagnostics:
+        self._entries = []
+        # failed is the ordered dict of the names of the failed resources:
+        self._failed = collections.OrderedDict()
+        # skipped is the ordered dict between the names of the skipped
+        # resources and the names of the resources they reference which
+        # have failed or were skipped themselves:
+        self._skipped = collections.OrderedDict()
+        # nested is the mapping between the names of the nested stack
+        # resources and their nested Diagnostics:
+        self._nested = {}
+
+    def __len__(self):
+        """ __len__ returns the number of errors recorded so far. """
+        return len(self._get_root()._entries)
+
+    def __iter__(self):
+        """ __iter__ iterates over all the recorded Diagnostics. """
+        with self._lock:
+            entries = list(self._get_root()._entries)
+        return iter(entries)
+
+    def nested(self, name):
+        """ nested returns the Diagnostics of the resources of the nested stack
+        of the resource with the given name.
+        """
+        with self._lock:
+            if name not in self._nested:
+                self._nested[name] = Diagnostics(self, self._qualify(name))
+            return self._nested[name]
+
+    def record(self, phase, error, resource=None):
+        """ record records the given exception raised during the given phase;
+        marking the resource with the given name as failed, if any.
+        """
+        diagnostic = Diagnostic(
+            phase, self._qualify(resource), type(error).__name__, str(error)
+        )
+        LOG.debug("Recorded %s error: %s", phase, diagnostic)
+
+        with self._lock:
+            self._get_root()._entries.append(diagnostic)
+            if resource is not None:
+                self._failed[resource] = None
+
+    def is_excluded(self, name):
+        """ is_excluded returns whether the resource with the given
+        name has failed or was skipped.
+        """
+        with self._lock:
+            return name in self._failed or name in self._skipped
+
+    def skip_dependents(self, resources):
+        """ skip_dependents marks all the given resources which reference any
+        failed or skipped resource as skipped themselves; returning the list of
+        the ones which were not excluded.
+
+        NOTE: a resource is considered to reference another if any of the
+        functions within its properties (ex: get_resource) referenced it; as
+        listed in its 'references' by the Template it was parsed from.
+        """
+        changed = True
+        while changed:
+            changed = False
+            for resource in resources:
+                if self.is_excluded(resource.name):
+                    continue
+
+                causes = [
+                    name for name in resource.references
+                    if self.is_excluded(name)
+                ]
+                if causes:
+                    LOG.warning(
+                        "Skipping resource '%s' as it references '%s'.",
+                        resource.name, causes[0]
+                    )
+                    with self._lock:
+                        self._skipped[resource.name] = causes[0]
+                    changed = True
+
+        return [
+            resource for resource in resources
+            if not self.is_excluded(resource.name)
+        ]
+
+    def get_report(self):
+        """ get_report returns the dict of all the diagnostics recorded
+        throughout the conversion; which is directly serializable to JSON.
+        """
+        with self._lock:
+            failed = []
+            skipped = []
+            for diagnostics in self._walk():
+                failed.extend(
+                    diagnostics._qualify(name) for name in diagnostics._failed
+                )
+                skipped.extend(
+                    {
+                        "resource": diagnostics._qualify(name),
+                        "references": diagnostics._qualify(cause),
+                    }
+                    for name, cause in diagnostics._skipped.items()
+                )
+            entries = list(self._get_root()._entries)
+
+        return {
+            "errors": len(entries),
+            "failed_resources": failed,
+            "skipped_resources": skipped,
+            "diagnostics": [entry._asdict() for entry in entries],
+        }
+
+    def _get_root(self):
+        """ _get_root is a helper method which returns the
+        Diagnostics of the top-level template.
+        """
+        diagnostics = self
+        while diagnostics._parent is not None:
+            diagnostics = diagnostics._parent
+        return diagnostics
+
+    def _walk(self):
+        """ _walk is a helper method which yields the Diagnostics and all the
+        nested ones within it, depth-first.
+        """
+        yield self
+        for name in sorted(self._nested):
+            for diagnostics in self._nested[name]._walk():
+                yield diagnostics
+
+    def _qualify(self, name):
+        """ _qualify is a helper method which returns the name of the resource
+        with the given name within the reports.
+        """
+        if name is None or self._prefix is None:
+            return name
+        return "%s/%s" % (self._prefix, name)
+
+
+@contextlib.contextmanager
+def collect(diagnostics, phase, resource=None):
+    """ collect is a context manager which records any exception raised within
+    it to the given Diagnostics under the given phase and resource name; or
+    lets it propagate if no Diagnostics are given.
+    """
+    try:
+        yield
+    except Exception as ex:
+        if diagnostics is None:
+            raise
+        diagnostics.record(phase, ex, resource)
+
+
+def format_report(report):
+    """ format_report returns the human-readable text of the given report
+    returned by a Diagnostics' get_report.
+    """
+    lines = ["Errors: %d" % report["errors"]]
+    for entry in report["diagnostics"]:
+        lines.append("    [%s] %s%s: %s" % (
+            entry["phase"],
+            "'%s' - " % entry["resource"] if entry["resource"] else "",
+            entry["error"], entry["message"]
+        ))
+
+    if report["skipped_resources"]:
+        lines.extend(["", "Skipped resources:"])
+        for entry in report["skipped_resources"]:
+            lines.append("    '%s' references '%s'" % (
+                entry["resource"], entry["references"]
+            ))
+
+    return "\n".join(lines) + "\n"
+
@@ -0,0 +1,198 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the process-wide cache of the contents of the local files
+    referenced by templates (ex: through get_file or provider templates),
+    along with the data derived from them.
+"""
+
+import collections
+import contextlib
+import hashlib
+import os
+import threading
+
+
+# MAX_CACHED_FILES is the maximum number of files whose contents are cached:
+MAX_CACHED_FILES = 1024
+
+# MAX_CACHED_SIZE is the maximum total size of the distinct cached contents;
+# files larger than it are never cached:
+MAX_CACHED_SIZE = 64 * 1024 * 1024
+
+# _FILES is the ordered dict between the absolute paths of the cached files
+# and the (mtime, size, contents, digest) tuples of them; from the least
+# recently read one to the most recently read one:
+_FILES = collections.OrderedDict()
+
+# _CONTENTS is the mapping between the digests of the contents of all the
+# cached files and the [contents, number of files, size] lists of them; so that
+# identical files are only ever held in memory once:
+_CONTENTS = {}
+
+# _DERIVED is the mapping between the digests of the cached contents and the
+# dicts of the data derived from them (ex: the loaded data of templates); which
+# are dropped along with the contents:
+_DERIVED = {}
+
+# _SIZE is the total size of the contents held in _CONTENTS:
+_SIZE = [0]
+
+_LOCK = threading.Lock()
+
+# _RECORDS holds the list of the dicts which the files read by each thread
+# are being recorded to:
+_RECORDS = threading.local()
+
+
+def get_file_contents(path):
+    """ get_file_contents returns the contents of the file at the given path.
+
+    The contents of the most recently read files are cached for as long as
+    the files are unchanged; with the contents of identical files being
+    shared between all of them. It raises any IOError or OSError from
+    accessing the file.
+    """
+    path = os.path.abspath(path)
+    contents, digest = _get_file(path)
+
+    for record in getattr(_RECORDS, "records", ()):
+        record[path] = digest
+
+    return contents
+
+
+def get_file_derived(path, key, factory):
+    """ get_file_derived returns the data derived from the contents of the
+    file at the given path by the given factory, which is called with them.
+
+    The result is cached under the given key for as long as the contents of
+    the file are; being shared between all the identical files. It raises any
+    IOError or OSError from accessing the file.
+    NOTE: the result must be treated as read-only.
+    """
+    path = os.path.abspath(path)
+    contents, digest = _get_file(path)
+
+    for record in getattr(_RECORDS, "records", ()):
+        record[path] = digest
+
+    with _LOCK:
+        derived = _DERIVED.get(digest)
+        if derived is not None and key in derived:
+            return derived[key]
+
+    value = factory(contents)
+
+    with _LOCK:
+        # NOTE: the contents may have been evicted in the meantime; in which
+        # case the derived data must not outlive them:
+        entry = _CONTENTS.get(digest)
+        if entry is not None and entry[0] is contents:
+            value = _DERIVED.setdefault(digest, {}).setdefault(key, value)
+
+    return value
+
+
+def get_file_digest(path):
+    """ get_file_digest returns the digest of the contents of the file at the
+    given path. It raises any IOError or OSError from accessing the file.
+    """
+    return _get_file(os.path.abspath(path))[1]
+
+
+@contextlib.contextmanager
+def record_reads():
+    """ record_reads is a context manager which records all the files whose
+    contents are read by the current thread within it; yielding the dict
+    between their absolute paths and the digests of their contents.
+    """
+    if not hasattr(_RECORDS, "records"):
+        _RECORDS.records = []
+
+    record = {}
+    _RECORDS.records.append(record)
+    try:
+        yield record
+    finally:
+        _RECORDS.records.remove(record)
+
+
+def clear_file_cache():
+    """ clear_file_cache drops the contents of all the cached files. """
+    with _LOCK:
+        _FILES.clear()
+        _CONTENTS.clear()
+        _DERIVED.clear()
+        _SIZE[0] = 0
+
+
+def _get_file(path):
+    """ _get_file is a helper function which returns the contents of the file
+    at the given absolute path along with their digest; reading them only if
+    the file changed since it was last read.
+    """
+    stat = os.stat(path)
+
+    with _LOCK:
+        cached = _FILES.get(path)
+        if cached is not None and (
+                cached[:2] == (stat.st_mtime, stat.st_size)):
+            # NOTE: mark the file as the most recently read one:
+            del _FILES[path]
+            _FILES[path] = cached
+            return cached[2:]
+
+    with open(path, "rb") as source:
+        data = source.read()
+    digest = hashlib.sha1(data).hexdigest()
+    contents = data.decode("utf-8")
+
+    with _LOCK:
+        _uncache(path)
+        if len(data) > MAX_CACHED_SIZE:
+            return contents, digest
+
+        entry = _CONTENTS.get(digest)
+        if entry is None:
+            entry = _CONTENTS[digest] = [contents, 0, len(data)]
+            _SIZE[0] = _SIZE[0] + len(data)
+        entry[1] = entry[1] + 1
+        _FILES[path] = (stat.st_mtime, stat.st_size, entry[0], digest)
+
+        while len(_FILES) > MAX_CACHED_FILES or _SIZE[0] > MAX_CACHED_SIZE:
+            _uncache(next(iter(_FILES)))
+
+    return entry[0], digest
+
+
+def _uncache(path):
+    """ _uncache is a helper function which drops the file at the given path
+    from the cache; along with its contents and the data derived from them if
+    no other file shares them.
+
+    NOTE: it must be called with the _LOCK held.
+    """
+    cached = _FILES.pop(path, None)
+    if cached is None:
+        return
+
+    entry = _CONTENTS[cached[3]]
+    entry[1] = entry[1] - 1
+    if not entry[1]:
+        del _CONTENTS[cached[3]]
+        _DERIVED.pop(cached[3], None)
+        _SIZE[0] = _SIZE[0] - entry[2]
@@ -57,3 +57,23 @@ class Function(object):
         It should be implemented by all inheriting classes.
         """
         pass
+
+    def get_dangling_reference(self, args):
+        """ get_dangling_reference returns the name of the parameter or
+        resource referenced by the function with the given arguments which
+        is not defined within the template; or None if there is none.
+
+        It should be implemented by all inheriting classes which
+        reference parameters or resources.
+        """
+        return None
+
+    def get_referenced_resource(self, args):
+        """ get_referenced_resource returns the name of the resource defined
+        within the template which is referenced by the function with the given
+        arguments; or None if it references none.
+
+        It should be implemented by all inheriting classes which
+        reference resources.
+        """
+        return None
@@ -96,6 +96,33 @@ class GetAttrFunction(Function):
                     )
                 )
 
+    def get_dangling_reference(self, args):
+        """ get_dangling_reference returns the name of the
+        referenced resource if it does not exist; else None.
+        """
+        if not isinstance(args, list) or not args:
+            return None
+
+        if not isinstance(args[0], str) or args[0] in self._template.resources:
+            return None
+
+        return args[0]
+
+    def get_referenced_resource(self, args):
+        """ get_referenced_resource returns the name of the
+        referenced resource if it exists; else None.
+        """
+        if not isinstance(args, list) or not args:
+            return None
+
+        if not isinstance(args[0], str):
+            return None
+
+        if args[0] not in self._template.resources:
+            return None
+
+        return args[0]
+
     def apply(self, args):
         """ apply applies the function to the given set of arguments and
         returns the result:
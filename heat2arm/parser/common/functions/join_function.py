@@ -17,8 +17,6 @@
     Defines the base class for all the argument joining functions.
 """
 
-from functools import reduce
-
 from heat2arm.parser.common import exceptions
 from heat2arm.parser.common.function import Function
 from heat2arm.parser.common.functions.utils import is_homogeneous
@@ -34,6 +32,11 @@ class JoinFunction(Function):
 
     It simply joins all of the elements it is provided with the
     given delimiter.
+
+    NOTE: considering functions are reduced depth-first, all the elements of
+    the list are already fully resolved by the time the join is applied; so
+    the whole join gets folded into a single string in one go. A single
+    element is returned as-is, without being converted to a string.
     """
 
     def _check_args(self, args):
@@ -63,5 +66,7 @@ class JoinFunction(Function):
         """
         self._check_args(args)
 
-        sep = args[0]
-        return reduce(lambda x, y: sep.join([str(x), str(y)]), args[1])
+        if len(args[1]) == 1:
+            return args[1][0]
+
+        return args[0].join([str(elem) for elem in args[1]])
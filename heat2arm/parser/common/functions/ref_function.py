@@ -59,6 +59,31 @@ class RefFunction(Function):
                 )
             )
 
+    def get_dangling_reference(self, args):
+        """ get_dangling_reference returns the referenced name if it is
+        neither a parameter, a resource nor an exception; else None.
+        """
+        if not isinstance(args, str):
+            return None
+
+        if (args in self._template.parameters or
+                args in self._template.resources or args in self._exceptions):
+            return None
+
+        return args
+
+    def get_referenced_resource(self, args):
+        """ get_referenced_resource returns the referenced name if it is
+        that of a resource rather than a parameter; else None.
+        """
+        if not isinstance(args, str) or args in self._template.parameters:
+            return None
+
+        if args not in self._template.resources:
+            return None
+
+        return args
+
     def apply(self, args):
         """ apply applies the function to the given set of data and returns
         the result.
@@ -0,0 +1,114 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Defines the layered mapping used for the properties of resources which
+    are based on the properties of other resources.
+"""
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+class OverlayDict(MutableMapping):
+    """ OverlayDict is a read-through view of several layered mappings, with
+    the values of later layers taking precedence over those of earlier ones.
+
+    None of the layers are ever altered; all changes are recorded within the
+    OverlayDict itself instead. Keys are listed in the order they first appear
+    in the layers, followed by those added afterwards.
+
+    NOTE: the values are shared with the layers, so any nested dicts or lists
+    must never be modified in place; only replaced.
+    """
+
+    __slots__ = ("_layers", "_changes", "_deleted")
+
+    def __init__(self, *layers):
+        """ An OverlayDict is created from the mappings to be layered; the
+        first one being the base which all the others are applied over.
+        """
+        self._layers = layers
+        # _changes is the dict of all the values set on the OverlayDict:
+        self._changes = {}
+        # _deleted is the set of all the keys deleted from the OverlayDict:
+        self._deleted = set()
+
+    def __getitem__(self, key):
+        """ __getitem__ returns the value of the given key from the topmost
+        layer holding it, unless it was set or deleted since.
+        """
+        if key in self._changes:
+            return self._changes[key]
+
+        if key not in self._deleted:
+            for layer in reversed(self._layers):
+                if key in layer:
+                    return layer[key]
+
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        """ __setitem__ sets the value of the given key without
+        altering any of the layers.
+        """
+        self._changes[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        """ __delitem__ deletes the given key without
+        altering any of the layers.
+        """
+        if key not in self:
+            raise KeyError(key)
+
+        self._changes.pop(key, None)
+        self._deleted.add(key)
+
+    def __contains__(self, key):
+        """ __contains__ returns whether the given key is set within
+        the OverlayDict without looking up its value.
+        """
+        if key in self._changes:
+            return True
+
+        return key not in self._deleted and any(
+            key in layer for layer in self._layers
+        )
+
+    def __iter__(self):
+        """ __iter__ iterates over all the keys of the OverlayDict. """
+        seen = set()
+        for layer in self._layers + (self._changes,):
+            for key in layer:
+                if key not in seen and key not in self._deleted:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        """ __len__ returns the number of keys of the OverlayDict. """
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        """ __repr__ returns the representation of the equivalent dict. """
+        return "%s(%r)" % (self.__class__.__name__, dict(self))
+
+    def copy(self):
+        """ copy returns a plain dict with all the
+        items of the OverlayDict.
+        """
+        return dict(self)
@@ -33,6 +33,8 @@ class Resource(object):
         - properties - the dict of properties for the Resource
         - meta - the dict of metadata for the resource (if applicable)
         - type - the type of the resource
+        - references - the sorted list of the names of the other resources
+          which the functions within its properties referenced
     """
 
     # _type_field_name contains the string constant representing the name
@@ -73,6 +75,9 @@ class Resource(object):
         else:
             self.meta = {}
 
+        # references are set by the Template the resource is parsed from:
+        self.references = []
+
         # next, check for a properties field:
         if self._properties_field_name in data:
             self.properties = data[self._properties_field_name]
@@ -85,11 +90,11 @@ class Resource(object):
         """ __str__ simply returns a pretty JSON interpretation
         of the data which characterises the resource.
         """
-        return json.dumps(self.properties, indent=4)
+        return json.dumps(dict(self.properties), indent=4)
 
     def __repr__(self):
         """ __repr__ simply returns a JSON interpretation of the data
         which characterises the resource in a dict under the
         resource's name.
         """
-        return json.dumps({self.name: self.properties})
+        return json.dumps({self.name: dict(self.properties)})
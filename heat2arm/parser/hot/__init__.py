@@ -23,6 +23,7 @@ from heat2arm.parser.hot.resource import HeatResource as RESOURCE_CLASS
 
 FUNCTIONS = [
     functions.HeatGetAttrFunction,
+    functions.HeatGetFileFunction,
     functions.HeatGetParameterFunction,
     functions.HeatGetResourceFunction,
     functions.HeatJoinListFunction,
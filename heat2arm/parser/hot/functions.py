@@ -18,7 +18,12 @@
     of a heat template.
 """
 
+import os
+
+from heat2arm.parser.common import exceptions
+from heat2arm.parser.common import files
 from heat2arm.parser.common import functions
+from heat2arm.parser.common.function import Function
 
 
 class HeatGetResourceFunction(functions.RefFunction):
@@ -73,3 +78,44 @@ class HeatGetAttrFunction(functions.GetAttrFunction):
     """
     name = "get_attr"
     _properties_field_name = "properties"
+
+
+class HeatGetFileFunction(Function):
+    """ HeatGetFileFunction implements the functionality of the get_file
+    Heat template function.
+
+    It takes the form:
+
+        " get_file: relative/path/to/file "
+
+    NOTE: only local files are supported; which are looked up relative to
+    the directory of the template and returned as-is.
+    """
+    name = "get_file"
+
+    def _check_args(self, args):
+        """ _check_args checks the validity of the provided arguments. """
+        if not isinstance(args, str):
+            raise exceptions.FunctionArgumentException(
+                "get_file expected a string path, got: '%s'" % args
+            )
+
+        if "://" in args and not args.startswith("file://"):
+            raise exceptions.FunctionArgumentException(
+                "get_file: only local files are supported, got: '%s'" % args
+            )
+
+    def apply(self, args):
+        """ apply returns the contents of the referenced file. """
+        self._check_args(args)
+
+        if args.startswith("file://"):
+            args = args[len("file://"):]
+        path = os.path.join(self._template.base_path or os.getcwd(), args)
+
+        try:
+            return files.get_file_contents(path)
+        except (IOError, OSError, ValueError) as ex:
+            raise exceptions.FunctionApplicationException(
+                "get_file: unable to read '%s': %s" % (path, ex)
+            )
@@ -0,0 +1,225 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the expansion of the nested stacks of Heat templates; namely the
+    resources whose type is a provider template and OS::Heat::ResourceGroups.
+"""
+
+import copy
+import json
+import logging
+import os
+
+import yaml
+
+from heat2arm.parser.common import files
+from heat2arm.parser.common.exceptions import TemplateDataException
+from heat2arm.parser.hot.resource import HeatResource
+
+
+LOG = logging.getLogger("__heat2arm__.%s" % __name__)
+
+# RESOURCE_GROUP_TYPE is the type of Heat's ResourceGroups:
+RESOURCE_GROUP_TYPE = "OS::Heat::ResourceGroup"
+
+# PROVIDER_TEMPLATE_EXTENSIONS is the tuple of the extensions of the files
+# which a resource type is considered to be the path of a template by:
+PROVIDER_TEMPLATE_EXTENSIONS = (".yaml", ".yml", ".template", ".json")
+
+
+class NestedStackResource(HeatResource):
+    """ NestedStackResource is a Heat resource which is a nested stack; be it
+    one whose type is a provider template or an OS::Heat::ResourceGroup.
+
+    Besides the fields of any resource, it holds:
+        - stack - the dict of the parsed resources of the nested stack
+        - count - the number of members of a ResourceGroup (or None)
+        - provider - the path of the provider template (or None)
+        - key - the key which identifies nested stacks which are identical
+    """
+
+    def __init__(self, name, data, stack, count=None, provider=None):
+        """ A NestedStackResource is created from the name and data of the
+        resource, the dict of the parsed resources of the nested stack, the
+        number of members of a ResourceGroup and the path of the provider
+        template defining the nested stack, if any.
+        """
+        super(NestedStackResource, self).__init__(name, data)
+
+        self.stack = stack
+        self.count = count
+        self.provider = provider
+
+        # NOTE: nested stacks of the same provider template given the same
+        # properties are identical; be they the members of ResourceGroups:
+        definition = self.properties
+        if count is not None:
+            definition = definition.get("resource_def", {})
+            if provider is not None:
+                definition = definition.get("properties", {})
+        self.key = json.dumps(
+            [provider, definition], sort_keys=True, default=str
+        )
+
+
+def is_provider_template(resource_type):
+    """ is_provider_template returns whether the given
+    resource type is the path of a provider template.
+    """
+    return (
+        isinstance(resource_type, str) and "://" not in resource_type and
+        resource_type.lower().endswith(PROVIDER_TEMPLATE_EXTENSIONS)
+    )
+
+
+def load_template_data(path):
+    """ load_template_data returns the loaded data of the template at the given
+    path. The data of each template is only loaded once for as long as the
+    contents of the file are cached, with each call returning a copy of it.
+    """
+    data = files.get_file_derived(path, "template_data", yaml.safe_load)
+
+    # NOTE: the reduction of the functions of a template alters its data:
+    return copy.deepcopy(data)
+
+
+def expand_nested_stacks(template_class, resources, base_path, ancestors=()):
+    """ expand_nested_stacks returns the given dict of parsed Heat resources
+    with all the nested stacks amongst them expanded into
+    NestedStackResources. The provider templates are looked up relative to
+    the given base path and parsed as the given Template class.
+
+    The ancestors are the paths of the provider templates which the
+    resources are nested within; so as to detect recursive nesting.
+    """
+    expanded = {}
+    for name, resource in resources.items():
+        if resource.type == RESOURCE_GROUP_TYPE:
+            resource = _expand_resource_group(
+                template_class, resource, base_path, ancestors
+            )
+        elif is_provider_template(resource.type):
+            path = os.path.abspath(
+                os.path.join(base_path or os.getcwd(), resource.type)
+            )
+            resource = NestedStackResource(
+                name, _get_data(resource), _parse_provider_template(
+                    template_class, path, resource.properties, ancestors
+                ), provider=path
+            )
+
+        expanded[name] = resource
+
+    return expanded
+
+
+def _get_data(resource):
+    """ _get_data is a helper function which returns the
+    data the given Heat resource was created from.
+    """
+    return {"type": resource.type, "properties": resource.properties}
+
+
+def _expand_resource_group(template_class, resource, base_path, ancestors):
+    """ _expand_resource_group is a helper function which returns the
+    NestedStackResource of the given OS::Heat::ResourceGroup. The nested
+    stack of the ResourceGroup is that of its members.
+
+    NOTE: any '%index%' within the definition of the members is left as-is,
+    as all the members are converted from the same definition.
+    """
+    count = resource.properties.get("count", 1)
+    try:
+        count = int(count)
+    except (TypeError, ValueError):
+        raise TemplateDataException(
+            "ResourceGroup '%s' has an invalid count: '%s'." % (
+                resource.name, count
+            )
+        )
+
+    definition = resource.properties.get("resource_def")
+    if not isinstance(definition, dict) or "type" not in definition:
+        raise TemplateDataException(
+            "ResourceGroup '%s' has no valid 'resource_def'." % resource.name
+        )
+
+    if "%index%" in json.dumps(definition, default=str):
+        LOG.warning(
+            "ResourceGroup '%s': '%%index%%' is not substituted within the"
+            " definition of its members.", resource.name
+        )
+
+    provider = None
+    if is_provider_template(definition["type"]):
+        provider = os.path.abspath(
+            os.path.join(base_path or os.getcwd(), definition["type"])
+        )
+        stack = _parse_provider_template(
+            template_class, provider, definition.get("properties", {}),
+            ancestors
+        )
+    else:
+        # NOTE: the single member of the nested stack of a ResourceGroup of
+        # plain resources is named after the ResourceGroup itself:
+        stack = expand_nested_stacks(
+            template_class,
+            {resource.name: HeatResource(resource.name, definition)},
+            base_path, ancestors
+        )
+
+    return NestedStackResource(
+        resource.name, _get_data(resource), stack, count, provider
+    )
+
+
+def _parse_provider_template(template_class, path, properties, ancestors):
+    """ _parse_provider_template is a helper function which returns the dict
+    of the parsed resources of the provider template at the given path; with
+    the defaults of its parameters set to the given properties.
+    """
+    if path in ancestors:
+        raise TemplateDataException(
+            "Provider template '%s' is nested within itself." % path
+        )
+
+    try:
+        data = load_template_data(path)
+    except (IOError, OSError, ValueError, yaml.YAMLError) as ex:
+        raise TemplateDataException(
+            "Unable to load provider template '%s': %s" % (path, ex)
+        )
+
+    if not isinstance(data, dict):
+        raise TemplateDataException(
+            "Provider template '%s' is not a valid template." % path
+        )
+
+    # NOTE: as with any template, parameters are resolved to their defaults;
+    # so the properties given to the nested stack become the defaults:
+    if not isinstance(data.get("parameters"), dict):
+        data["parameters"] = {}
+    parameters = data["parameters"]
+    for name, value in properties.items():
+        if not isinstance(parameters.get(name), dict):
+            parameters[name] = {}
+        parameters[name]["default"] = value
+
+    template = template_class(
+        data, base_path=os.path.dirname(path), ancestors=ancestors + (path,)
+    )
+    template.reduce_functions()
+    return template.parse_resources()
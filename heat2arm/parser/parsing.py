@@ -17,14 +17,47 @@
     Contains the definitions for the two main functions of this package.
 """
 
+import os
+
+from heat2arm.parser.cache import get_digest
+from heat2arm.parser.common import files
 from heat2arm.parser.template import Template
 
 
-def parse_template(template):
+def parse_template(template, base_path=None, diagnostics=None, cache=None):
     """ parse instantiates a Template object with the provided string contents
     of the template and returns a dict of all the resources defined within it.
+    Any files referenced by the template are relative to the given base path.
+
+    If Diagnostics are given, the errors of the resources are recorded to them
+    and the failed resources left out; rather than the first error raised.
+
+    If a StackCache is given, the resources are loaded from it if the template
+    was parsed before; and stored to it otherwise.
+
+    NOTE: stacks are never cached when collecting errors; as they lack the
+    resources which failed.
+    """
+    if cache is None or diagnostics is not None:
+        return _parse_template(template, base_path, diagnostics)
+
+    digest = get_digest(template, base_path)
+    stack = cache.load(digest)
+    if stack is not None:
+        return stack
+
+    with files.record_reads() as file_digests:
+        stack = _parse_template(template, base_path)
+    cache.store(digest, stack, file_digests)
+
+    return stack
+
+
+def _parse_template(template, base_path=None, diagnostics=None):
+    """ _parse_template is a helper function which parses the given template
+    and returns the dict of all the resources defined within it.
     """
-    temp = Template(template)
+    temp = Template(template, base_path, diagnostics=diagnostics)
     temp.reduce_functions()
     return temp.parse_resources()
 
@@ -34,4 +67,6 @@ def parse_file(filepath):
     parse_template on it.
     """
     with open(filepath) as file:
-        return parse_template(file.read())
+        return parse_template(
+            file.read(), os.path.dirname(os.path.abspath(filepath))
+        )
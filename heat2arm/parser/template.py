@@ -17,8 +17,11 @@
     Contains the definition for the class of a Template.
 """
 
+import functools
+
 import yaml
 
+from heat2arm.parser.common import diagnostics
 from heat2arm.parser.common.exceptions import TemplateDataException
 from heat2arm.parser.cfn import FUNCTIONS as cfn_functions
 from heat2arm.parser.cfn import RESOURCE_CLASS as cfn_resource_class
@@ -26,6 +29,7 @@ from heat2arm.parser.cfn import CFN_TEMPLATE_FIELDS as cfn_template_fields
 from heat2arm.parser.hot import FUNCTIONS as heat_functions
 from heat2arm.parser.hot import RESOURCE_CLASS as heat_resource_class
 from heat2arm.parser.hot import HEAT_TEMPLATE_FIELDS as heat_template_fields
+from heat2arm.parser.hot import nested
 
 
 class Template(object):
@@ -37,13 +41,22 @@ class Template(object):
     loads all of its contents.
     """
 
-    def __init__(self, template):
+    def __init__(self, template, base_path=None, ancestors=(),
+                 diagnostics=None):
         """ A template object is created by passing in the string
-        representing the template.
+        representing the template (or its already loaded data), the path of
+        the directory any files it references are relative to (defaulting to
+        the current directory), the paths of the templates it is nested
+        within, if any, and the Diagnostics to record the errors of its
+        resources to, if they are to be collected rather than raised.
 
         It goes ahead and uses the standard yaml module to load the contents of
         the template and stores in its attributes the provided data.
         """
+        self.base_path = base_path
+        self._ancestors = ancestors
+        self._diagnostics = diagnostics
+
         # the classic fields of any template:
         self.parameters = None
         self.resources = None
@@ -56,7 +69,10 @@ class Template(object):
         # NOTE: considering JSON is a subset of YAML since the 1.2
         # version of YAML's specification; we directly use the yaml
         # module for parsing the input template.
-        self._template_data = yaml.load(template)
+        if isinstance(template, dict):
+            self._template_data = template
+        else:
+            self._template_data = yaml.load(template)
 
         # check whether we're dealing with a CFN or a Heat template and define
         # the appropriate fields:
@@ -93,20 +109,133 @@ class Template(object):
         if self._template_fields["outputs"] in self._template_data:
             self._template_data.pop(self._template_fields["outputs"])
 
+        # references is the mapping between the names of the resources and
+        # the sorted lists of the names of the other resources referenced
+        # within their properties; which is determined before the functions
+        # get reduced to the referenced names:
+        self._references = self.get_resource_references()
+
     def reduce_functions(self):
         """ reduce_functions reduces all the functions from within a template's
         data.
+
+        When collecting errors, the resources whose functions cannot be
+        reduced are recorded as failed and left out of the template instead.
         """
-        self._template_data = self._reduce_functions(self._template_data)
+        if self._diagnostics is None:
+            self._template_data = self._reduce_functions(self._template_data)
+            return
+
+        field = self._template_fields["resources"]
+        for key, val in self._template_data.items():
+            if key != field:
+                self._template_data[key] = self._reduce_functions(val)
+
+        # NOTE: the failed resources are only left out once all are reduced;
+        # as the ones referencing them (ex: get_resource) check they exist:
+        failed = []
+        for name in list(self.resources):
+            try:
+                self.resources[name] = self._reduce_functions(
+                    self.resources[name]
+                )
+            except Exception as ex:
+                self._diagnostics.record("parsing", ex, name)
+                failed.append(name)
+
+        for name in failed:
+            del self.resources[name]
 
     def parse_resources(self):
         """ parse_resources instantiates all the resource classes from the
         resource data from within the template and returns their dict.
+
+        The nested stacks of Heat templates are expanded in the process.
+        When collecting errors, the resources which cannot be parsed or
+        expanded are recorded as failed and left out of the dict instead.
         """
-        return {
-            name: self._resource_class(name, data) for name, data in
-            self.resources.items()
-        }
+        resources = {}
+        for name, data in self.resources.items():
+            with diagnostics.collect(self._diagnostics, "parsing", name):
+                resources[name] = self._parse_resource(name, data)
+                resources[name].references = self._references.get(name, [])
+
+        return resources
+
+    def get_resource_references(self):
+        """ get_resource_references returns the mapping between the names of
+        all the resources of the template and the sorted lists of the names of
+        the other resources which functions within their properties reference.
+        It must be called before the functions are reduced.
+        """
+        field = self._resource_class._properties_field_name
+
+        references = {}
+        for name, data in self.resources.items():
+            targets = set()
+            if isinstance(data, dict):
+                for key, val in self._iter_function_calls(data.get(field)):
+                    target = self._functions[key].get_referenced_resource(val)
+                    if target is not None and target != name:
+                        targets.add(target)
+            references[name] = sorted(targets)
+
+        return references
+
+    def get_dangling_references(self):
+        """ get_dangling_references returns the list of the (resource name,
+        function name, referenced name) tuples of all the references within
+        the resources of the template to parameters or resources which are
+        not defined. It must be called before the functions are reduced.
+        """
+        dangling = []
+        for name in self.resources:
+            for key, val in self._iter_function_calls(self.resources[name]):
+                target = self._functions[key].get_dangling_reference(val)
+                if target is not None:
+                    dangling.append((name, key, target))
+
+        return sorted(dangling)
+
+    def _iter_function_calls(self, data):
+        """ _iter_function_calls is a helper method which yields the (function
+        name, arguments) pairs of all the function applications within the
+        given data; which must not have been reduced yet.
+        """
+        pending = [data]
+        while pending:
+            obj = pending.pop()
+            if isinstance(obj, list):
+                pending.extend(obj)
+                continue
+            if not isinstance(obj, dict):
+                continue
+
+            pending.extend(obj.values())
+            if len(obj) != 1:
+                continue
+            for key, val in obj.items():
+                if key in self._functions:
+                    yield key, val
+
+    def _parse_resource(self, name, data):
+        """ _parse_resource is a helper method which instantiates the resource
+        class from the given resource data; expanding it if it is the nested
+        stack of a Heat template.
+        """
+        resource = self._resource_class(name, data)
+        if self._template_fields is not heat_template_fields:
+            return resource
+
+        template_class = self.__class__
+        if self._diagnostics is not None:
+            template_class = functools.partial(
+                template_class, diagnostics=self._diagnostics.nested(name)
+            )
+
+        return nested.expand_nested_stacks(
+            template_class, {name: resource}, self.base_path, self._ancestors
+        )[name]
 
     def _validate_template_data(self):
         """ _validate_template_data is a helper method which checks for the
@@ -183,8 +312,11 @@ class Template(object):
             return obj
 
         if is_list:
-            # apply to each element of the list:
-            return [self._reduce_functions(item) for item in obj]
+            # apply to each element of the list in place:
+            for i, item in enumerate(obj):
+                obj[i] = self._reduce_functions(item)
+
+            return obj
 
         if is_dict:
             # reduce each element of the dict before reducing the whole:
@@ -95,6 +95,18 @@ class TestJoinFunction(FunctionTestCase, unittest.TestCase):
             ['separator', ["A", "B", "C"]],
             "AseparatorBseparatorC",
             None,
+        ),
+        TestInput(
+            "test numbers get joined",
+            [':', ["port", 80, "tcp"]],
+            "port:80:tcp",
+            None,
+        ),
+        TestInput(
+            "test single numeric element",
+            ['', [42]],
+            42,
+            None,
         )
     ]
 
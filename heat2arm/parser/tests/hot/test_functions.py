@@ -17,9 +17,13 @@
     This module contains tests for the Heat templating language functions.
 """
 
+import os
+import shutil
+import tempfile
 import unittest
 
 from heat2arm.parser.common import exceptions
+from heat2arm.parser.common import files
 from heat2arm.parser.hot import functions
 from heat2arm.parser.testing.hot_testing import (
     DUMMY_TEST_TEMPLATE,
@@ -29,6 +33,7 @@ from heat2arm.parser.testing.function_testing import (
     TestInput,
     FunctionTestCase
 )
+from heat2arm.parser.template import Template
 
 
 class TestJoinFunction(FunctionTestCase, unittest.TestCase):
@@ -70,6 +75,18 @@ class TestJoinFunction(FunctionTestCase, unittest.TestCase):
             ['separator', ["A", "B", "C"]],
             "AseparatorBseparatorC",
             None,
+        ),
+        TestInput(
+            "test numbers get joined",
+            [':', ["port", 80, "tcp"]],
+            "port:80:tcp",
+            None,
+        ),
+        TestInput(
+            "test single numeric element",
+            ['', [42]],
+            42,
+            None,
         )
     ]
 
@@ -183,3 +200,57 @@ class TestGetAttrFunction(FunctionTestCase, unittest.TestCase):
             exceptions.FunctionApplicationException
         )
     ]
+
+
+class TestGetFileFunction(unittest.TestCase):
+    """ TestGetFileFunction represents the set of test cases
+    for testing Heat's get_file function.
+    """
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self._dir, "scripts"))
+        for name in ("scripts/a.sh", "scripts/b.sh"):
+            with open(os.path.join(self._dir, name), "w") as script:
+                script.write("#!/bin/bash\necho hello\n")
+        open(os.path.join(self._dir, "empty.txt"), "w").close()
+
+        self._function = functions.HeatGetFileFunction(
+            Template(DUMMY_TEST_TEMPLATE, base_path=self._dir)
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+        files.clear_file_cache()
+
+    def test_relative_path(self):
+        self.assertEqual(
+            self._function.apply("scripts/a.sh"), "#!/bin/bash\necho hello\n"
+        )
+        self.assertEqual(self._function.apply("empty.txt"), "")
+
+    def test_identical_files_are_shared(self):
+        self.assertIs(
+            self._function.apply("scripts/a.sh"),
+            self._function.apply("file://scripts/b.sh")
+        )
+
+    def test_changed_file_is_reread(self):
+        self._function.apply("scripts/a.sh")
+
+        path = os.path.join(self._dir, "scripts", "a.sh")
+        with open(path, "w") as script:
+            script.write("#!/bin/bash\necho changed and longer\n")
+
+        self.assertEqual(
+            self._function.apply("scripts/a.sh"),
+            "#!/bin/bash\necho changed and longer\n"
+        )
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(exceptions.FunctionArgumentException):
+            self._function.apply(["scripts/a.sh"])
+        with self.assertRaises(exceptions.FunctionArgumentException):
+            self._function.apply("http://example.com/a.sh")
+        with self.assertRaises(exceptions.FunctionApplicationException):
+            self._function.apply("missing.sh")
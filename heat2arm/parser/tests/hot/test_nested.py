@@ -0,0 +1,130 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the expansion of nested stacks.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from heat2arm.parser.common.exceptions import TemplateDataException
+from heat2arm.parser.hot import nested
+from heat2arm.parser.parsing import parse_template
+
+
+CHILD_TEMPLATE = """
+heat_template_version: 2013-05-23
+parameters:
+  flavor:
+    type: string
+    default: m1.small
+resources:
+  server:
+    type: OS::Nova::Server
+    properties:
+      flavor: {get_param: flavor}
+"""
+
+PARENT_TEMPLATE = """
+heat_template_version: 2013-05-23
+parameters: {}
+resources:
+  web:
+    type: child.yaml
+    properties:
+      flavor: m1.large
+  group:
+    type: OS::Heat::ResourceGroup
+    properties:
+      count: 50
+      resource_def:
+        type: child.yaml
+        properties:
+          flavor: m1.large
+  plain:
+    type: OS::Heat::ResourceGroup
+    properties:
+      count: 3
+      resource_def:
+        type: OS::Nova::Server
+        properties:
+          flavor: m1.small
+"""
+
+
+class TestNestedStacks(unittest.TestCase):
+    """ TestNestedStacks represents the set of tests
+    for the expansion of nested stacks.
+    """
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._write("child.yaml", CHILD_TEMPLATE)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _write(self, name, contents):
+        with open(os.path.join(self._dir, name), "w") as template_file:
+            template_file.write(contents)
+
+    def test_provider_template(self):
+        stack = parse_template(PARENT_TEMPLATE, self._dir)
+
+        web = stack["web"]
+        self.assertIsInstance(web, nested.NestedStackResource)
+        self.assertIsNone(web.count)
+        self.assertEqual(web.provider, os.path.join(
+            os.path.abspath(self._dir), "child.yaml"
+        ))
+        self.assertEqual(
+            web.stack["server"].properties["flavor"], "m1.large"
+        )
+
+    def test_resource_groups(self):
+        stack = parse_template(PARENT_TEMPLATE, self._dir)
+
+        group = stack["group"]
+        self.assertEqual(group.count, 50)
+        self.assertEqual(list(group.stack), ["server"])
+        # the members of the group are identical to the provider resource:
+        self.assertEqual(group.key, stack["web"].key)
+
+        plain = stack["plain"]
+        self.assertEqual(plain.count, 3)
+        self.assertIsNone(plain.provider)
+        self.assertEqual(plain.stack["plain"].type, "OS::Nova::Server")
+        self.assertNotEqual(plain.key, group.key)
+
+    def test_invalid_count(self):
+        template = PARENT_TEMPLATE.replace("count: 3", "count: many")
+        with self.assertRaises(TemplateDataException):
+            parse_template(template, self._dir)
+
+    def test_recursive_nesting(self):
+        self._write("child.yaml", CHILD_TEMPLATE + """
+  nested:
+    type: child.yaml
+""")
+        with self.assertRaises(TemplateDataException):
+            parse_template(PARENT_TEMPLATE, self._dir)
+
+    def test_missing_provider_template(self):
+        os.remove(os.path.join(self._dir, "child.yaml"))
+        with self.assertRaises(TemplateDataException):
+            parse_template(PARENT_TEMPLATE, self._dir)
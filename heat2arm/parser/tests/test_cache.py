@@ -0,0 +1,174 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the cache of parsed stacks.
+"""
+
+import os
+import shutil
+import tempfile
+import timeit
+import unittest
+
+from heat2arm.parser import cache
+from heat2arm.parser.common.diagnostics import Diagnostics
+from heat2arm.parser.hot import nested
+from heat2arm.parser.parsing import parse_template
+
+
+CHILD_TEMPLATE = """
+heat_template_version: 2013-05-23
+parameters:
+  flavor:
+    type: string
+    default: m1.small
+resources:
+  server:
+    type: OS::Nova::Server
+    properties:
+      flavor: {get_param: flavor}
+"""
+
+PARENT_TEMPLATE = """
+heat_template_version: 2013-05-23
+parameters: {}
+resources:
+  web:
+    type: child.yaml
+    properties:
+      flavor: m1.large
+  group:
+    type: OS::Heat::ResourceGroup
+    properties:
+      count: 3
+      resource_def:
+        type: child.yaml
+  volume:
+    type: OS::Cinder::Volume
+    properties:
+      size: 10
+"""
+
+
+def make_large_template(count):
+    """ make_large_template returns a template with the given number of
+    servers; each with its own port.
+    """
+    return (
+        "heat_template_version: 2013-05-23\n"
+        "parameters:\n"
+        "  flavor: {type: string, default: m1.small}\n"
+        "resources:\n" + "".join(
+            "  server%d:\n"
+            "    type: OS::Nova::Server\n"
+            "    properties:\n"
+            "      flavor: {get_param: flavor}\n"
+            "      image: ubuntu.12.04.LTS.x86_64\n"
+            "      networks: [{port: {get_resource: port%d}}]\n"
+            "  port%d:\n"
+            "    type: OS::Neutron::Port\n"
+            "    properties:\n"
+            "      network_id: net\n" % (i, i, i)
+            for i in range(count)
+        )
+    )
+
+
+class TestStackCache(unittest.TestCase):
+    """ TestStackCache represents the set of tests
+    for the cache of parsed stacks.
+    """
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._cache_dir = os.path.join(self._dir, "cache")
+        self._cache = cache.StackCache(self._cache_dir)
+        self._write("child.yaml", CHILD_TEMPLATE)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _write(self, name, contents):
+        with open(os.path.join(self._dir, name), "w") as template_file:
+            template_file.write(contents)
+
+    def test_round_trip(self):
+        stack = parse_template(PARENT_TEMPLATE, self._dir)
+        loaded = cache.load_stack(cache.dump_stack(stack))
+
+        self.assertEqual(list(loaded), list(stack))
+        for name, resource in stack.items():
+            self.assertIs(loaded[name].__class__, resource.__class__)
+            self.assertEqual(loaded[name].type, resource.type)
+            self.assertEqual(loaded[name].properties, resource.properties)
+            self.assertEqual(loaded[name].references, resource.references)
+
+        group = loaded["group"]
+        self.assertIsInstance(group, nested.NestedStackResource)
+        self.assertEqual(group.count, 3)
+        self.assertEqual(group.provider, stack["group"].provider)
+        self.assertEqual(group.key, stack["group"].key)
+        self.assertEqual(
+            loaded["web"].stack["server"].properties["flavor"], "m1.large"
+        )
+
+    def test_cached_parsing(self):
+        stack = parse_template(PARENT_TEMPLATE, self._dir, cache=self._cache)
+        digest = cache.get_digest(PARENT_TEMPLATE, self._dir)
+        self.assertTrue(os.path.exists(
+            os.path.join(self._cache_dir, "%s.json" % digest)
+        ))
+
+        loaded = parse_template(PARENT_TEMPLATE, self._dir, cache=self._cache)
+        self.assertEqual(list(loaded), list(stack))
+        self.assertIsNot(loaded["volume"], stack["volume"])
+
+    def test_changed_provider_template(self):
+        parse_template(PARENT_TEMPLATE, self._dir, cache=self._cache)
+        digest = cache.get_digest(PARENT_TEMPLATE, self._dir)
+        self.assertIsNotNone(self._cache.load(digest))
+
+        self._write("child.yaml", CHILD_TEMPLATE.replace("m1.small", "tiny"))
+        self.assertIsNone(self._cache.load(digest))
+
+        stack = parse_template(PARENT_TEMPLATE, self._dir, cache=self._cache)
+        self.assertEqual(
+            stack["group"].stack["server"].properties["flavor"], "tiny"
+        )
+
+    def test_no_caching_when_collecting(self):
+        parse_template(
+            PARENT_TEMPLATE, self._dir, Diagnostics(), cache=self._cache
+        )
+        self.assertFalse(os.path.exists(self._cache_dir))
+
+    def test_load_faster_than_parsing(self):
+        # NOTE: the best of several runs of each is compared; loading
+        # typically being over a hundred times faster for such templates:
+        template = make_large_template(200)
+        parse_template(template, self._dir, cache=self._cache)
+
+        def _parse():
+            parse_template(template, self._dir)
+
+        def _load():
+            self.assertIsNotNone(
+                self._cache.load(cache.get_digest(template, self._dir))
+            )
+
+        parsing = min(timeit.repeat(_parse, number=1, repeat=3))
+        loading = min(timeit.repeat(_load, number=1, repeat=3))
+        self.assertLess(loading * 10, parsing)
@@ -0,0 +1,129 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the collection of the errors of templates.
+"""
+
+import unittest
+
+from heat2arm.parser.common.diagnostics import Diagnostics
+from heat2arm.parser.common.exceptions import FunctionApplicationException
+from heat2arm.parser.parsing import parse_template
+
+
+TEMPLATE = """
+heat_template_version: 2013-05-23
+parameters:
+  flavor:
+    type: string
+    default: m1.small
+resources:
+  good:
+    type: OS::Nova::Server
+    properties:
+      flavor: {get_param: flavor}
+  bad_param:
+    type: OS::Nova::Server
+    properties:
+      flavor: {get_param: missing}
+  typeless:
+    properties: {}
+  attachment:
+    type: OS::Cinder::VolumeAttachment
+    properties:
+      instance_uuid: {get_resource: bad_param}
+"""
+
+
+class TestDiagnostics(unittest.TestCase):
+    """ TestDiagnostics represents the set of tests for the
+    collection of the errors of templates.
+    """
+
+    def test_fail_fast(self):
+        with self.assertRaises(FunctionApplicationException):
+            parse_template(TEMPLATE)
+
+    def test_collect_parsing_errors(self):
+        diagnostics = Diagnostics()
+        stack = parse_template(TEMPLATE, diagnostics=diagnostics)
+
+        self.assertEqual(sorted(stack), ["attachment", "good"])
+        self.assertEqual(len(diagnostics), 2)
+        self.assertEqual(
+            sorted(entry.error for entry in diagnostics),
+            ["FunctionApplicationException", "ResourceTypeMissingException"]
+        )
+        self.assertTrue(diagnostics.is_excluded("bad_param"))
+        self.assertTrue(diagnostics.is_excluded("typeless"))
+
+    def test_skip_dependents(self):
+        diagnostics = Diagnostics()
+        stack = parse_template(TEMPLATE, diagnostics=diagnostics)
+
+        kept = diagnostics.skip_dependents(list(stack.values()))
+
+        self.assertEqual([resource.name for resource in kept], ["good"])
+        self.assertEqual(diagnostics.get_report()["skipped_resources"], [
+            {"resource": "attachment", "references": "bad_param"}
+        ])
+
+    def test_skip_only_references(self):
+        diagnostics = Diagnostics()
+        stack = parse_template(TEMPLATE + """
+  named:
+    type: OS::Nova::Server
+    properties:
+      name: bad_param
+      flavor: {get_param: flavor}
+  volume:
+    type: OS::Cinder::Volume
+    properties:
+      size: 1
+  attached:
+    type: OS::Cinder::VolumeAttachment
+    properties:
+      instance_uuid: {get_resource: named}
+      volume_id: {get_resource: volume}
+""", diagnostics=diagnostics)
+
+        self.assertEqual(stack["named"].references, [])
+        self.assertEqual(stack["attached"].references, ["named", "volume"])
+
+        kept = diagnostics.skip_dependents(list(stack.values()))
+
+        # the plain string property naming the failed resource
+        # is not a reference to it:
+        self.assertEqual(
+            sorted(resource.name for resource in kept),
+            ["attached", "good", "named", "volume"]
+        )
+        self.assertEqual(diagnostics.get_report()["skipped_resources"], [
+            {"resource": "attachment", "references": "bad_param"}
+        ])
+
+    def test_nested_report(self):
+        diagnostics = Diagnostics()
+        nested = diagnostics.nested("web")
+        nested.record("translate", ValueError("invalid"), "server")
+
+        self.assertFalse(diagnostics.is_excluded("server"))
+        self.assertTrue(nested.is_excluded("server"))
+
+        report = diagnostics.get_report()
+        self.assertEqual(report["errors"], 1)
+        self.assertEqual(report["failed_resources"], ["web/server"])
+        self.assertEqual(report["diagnostics"][0]["resource"], "web/server")
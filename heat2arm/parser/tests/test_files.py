@@ -0,0 +1,127 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the cache of the contents of local files.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from heat2arm.parser.common import files
+
+
+class TestFileCache(unittest.TestCase):
+    """ TestFileCache represents the set of tests for the
+    caching of the contents of the files read.
+    """
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._limits = (files.MAX_CACHED_FILES, files.MAX_CACHED_SIZE)
+        files.clear_file_cache()
+
+    def tearDown(self):
+        files.MAX_CACHED_FILES, files.MAX_CACHED_SIZE = self._limits
+        files.clear_file_cache()
+        shutil.rmtree(self._dir)
+
+    def _write(self, name, contents):
+        path = os.path.join(self._dir, name)
+        with open(path, "w") as out:
+            out.write(contents)
+        return path
+
+    def test_identical_contents_shared(self):
+        first = files.get_file_contents(self._write("a", "same"))
+        second = files.get_file_contents(self._write("b", "same"))
+
+        self.assertEqual(first, "same")
+        self.assertIs(first, second)
+        self.assertEqual(len(files._CONTENTS), 1)
+
+    def test_changed_file_read_again(self):
+        path = self._write("a", "old")
+        self.assertEqual(files.get_file_contents(path), "old")
+
+        self._write("a", "newer")
+        self.assertEqual(files.get_file_contents(path), "newer")
+        self.assertEqual(list(files._CONTENTS.values()), [["newer", 1, 5]])
+
+    def test_empty_file(self):
+        self.assertEqual(files.get_file_contents(self._write("a", "")), "")
+
+    def test_number_of_files_bounded(self):
+        files.MAX_CACHED_FILES = 2
+        paths = [self._write(str(i), "file%d" % i) for i in range(3)]
+        for path in paths[:2]:
+            files.get_file_contents(path)
+        # reading the first file again makes the second one the oldest:
+        files.get_file_contents(paths[0])
+        files.get_file_contents(paths[2])
+
+        self.assertEqual(list(files._FILES), [paths[0], paths[2]])
+        self.assertEqual(len(files._CONTENTS), 2)
+
+    def test_size_bounded(self):
+        files.MAX_CACHED_SIZE = 10
+        small = self._write("small", "12345")
+        other = self._write("other", "67890")
+        large = self._write("large", "x" * 11)
+
+        files.get_file_contents(small)
+        files.get_file_contents(other)
+        self.assertEqual(files._SIZE[0], 10)
+
+        self.assertEqual(files.get_file_contents(large), "x" * 11)
+        self.assertNotIn(large, files._FILES)
+
+        files.get_file_contents(self._write("last", "a"))
+        self.assertEqual(list(files._FILES), [other, os.path.join(
+            self._dir, "last"
+        )])
+        self.assertEqual(files._SIZE[0], 6)
+
+    def test_derived_data_cached(self):
+        calls = []
+
+        def _derive(contents):
+            calls.append(contents)
+            return [contents]
+
+        first = files.get_file_derived(self._write("a", "same"), "k", _derive)
+        second = files.get_file_derived(self._write("b", "same"), "k", _derive)
+
+        self.assertEqual(first, ["same"])
+        self.assertIs(first, second)
+        self.assertEqual(calls, ["same"])
+
+    def test_derived_data_evicted(self):
+        files.MAX_CACHED_FILES = 1
+        path = self._write("a", "first")
+        files.get_file_derived(path, "k", list)
+        files.get_file_contents(self._write("b", "second"))
+
+        self.assertEqual(files._DERIVED, {})
+        self.assertEqual(files.get_file_derived(path, "k", len), 5)
+
+    def test_derived_data_of_uncached_file(self):
+        files.MAX_CACHED_SIZE = 4
+        path = self._write("large", "x" * 5)
+
+        self.assertEqual(files.get_file_derived(path, "k", len), 5)
+        self.assertEqual(files._DERIVED, {})
@@ -0,0 +1,78 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the OverlayDict class.
+"""
+
+import unittest
+
+from heat2arm.parser.common.overlay import OverlayDict
+
+
+class TestOverlayDict(unittest.TestCase):
+    """ TestOverlayDict represents the set of tests
+    applied to the OverlayDict class.
+    """
+
+    def setUp(self):
+        self._base = {
+            "ImageId": "base-image",
+            "InstanceType": "m1.small",
+            "UserData": {"Fn::Join": ["", ["#!/bin/bash", "\n"]]},
+        }
+        self._overrides = {"InstanceType": "m1.large", "KeyName": "key"}
+        self._overlay = OverlayDict(self._base, self._overrides)
+
+    def test_read_through(self):
+        self.assertEqual(self._overlay["ImageId"], "base-image")
+        self.assertEqual(self._overlay["InstanceType"], "m1.large")
+        self.assertEqual(self._overlay.get("Missing"), None)
+        self.assertIs(self._overlay["UserData"], self._base["UserData"])
+
+        self.assertEqual(
+            list(self._overlay),
+            ["ImageId", "InstanceType", "UserData", "KeyName"]
+        )
+        self.assertEqual(len(self._overlay), 4)
+
+    def test_copy_on_write(self):
+        self._overlay["ImageId"] = "other-image"
+        self._overlay["SecurityGroups"] = ["sg"]
+        del self._overlay["UserData"]
+        del self._overlay["KeyName"]
+
+        self.assertEqual(self._overlay.copy(), {
+            "ImageId": "other-image",
+            "InstanceType": "m1.large",
+            "SecurityGroups": ["sg"],
+        })
+        self.assertNotIn("UserData", self._overlay)
+        with self.assertRaises(KeyError):
+            del self._overlay["UserData"]
+
+        # none of the layers must have been altered:
+        self.assertEqual(self._base["ImageId"], "base-image")
+        self.assertIn("UserData", self._base)
+        self.assertEqual(self._overrides, {
+            "InstanceType": "m1.large", "KeyName": "key"
+        })
+
+    def test_set_after_delete(self):
+        del self._overlay["ImageId"]
+        self._overlay["ImageId"] = "other-image"
+
+        self.assertEqual(self._overlay["ImageId"], "other-image")
+        self.assertEqual(list(self._overlay)[0], "ImageId")
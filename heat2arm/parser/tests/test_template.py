@@ -23,3 +23,40 @@ import unittest
 from heat2arm.parser.template import Template
 from heat2arm.parser.testing import cfn_testing
 from heat2arm.parser.testing import hot_testing
+
+
+DANGLING_TEMPLATE = """
+heat_template_version: 2013-05-23
+parameters:
+  flavor:
+    type: string
+    default: m1.small
+resources:
+  server:
+    type: OS::Nova::Server
+    properties:
+      flavor: {get_param: flavor}
+      image: {get_param: image}
+      networks:
+        - port: {get_resource: port}
+  volume:
+    type: OS::Cinder::Volume
+    properties:
+      name: {get_attr: [missing, name]}
+      size: {get_attr: [server, flavor]}
+"""
+
+
+class TestDanglingReferences(unittest.TestCase):
+    """ TestDanglingReferences represents the set of tests for finding the
+    references to undefined parameters and resources of templates.
+    """
+
+    def test_dangling_references(self):
+        template = Template(DANGLING_TEMPLATE)
+
+        self.assertEqual(template.get_dangling_references(), [
+            ("server", "get_param", "image"),
+            ("server", "get_resource", "port"),
+            ("volume", "get_attr", "missing"),
+        ])
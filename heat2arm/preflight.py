@@ -0,0 +1,262 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the pre-flight checks of Heat templates; which report all the
+    issues that would have their translation fail without translating them.
+"""
+
+import collections
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+import yaml
+
+from heat2arm import config
+from heat2arm.config import CONF
+from heat2arm.parser.common.diagnostics import Diagnostics
+from heat2arm.parser.hot.nested import NestedStackResource
+from heat2arm.parser.template import Template
+from heat2arm.translation_engine import RESOURCE_TRANSLATORS
+
+
+LOG = logging.getLogger("__heat2arm__.%s" % __name__)
+
+# the kinds of the issues reported by the pre-flight checks; besides those
+# reported by the translators themselves (ex: "unmapped_image"):
+INVALID_TEMPLATE = "invalid_template"
+DANGLING_REFERENCE = "dangling_reference"
+PARSING_ERROR = "parsing_error"
+UNSUPPORTED_TYPE = "unsupported_type"
+
+# Issue is a single issue found by the pre-flight checks; holding its kind,
+# the name of the resource it concerns (if any) and its message:
+Issue = collections.namedtuple("Issue", ["kind", "resource", "message"])
+
+# _YAML_LOADER is the fastest safe YAML loader available:
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# _WORKER_CONFIG is the ConfigSnapshot used by the checks of the templates
+# within each of the worker processes of check_files:
+_WORKER_CONFIG = None
+
+
+def get_translator_classes():
+    """ get_translator_classes returns the dict between the Heat resource
+    types and the classes of the translators which translate them.
+
+    NOTE: as with get_resource_translator, the last translator
+    registered for a type takes precedence.
+    """
+    return {
+        trans.heat_resource_type: trans for trans in RESOURCE_TRANSLATORS
+    }
+
+
+def check_template(template, base_path=None, config_snapshot=None):
+    """ check_template returns the list of the Issues found with the given
+    template (as a string or its loaded data) within the given ConfigSnapshot
+    (defaulting to a snapshot of the current configuration). The template is
+    only parsed; with none of its resources being translated.
+    """
+    if config_snapshot is None:
+        config_snapshot = config.snapshot()
+
+    diagnostics = Diagnostics()
+    try:
+        temp = Template(template, base_path, diagnostics=diagnostics)
+    except Exception as ex:
+        return [Issue(INVALID_TEMPLATE, None, str(ex))]
+
+    issues = [
+        Issue(DANGLING_REFERENCE, name, "'%s' references '%s', which is not"
+              " defined." % (function, target))
+        for name, function, target in temp.get_dangling_references()
+    ]
+
+    temp.reduce_functions()
+    stack = temp.parse_resources()
+
+    # NOTE: the dangling references fail the reduction of the
+    # resources holding them, which is reported only once:
+    dangling = set(issue.resource for issue in issues)
+    issues.extend(
+        Issue(PARSING_ERROR, entry.resource, "%s: %s" % (
+            entry.error, entry.message
+        ))
+        for entry in diagnostics if entry.resource not in dangling
+    )
+
+    issues.extend(
+        _check_stack(stack, get_translator_classes(), config_snapshot)
+    )
+
+    return issues
+
+
+def _check_stack(stack, translators, config_snapshot, prefix=""):
+    """ _check_stack is a helper function which returns the list of the Issues
+    found with the given dict of parsed Heat resources and the stacks of all
+    the nested stacks amongst them by the given dict of translator classes.
+    """
+    issues = []
+    for name in sorted(stack):
+        resource = stack[name]
+        qualified = prefix + name
+
+        if isinstance(resource, NestedStackResource):
+            issues.extend(_check_stack(
+                resource.stack, translators, config_snapshot,
+                qualified + "/"
+            ))
+            continue
+
+        trans = translators.get(resource.type)
+        if trans is None:
+            issues.append(Issue(
+                UNSUPPORTED_TYPE, qualified,
+                "No translator for resource type '%s'." % resource.type
+            ))
+            continue
+
+        issues.extend(
+            Issue(kind, qualified, message)
+            for kind, message in trans.check_resource(
+                resource, config_snapshot
+            )
+        )
+
+    return issues
+
+
+def check_file(path, config_snapshot=None):
+    """ check_file returns the dict of the results of the pre-flight checks
+    of the template at the given path; which is directly serializable to
+    JSON. Any provider templates are looked up relative to its directory.
+    """
+    start = time.time()
+    try:
+        with open(path) as template_file:
+            template = template_file.read()
+    except (IOError, OSError) as ex:
+        issues = [Issue(INVALID_TEMPLATE, None, str(ex))]
+    else:
+        try:
+            template = _load_template(template)
+        except (ValueError, yaml.YAMLError) as ex:
+            issues = [Issue(INVALID_TEMPLATE, None, str(ex))]
+        else:
+            issues = check_template(
+                template, _get_base_path(path),
+                config_snapshot or _WORKER_CONFIG
+            )
+
+    return {
+        "template": path,
+        "ok": not issues,
+        "issues": [issue._asdict() for issue in issues],
+        "duration": round(time.time() - start, 4),
+    }
+
+
+def check_files(paths, workers=None, config_file=None):
+    """ check_files yields the results of the pre-flight checks of all the
+    templates at the given paths, in order; as returned by check_file.
+
+    The templates are checked on the given number of worker processes
+    (defaulting to the number of CPUs); each of which loads the given
+    configuration file, if any.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    if workers <= 1:
+        _init_worker(config_file)
+        for path in paths:
+            yield check_file(path)
+        return
+
+    pool = multiprocessing.Pool(workers, _init_worker, (config_file,))
+    try:
+        for result in pool.imap(check_file, paths, chunksize=8):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def get_summary(results):
+    """ get_summary returns the dict between the kinds of all the issues
+    within the given results of check_files and the number of templates
+    having issues of the kind; along with the total numbers of templates.
+    """
+    summary = {"templates": 0, "failed_templates": 0, "issues": {}}
+    for result in results:
+        summary["templates"] += 1
+        if not result["ok"]:
+            summary["failed_templates"] += 1
+        for kind in set(issue["kind"] for issue in result["issues"]):
+            summary["issues"][kind] = summary["issues"].get(kind, 0) + 1
+
+    return summary
+
+
+def format_result(result):
+    """ format_result returns the human-readable text of the
+    given result returned by check_file.
+    """
+    lines = ["%s: %s" % (
+        result["template"],
+        "OK" if result["ok"] else "%d issues" % len(result["issues"])
+    )]
+    for issue in result["issues"]:
+        lines.append("    [%s] %s%s" % (
+            issue["kind"],
+            "'%s' - " % issue["resource"] if issue["resource"] else "",
+            issue["message"]
+        ))
+
+    return "\n".join(lines) + "\n"
+
+
+def _load_template(template):
+    """ _load_template is a helper function which returns the loaded data of
+    the given template; as JSON if possible, which is much faster to load,
+    or else as YAML.
+    """
+    try:
+        return json.loads(template)
+    except ValueError:
+        return yaml.load(template, Loader=_YAML_LOADER)
+
+
+def _init_worker(config_file):
+    """ _init_worker is a helper function which loads the given configuration
+    file (if any) and takes the ConfigSnapshot used by check_file.
+    """
+    global _WORKER_CONFIG
+
+    if config_file:
+        CONF(["--config-file", config_file])
+    _WORKER_CONFIG = config.snapshot()
+
+
+def _get_base_path(path):
+    """ _get_base_path is a helper function which returns the directory
+    which the files referenced by the template at the given path are
+    relative to.
+    """
+    return os.path.dirname(os.path.abspath(path))
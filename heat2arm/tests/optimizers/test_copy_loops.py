@@ -0,0 +1,150 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the CopyLoopOptimizer.
+"""
+
+import unittest
+
+from heat2arm import config
+from heat2arm import translation_engine as engine
+from heat2arm.dependency_graph import DependencyGraph
+
+
+TEMPLATE_HEADER = """
+heat_template_version: 2013-05-23
+parameters: {}
+resources:
+  net:
+    type: OS::Neutron::Net
+  subnet:
+    type: OS::Neutron::Subnet
+    properties:
+      network: {get_resource: net}
+      cidr: 10.0.0.0/24
+"""
+
+SERVER_TEMPLATE = """
+  server%(index)d:
+    type: OS::Nova::Server
+    properties:
+      image: ubuntu.12.04.LTS.x86_64
+      flavor: m1.small
+      networks: [{port: {get_resource: port%(index)d}}]
+  port%(index)d:
+    type: OS::Neutron::Port
+    properties:
+      network_id: {get_resource: net}
+      fixed_ips: [{subnet_id: {get_resource: subnet}}]
+  fip%(index)d:
+    type: OS::Neutron::FloatingIP
+    properties:
+      floating_network: public
+      port_id: {get_resource: port%(index)d}
+"""
+
+
+def make_template(count):
+    """ make_template returns a Heat template of the given number
+    of identical servers; each with its own port and floating IP.
+    """
+    return TEMPLATE_HEADER + "".join(
+        SERVER_TEMPLATE % {"index": index} for index in range(count)
+    )
+
+
+def get_instances(template_data):
+    """ get_instances returns the set of the identities of all the instances
+    of the resources of the given template; copy loops included.
+    """
+    graph = DependencyGraph(template_data)
+    return set(graph.get_identity(node) for node in graph.nodes)
+
+
+class TestCopyLoopOptimizer(unittest.TestCase):
+    """ TestCopyLoopOptimizer represents the set of tests
+    for the folding of identical resources into copy loops.
+    """
+
+    def setUp(self):
+        self._plain = config.snapshot()
+        self._config = self._plain.replace(
+            compact_copy_loops=True, copy_loop_min_resources=3
+        )
+
+    def test_fold_identical_resources(self):
+        template = make_template(4)
+        folded = engine.convert_template(template, self._config)
+
+        loops = {
+            res["type"]: res for res in folded["resources"] if "copy" in res
+        }
+        self.assertEqual(sorted(loops), [
+            "Microsoft.Compute/virtualMachines",
+            "Microsoft.Network/networkInterfaces",
+            "Microsoft.Network/publicIPAddresses",
+        ])
+        for resource in loops.values():
+            self.assertEqual(resource["copy"]["count"], 4)
+
+        # none of the folded resources remain on their own:
+        for resource in folded["resources"]:
+            self.assertTrue(
+                "copy" in resource or resource["type"] not in loops
+            )
+
+        # the variables naming each resource were inlined and dropped:
+        variables = folded["variables"]
+        for index in range(4):
+            self.assertNotIn("vmName_server%d" % index, variables)
+            self.assertNotIn("nicName_port%d" % index, variables)
+        self.assertIn(
+            ["server0", "server1", "server2", "server3"], variables.values()
+        )
+
+    def test_same_instances_and_dependencies(self):
+        template = make_template(4)
+        plain = engine.convert_template(template, self._plain)
+        folded = engine.convert_template(template, self._config)
+
+        # all the instances are still deployed under the same names, with
+        # the dependencies of each one resolving to resources of the loops:
+        self.assertEqual(get_instances(folded), get_instances(plain))
+
+        graph = DependencyGraph(folded)
+        vms = [
+            node for node in graph.nodes
+            if graph.get_identity(node)[0] == (
+                "microsoft.compute/virtualmachines")
+        ]
+        self.assertEqual(len(vms), 4)
+        for node in vms:
+            nics = [
+                graph.get_identity(dep) for dep in graph.edges[node]
+                if graph.get_identity(dep)[0] == (
+                    "microsoft.network/networkinterfaces")
+            ]
+            self.assertEqual(nics, [(
+                "microsoft.network/networkinterfaces",
+                "port%s" % graph.get_identity(node)[1][len("server"):]
+            )])
+
+    def test_too_few_resources(self):
+        folded = engine.convert_template(make_template(2), self._config)
+
+        self.assertFalse(
+            any("copy" in resource for resource in folded["resources"])
+        )
@@ -0,0 +1,155 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the SecurityGroupDeduplicationOptimizer.
+"""
+
+import unittest
+
+from heat2arm import config
+from heat2arm import expressions
+from heat2arm.optimizers import SecurityGroupDeduplicationOptimizer
+
+
+NSG_TYPE = "Microsoft.Network/networkSecurityGroups"
+NIC_TYPE = "Microsoft.Network/networkInterfaces"
+
+
+def make_group(name, ports, base_priority=100):
+    """ make_group returns the definition of the network security group named
+    after the given variable which allows inbound TCP on the given ports.
+    """
+    return {
+        "type": NSG_TYPE,
+        "name": expressions.variable(name),
+        "properties": {
+            "securityRules": [{
+                "name": "%s_rule%d" % (name, i),
+                "properties": {
+                    "protocol": "Tcp",
+                    "destinationPortRange": str(port),
+                    "access": "Allow",
+                    "direction": "Inbound",
+                    "priority": base_priority + i,
+                },
+            } for i, port in enumerate(ports)],
+        },
+    }
+
+
+def make_nic(name, group_name):
+    """ make_nic returns the definition of the network interface of the
+    given name which references the security group of the given variable.
+    """
+    name_ref = "variables('%s')" % group_name
+    return {
+        "type": NIC_TYPE,
+        "name": name,
+        "dependsOn": [
+            expressions.dependency(NSG_TYPE, name_ref),
+            expressions.dependency(NSG_TYPE, name_ref),
+        ],
+        "properties": {
+            "networkSecurityGroup": {
+                "id": expressions.resource_id(NSG_TYPE, name_ref),
+            },
+        },
+    }
+
+
+class TestSecurityGroupDeduplicationOptimizer(unittest.TestCase):
+    """ TestSecurityGroupDeduplicationOptimizer represents the set of tests
+    for the merging of security groups with identical rules.
+    """
+
+    def setUp(self):
+        self._config = config.snapshot().replace(
+            deduplicate_security_groups=True
+        )
+        self._template_data = {
+            "parameters": {},
+            "variables": {
+                "secGroupName_web": "web",
+                "secGroupName_web2": "web2",
+                "secGroupName_db": "db",
+            },
+            "resources": [
+                make_group("secGroupName_web", [80, 443]),
+                # the same rules; named and prioritized differently:
+                make_group("secGroupName_web2", [80, 443], 200),
+                make_group("secGroupName_db", [5432]),
+                make_nic("nic_web", "secGroupName_web"),
+                make_nic("nic_web2", "secGroupName_web2"),
+                make_nic("nic_db", "secGroupName_db"),
+            ],
+        }
+
+    def _optimize(self):
+        SecurityGroupDeduplicationOptimizer(
+            self._template_data, self._config
+        ).optimize()
+        return self._template_data
+
+    def test_merge_identical_groups(self):
+        template_data = self._optimize()
+
+        groups = [
+            res["name"] for res in template_data["resources"]
+            if res["type"] == NSG_TYPE
+        ]
+        self.assertEqual(groups, [
+            expressions.variable("secGroupName_web"),
+            expressions.variable("secGroupName_db"),
+        ])
+        self.assertNotIn("secGroupName_web2", template_data["variables"])
+
+    def test_references_updated(self):
+        template_data = self._optimize()
+        nics = {
+            res["name"]: res for res in template_data["resources"]
+            if res["type"] == NIC_TYPE
+        }
+
+        web_ref = "variables('secGroupName_web')"
+        for name in ("nic_web", "nic_web2"):
+            self.assertEqual(
+                nics[name]["properties"]["networkSecurityGroup"]["id"],
+                expressions.resource_id(NSG_TYPE, web_ref)
+            )
+            # the duplicated dependencies are merged as well:
+            self.assertEqual(
+                nics[name]["dependsOn"],
+                [expressions.dependency(NSG_TYPE, web_ref)]
+            )
+
+        self.assertEqual(
+            nics["nic_db"]["properties"]["networkSecurityGroup"]["id"],
+            expressions.resource_id(
+                NSG_TYPE, "variables('secGroupName_db')"
+            )
+        )
+
+    def test_different_rules_kept(self):
+        self._template_data["resources"][1] = make_group(
+            "secGroupName_web2", [443, 80]
+        )
+        template_data = self._optimize()
+
+        self.assertEqual(len([
+            res for res in template_data["resources"]
+            if res["type"] == NSG_TYPE
+        ]), 3)
+        self.assertIn("secGroupName_web2", template_data["variables"])
@@ -0,0 +1,196 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the SecurityRuleCompiler.
+"""
+
+import itertools
+import unittest
+
+from heat2arm import config
+from heat2arm.optimizers import SecurityRuleCompiler
+
+
+def make_rule(name, priority, port, source="*", protocol="Tcp",
+              access="Allow", direction="Inbound"):
+    """ make_rule returns the definition of a security rule
+    with the given properties.
+    """
+    return {
+        "name": name,
+        "properties": {
+            "protocol": protocol,
+            "sourcePortRange": "*",
+            "destinationPortRange": port,
+            "sourceAddressPrefix": source,
+            "destinationAddressPrefix": "*",
+            "access": access,
+            "priority": priority,
+            "direction": direction,
+        },
+    }
+
+
+def _parse_address(address):
+    """ _parse_address returns the integer value of the given IPv4 address. """
+    value = 0
+    for octet in address.split("."):
+        value = (value << 8) | int(octet)
+    return value
+
+
+def _matches(rule, packet):
+    """ _matches returns whether the given rule matches the given
+    (direction, protocol, port, source address) packet.
+    """
+    properties = rule["properties"]
+    direction, protocol, port, source = packet
+
+    if properties["direction"] != direction:
+        return False
+    if properties["protocol"] not in ("*", protocol):
+        return False
+
+    port_range = properties["destinationPortRange"]
+    if port_range != "*":
+        low, _, high = port_range.partition("-")
+        if not int(low) <= port <= int(high or low):
+            return False
+
+    prefix = properties["sourceAddressPrefix"]
+    if prefix != "*":
+        network, _, length = prefix.partition("/")
+        shift = 32 - int(length or 32)
+        if _parse_address(network) >> shift != _parse_address(source) >> shift:
+            return False
+
+    return True
+
+
+def get_access(rules, packet):
+    """ get_access returns the access applied by the given rules to the given
+    packet; which is that of the first matching rule by priority, if any.
+    """
+    for rule in sorted(rules, key=lambda r: r["properties"]["priority"]):
+        if _matches(rule, packet):
+            return rule["properties"]["access"]
+    return None
+
+
+# PACKETS is the list of all the packets the rules of the tests are checked
+# against; spanning all the ports and addresses they reference:
+PACKETS = list(itertools.product(
+    ["Inbound", "Outbound"],
+    ["Tcp", "Udp", "Icmp"],
+    [21, 22, 23, 24, 79, 80, 85, 90, 91, 443],
+    ["10.0.0.1", "10.0.0.5", "10.0.0.200", "10.0.1.1", "192.168.0.1"],
+))
+
+
+class TestSecurityRuleCompiler(unittest.TestCase):
+    """ TestSecurityRuleCompiler represents the set of tests
+    for the compilation of the rules of security groups.
+    """
+
+    def setUp(self):
+        self._compiler = SecurityRuleCompiler({
+            "parameters": {}, "variables": {}, "resources": [],
+        }, config.snapshot().replace(compile_security_rules=True))
+
+    def _compile(self, rules):
+        """ _compile returns the compiled rules after checking that they apply
+        the same access to all packets as the given ones.
+        """
+        compiled = self._compiler.compile_rules(rules)
+        for packet in PACKETS:
+            self.assertEqual(
+                get_access(compiled, packet), get_access(rules, packet),
+                "different access for %s" % (packet,)
+            )
+        return compiled
+
+    def test_shadowed_rules_removed(self):
+        compiled = self._compile([
+            make_rule("any", 100, "80"),
+            make_rule("subnet", 110, "80", source="10.0.0.0/24"),
+            make_rule("other", 120, "443"),
+        ])
+
+        self.assertEqual([rule["name"] for rule in compiled], ["any", "other"])
+        self.assertEqual(
+            [rule["properties"]["priority"] for rule in compiled], [100, 101]
+        )
+
+    def test_ports_merged(self):
+        compiled = self._compile([
+            make_rule("http", 100, "80"),
+            make_rule("range", 110, "81-90"),
+            make_rule("ssh", 120, "22"),
+        ])
+
+        self.assertEqual(
+            sorted(rule["properties"]["destinationPortRange"]
+                   for rule in compiled),
+            ["22", "80-90"]
+        )
+
+    def test_sibling_networks_merged(self):
+        compiled = self._compile([
+            make_rule("low", 100, "80", source="10.0.0.0/25"),
+            make_rule("high", 110, "80", source="10.0.0.128/25"),
+        ])
+
+        self.assertEqual(len(compiled), 1)
+        self.assertEqual(
+            compiled[0]["properties"]["sourceAddressPrefix"], "10.0.0.0/24"
+        )
+
+    def test_mixed_access_order_kept(self):
+        rules = [
+            make_rule("allow_ssh", 100, "22"),
+            make_rule("deny_host", 110, "23", source="10.0.0.5/32",
+                      access="Deny"),
+            make_rule("allow_telnet", 120, "23"),
+            make_rule("allow_next", 130, "24"),
+        ]
+        compiled = self._compile(rules)
+
+        # the deny must still precede the rule allowing telnet to all; which
+        # may only be merged with the following consecutive rule:
+        names = [rule["name"] for rule in compiled]
+        self.assertEqual(names, ["allow_ssh", "deny_host", "allow_telnet"])
+        self.assertEqual(
+            compiled[2]["properties"]["destinationPortRange"], "23-24"
+        )
+
+    def test_protocols_not_widened(self):
+        compiled = self._compile([
+            make_rule("tcp", 100, "80", protocol="Tcp"),
+            make_rule("udp", 110, "80", protocol="Udp"),
+        ])
+
+        self.assertEqual(
+            [rule["properties"]["protocol"] for rule in compiled],
+            ["Tcp", "Udp"]
+        )
+
+    def test_any_protocol_covers_others(self):
+        compiled = self._compile([
+            make_rule("any", 100, "80", protocol="*"),
+            make_rule("tcp", 110, "80", protocol="Tcp"),
+        ])
+
+        self.assertEqual([rule["name"] for rule in compiled], ["any"])
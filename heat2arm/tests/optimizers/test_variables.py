@@ -0,0 +1,105 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the VariableDeduplicationOptimizer.
+"""
+
+import unittest
+
+from heat2arm import config
+from heat2arm.optimizers import VariableDeduplicationOptimizer
+
+
+class TestVariableDeduplicationOptimizer(unittest.TestCase):
+    """ TestVariableDeduplicationOptimizer represents the set of tests
+    for the merging of variables holding identical values.
+    """
+
+    def setUp(self):
+        self._config = config.snapshot().replace(deduplicate_variables=True)
+
+    def _optimize(self, template_data):
+        VariableDeduplicationOptimizer(template_data, self._config).optimize()
+        return template_data
+
+    def test_merge_identical_variables(self):
+        template_data = self._optimize({
+            "parameters": {},
+            "variables": {
+                "vmSize_server1": "Standard_A1",
+                "vmSize_server0": "Standard_A1",
+                "vmSize_server2": "Standard_A2",
+            },
+            "resources": [{
+                "name": "server%d" % index,
+                "properties": {
+                    "vmSize": "[variables('vmSize_server%d')]" % index,
+                },
+            } for index in range(3)],
+        })
+
+        self.assertEqual(template_data["variables"], {
+            "vmSize_server0": "Standard_A1",
+            "vmSize_server2": "Standard_A2",
+        })
+        self.assertEqual([
+            res["properties"]["vmSize"] for res in template_data["resources"]
+        ], [
+            "[variables('vmSize_server0')]",
+            "[variables('vmSize_server0')]",
+            "[variables('vmSize_server2')]",
+        ])
+
+    def test_merge_until_no_duplicates(self):
+        # merging the names renders the references to them identical:
+        template_data = self._optimize({
+            "parameters": {},
+            "variables": {
+                "name_a": "net",
+                "name_b": "net",
+                "ref_a": "[resourceId('type', variables('name_a'))]",
+                "ref_b": "[resourceId('type', variables('name_b'))]",
+            },
+            "resources": [
+                {"id": "[variables('ref_a')]"},
+                {"id": "[variables('ref_b')]", "tag": "variables('ref_b')"},
+            ],
+        })
+
+        self.assertEqual(template_data["variables"], {
+            "name_a": "net",
+            "ref_a": "[resourceId('type', variables('name_a'))]",
+        })
+        self.assertEqual(template_data["resources"], [
+            {"id": "[variables('ref_a')]"},
+            # NOTE: plain strings are not expressions and are left as-is:
+            {"id": "[variables('ref_a')]", "tag": "variables('ref_b')"},
+        ])
+
+    def test_no_duplicates(self):
+        template_data = {
+            "parameters": {},
+            "variables": {"a": 1, "b": "1", "c": [1]},
+            "resources": [{"value": "[variables('b')]"}],
+        }
+        self._optimize(template_data)
+
+        self.assertEqual(template_data["variables"], {
+            "a": 1, "b": "1", "c": [1]
+        })
+        self.assertEqual(
+            template_data["resources"], [{"value": "[variables('b')]"}]
+        )
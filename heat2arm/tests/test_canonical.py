@@ -0,0 +1,135 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the canonicalization of ARM templates.
+"""
+
+import json
+import unittest
+
+from heat2arm import canonical
+from heat2arm import config
+from heat2arm import translation_engine as engine
+
+
+# RESOURCES are the definitions of the resources of the Heat templates of
+# the tests; which are only listed in different orders:
+RESOURCES = [
+    """
+  net:
+    type: OS::Neutron::Net""",
+    """
+  subnet:
+    type: OS::Neutron::Subnet
+    properties:
+      network: {get_resource: net}
+      cidr: 10.0.0.0/24""",
+    """
+  port:
+    type: OS::Neutron::Port
+    properties:
+      network: {get_resource: net}""",
+    """
+  server:
+    type: OS::Nova::Server
+    properties:
+      image: ubuntu.12.04.LTS.x86_64
+      flavor: m1.small
+      networks:
+        - port: {get_resource: port}""",
+    """
+  volume:
+    type: OS::Cinder::Volume
+    properties:
+      size: 10""",
+]
+
+
+def make_template(order):
+    """ make_template returns the Heat template with the
+    resources of the given indexes in RESOURCES.
+    """
+    return (
+        "heat_template_version: 2013-05-23\nparameters: {}\nresources:" +
+        "".join(RESOURCES[index] for index in order) + "\n"
+    )
+
+
+class TestCanonical(unittest.TestCase):
+    """ TestCanonical represents the set of tests for the
+    canonicalization and fingerprinting of ARM templates.
+    """
+
+    def _convert(self, order, **overrides):
+        """ _convert returns the JSON of the canonical ARM template of the
+        Heat template with the resources in the given order.
+        """
+        return json.dumps(engine.convert_template(
+            make_template(order),
+            config.snapshot().replace(canonical_output=True, **overrides)
+        ), indent=4)
+
+    def test_stable_across_resource_order(self):
+        expected = self._convert([0, 1, 2, 3, 4])
+
+        for order in ([4, 3, 2, 1, 0], [3, 0, 4, 2, 1]):
+            self.assertEqual(self._convert(order), expected)
+
+    def test_stable_across_concurrent_translation(self):
+        expected = self._convert([0, 1, 2, 3, 4])
+
+        self.assertEqual(
+            self._convert([2, 4, 0, 3, 1], translation_workers=4), expected
+        )
+
+    def test_fingerprint_stamped(self):
+        template_data = json.loads(self._convert([0, 1, 2, 3, 4]))
+
+        fingerprint = template_data["metadata"]["fingerprint"]
+        self.assertTrue(fingerprint.startswith("sha256:"))
+        self.assertEqual(canonical.get_fingerprint(template_data), fingerprint)
+        self.assertEqual(canonical.canonicalize(template_data), template_data)
+
+    def test_fingerprint_changes_with_contents(self):
+        template_data = json.loads(self._convert([0, 1, 2, 3, 4]))
+        fingerprint = template_data["metadata"]["fingerprint"]
+
+        template_data["variables"]["location"] = "North Europe"
+        self.assertNotEqual(
+            canonical.get_fingerprint(template_data), fingerprint
+        )
+
+    def test_dependency_order_ignored(self):
+        def make(depends_on, rules):
+            return {
+                "parameters": {},
+                "variables": {},
+                "resources": [{
+                    "type": "Microsoft.Network/networkSecurityGroups",
+                    "name": "group",
+                    "dependsOn": depends_on,
+                    "properties": {"securityRules": rules},
+                }],
+            }
+
+        first = canonical.get_fingerprint(make(["a", "b"], ["r1", "r2"]))
+        self.assertEqual(
+            canonical.get_fingerprint(make(["b", "a"], ["r1", "r2"])), first
+        )
+        # the order of the security rules matters; unlike dependencies:
+        self.assertNotEqual(
+            canonical.get_fingerprint(make(["a", "b"], ["r2", "r1"])), first
+        )
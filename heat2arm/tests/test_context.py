@@ -0,0 +1,82 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the staging of the changes to the Context.
+"""
+
+import unittest
+
+from heat2arm.context import Context
+
+
+class TestContextStages(unittest.TestCase):
+    """ TestContextStages represents the set of tests for the validation
+    of the stages of changes to the Context before their commit.
+    """
+
+    def setUp(self):
+        self._context = Context({})
+
+    def _add_variable(self):
+        self._context.add_variables({"added": "value"})
+
+    def _add_parameter(self):
+        self._context.add_parameters({"added": {"type": "string"}})
+
+    def test_stage_sees_own_changes(self):
+        seen = {}
+
+        def _read():
+            self._add_variable()
+            self._add_parameter()
+            seen["variables"] = self._context.get_variables()
+            seen["parameters"] = self._context.get_parameters()
+
+        stage = self._context.run_staged("origin", _read)
+
+        self.assertIsNone(stage.exception)
+        self.assertIn("added", seen["variables"])
+        self.assertIn("added", seen["parameters"])
+        self.assertNotIn("added", self._context.variables)
+        self.assertTrue(self._context.commit_stage(stage))
+        self.assertIn("added", self._context.variables)
+
+    def test_stale_variables_read(self):
+        reader = self._context.run_staged(
+            "reader", self._context.get_variables
+        )
+        writer = self._context.run_staged("writer", self._add_variable)
+
+        self.assertTrue(self._context.commit_stage(writer))
+        self.assertFalse(self._context.commit_stage(reader))
+
+    def test_stale_parameters_read(self):
+        reader = self._context.run_staged(
+            "reader", self._context.get_parameters
+        )
+        writer = self._context.run_staged("writer", self._add_parameter)
+
+        self.assertTrue(self._context.commit_stage(writer))
+        self.assertFalse(self._context.commit_stage(reader))
+
+    def test_unrelated_writes(self):
+        reader = self._context.run_staged(
+            "reader", self._context.get_variables
+        )
+        writer = self._context.run_staged("writer", self._add_parameter)
+
+        self.assertTrue(self._context.commit_stage(writer))
+        self.assertTrue(self._context.commit_stage(reader))
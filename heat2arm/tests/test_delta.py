@@ -0,0 +1,167 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the delta between ARM templates.
+"""
+
+import copy
+import unittest
+
+from heat2arm import config
+from heat2arm import delta
+
+
+VNET = "Microsoft.Network/virtualNetworks"
+NIC = "Microsoft.Network/networkInterfaces"
+VM = "Microsoft.Compute/virtualMachines"
+
+# PREVIOUS is the previously deployed template of the tests:
+PREVIOUS = {
+    "parameters": {"vmSize": {"type": "string"}},
+    "variables": {"prefix": "web", "subnet": "default"},
+    "resources": [{
+        "type": VNET,
+        "name": "vnet",
+        "properties": {"subnet": "[variables('subnet')]"},
+    }, {
+        "type": NIC,
+        "name": "nic",
+        "dependsOn": ["%s/vnet" % VNET],
+        "properties": {},
+    }, {
+        "type": VM,
+        "name": "[concat(variables('prefix'), 'vm')]",
+        "dependsOn": ["%s/nic" % NIC],
+        "properties": {"size": "[parameters('vmSize')]"},
+    }, {
+        "type": VM,
+        "name": "old",
+        "properties": {},
+    }],
+}
+
+
+def get_delta(current):
+    """ get_delta returns the TemplateDelta between PREVIOUS and the given
+    template.
+    """
+    return delta.TemplateDelta(PREVIOUS, current, config.snapshot())
+
+
+class TestTemplateDelta(unittest.TestCase):
+    """ TestTemplateDelta represents the set of tests for the detection of
+    the changes between templates and the template of only the changes.
+    """
+
+    def setUp(self):
+        self._current = copy.deepcopy(PREVIOUS)
+
+    def test_unchanged(self):
+        self.assertEqual(get_delta(self._current).get_summary(), {
+            "added": [], "modified": [], "removed": [], "unchanged": 4,
+        })
+        self.assertEqual(
+            get_delta(self._current).make_template()["resources"], []
+        )
+
+    def test_dependency_order_irrelevant(self):
+        self._current["resources"][2]["dependsOn"] = [
+            "%s/vnet" % VNET, "%s/nic" % NIC
+        ]
+        self._current["resources"][1]["dependsOn"].reverse()
+        self.assertEqual(get_delta(self._current).get_changed_indexes(), [2])
+
+    def test_added_modified_removed(self):
+        resources = self._current["resources"]
+        resources[1]["properties"] = {"primary": True}
+        del resources[3]
+        resources.append({"type": VM, "name": "new", "properties": {}})
+
+        self.assertEqual(get_delta(self._current).get_summary(), {
+            "added": ["%s/new" % VM],
+            "modified": ["%s/nic" % NIC],
+            "removed": ["%s/old" % VM],
+            "unchanged": 2,
+        })
+
+    def test_referenced_values_changed(self):
+        # changing a variable changes the name of the VM; which is a new one:
+        self._current["variables"]["prefix"] = "app"
+        # changing a parameter definition modifies the VM referencing it:
+        self._current["parameters"]["vmSize"]["defaultValue"] = "Standard_A1"
+        # changing a variable referenced by the vnet modifies it:
+        self._current["variables"]["subnet"] = "other"
+
+        summary = get_delta(self._current).get_summary()
+        self.assertEqual(summary["added"], ["%s/appvm" % VM])
+        self.assertEqual(summary["modified"], ["%s/vnet" % VNET])
+        self.assertEqual(summary["removed"], ["%s/webvm" % VM])
+
+    def test_case_insensitive_identity(self):
+        self._current["resources"][0]["type"] = VNET.lower()
+        self._current["resources"][1]["dependsOn"] = ["%s/vnet" % VNET.lower()]
+
+        # the renamed type identifies the same vnet; which is modified:
+        summary = get_delta(self._current).get_summary()
+        self.assertEqual(summary["added"], [])
+        self.assertEqual(summary["removed"], [])
+        self.assertEqual(len(summary["modified"]), 2)
+
+    def test_dependencies_on_unchanged_dropped(self):
+        self._current["resources"][2]["properties"]["zone"] = 1
+
+        template = get_delta(self._current).make_template()
+        self.assertEqual(template["resources"], [
+            dict(self._current["resources"][2], dependsOn=[])
+        ])
+        self.assertEqual(template["parameters"], PREVIOUS["parameters"])
+        self.assertEqual(template["variables"], {"prefix": "web"})
+
+    def test_dependencies_on_changed_kept(self):
+        self._current["resources"][1]["properties"]["primary"] = True
+        self._current["resources"][2]["properties"]["zone"] = 1
+        self._current["resources"][2]["dependsOn"].append(
+            "[resourceId('Microsoft.Network/publicIPAddresses', 'ip')]"
+        )
+        self._current["resources"].append({
+            "type": "Microsoft.Network/publicIPAddresses",
+            "name": "ip",
+            "properties": {},
+        })
+
+        template = get_delta(self._current).make_template()
+        self.assertEqual(
+            [res["name"] for res in template["resources"]],
+            ["nic", "[concat(variables('prefix'), 'vm')]", "ip"]
+        )
+        self.assertEqual(template["resources"][0]["dependsOn"], [])
+        self.assertEqual(template["resources"][1]["dependsOn"], [
+            "%s/nic" % NIC,
+            "[resourceId('Microsoft.Network/publicIPAddresses', 'ip')]",
+        ])
+
+    def test_get_delta(self):
+        self._current["resources"][3]["properties"]["zone"] = 1
+
+        config_snapshot = config.snapshot().replace(
+            arm_template_version="1.2.3.4"
+        )
+        template, summary = delta.get_delta(
+            PREVIOUS, self._current, config_snapshot
+        )
+        self.assertEqual(summary["modified"], ["%s/old" % VM])
+        self.assertEqual(template["contentVersion"], "1.2.3.4")
+        self.assertEqual(len(template["resources"]), 1)
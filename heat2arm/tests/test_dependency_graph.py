@@ -0,0 +1,139 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the graph of the dependencies
+    of the resources of an ARM template.
+"""
+
+import unittest
+
+from heat2arm.dependency_graph import CircularDependencyException
+from heat2arm.dependency_graph import DanglingDependencyException
+from heat2arm.dependency_graph import DependencyGraph
+
+
+def make_resource(name, depends_on=None, copy=None):
+    """ make_resource returns the data of a storage account resource
+    with the given name and dependencies.
+    """
+    resource = {
+        "type": "Microsoft.Storage/storageAccounts",
+        "name": name,
+    }
+    if depends_on is not None:
+        resource["dependsOn"] = depends_on
+    if copy is not None:
+        resource["copy"] = copy
+
+    return resource
+
+
+def make_template(*resources):
+    """ make_template returns the data of an ARM template with the given
+    resources and a single variable.
+    """
+    return {
+        "variables": {"prefix": "store"},
+        "resources": list(resources),
+    }
+
+
+def ref(name):
+    """ ref returns the 'dependsOn' entry for the storage
+    account with the given name.
+    """
+    return "Microsoft.Storage/storageAccounts/%s" % name
+
+
+class TestDependencyGraph(unittest.TestCase):
+    """ TestDependencyGraph represents the set of tests for
+    the building and reduction of the dependency graph.
+    """
+
+    def test_reduce_drops_implied_entries(self):
+        graph = DependencyGraph(make_template(
+            make_resource("a"),
+            make_resource("b", [ref("a")]),
+            make_resource("c", [ref("a"), ref("b")]),
+        ))
+
+        self.assertEqual(graph.reduce(), {
+            1: [ref("a")],
+            2: [ref("b")],
+        })
+
+    def test_reduce_keeps_first_duplicate(self):
+        graph = DependencyGraph(make_template(
+            make_resource("a"),
+            make_resource("b", [
+                "[concat('Microsoft.Storage/storageAccounts/', 'a')]",
+                ref("a"),
+                "a",
+            ]),
+        ))
+
+        self.assertEqual(
+            graph.reduce()[1],
+            ["[concat('Microsoft.Storage/storageAccounts/', 'a')]"]
+        )
+
+    def test_reduce_copy_loop(self):
+        graph = DependencyGraph(make_template(
+            make_resource("a"),
+            make_resource(
+                "[concat(variables('prefix'), copyIndex())]", [ref("a")],
+                copy={"name": "stores", "count": 2}
+            ),
+            make_resource("c", ["stores", ref("a")]),
+        ))
+
+        self.assertEqual(graph.reduce()[2], ["stores"])
+        self.assertEqual(graph.edges[(2, None)], {(1, 0), (1, 1), (0, None)})
+        self.assertEqual(graph.get_resource_dependencies()[2], {0, 1})
+
+    def test_resolves_expressions(self):
+        graph = DependencyGraph(make_template(
+            make_resource("[concat(variables('prefix'), 'a')]"),
+            make_resource("b", [
+                "[resourceId('Microsoft.Storage/storageAccounts',"
+                " concat(variables('prefix'), 'a'))]",
+            ]),
+        ))
+
+        self.assertEqual(graph.edges[(1, None)], {(0, None)})
+        self.assertEqual(graph.order[0], (0, None))
+
+    def test_dangling_dependency(self):
+        with self.assertRaises(DanglingDependencyException):
+            DependencyGraph(make_template(
+                make_resource("a"),
+                make_resource("b", [ref("missing")]),
+            ))
+
+    def test_circular_dependency(self):
+        with self.assertRaises(CircularDependencyException):
+            DependencyGraph(make_template(
+                make_resource("a", [ref("c")]),
+                make_resource("b", [ref("a")]),
+                make_resource("c", [ref("b")]),
+            ))
+
+    def test_self_dependency_ignored(self):
+        graph = DependencyGraph(make_template(
+            make_resource("a", [ref("a")]),
+        ))
+
+        self.assertEqual(graph.edges[(0, None)], set())
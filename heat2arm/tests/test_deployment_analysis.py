@@ -0,0 +1,154 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the analysis of the deployment
+    of resulting ARM templates.
+"""
+
+import unittest
+
+from heat2arm import config
+from heat2arm.deployment_analysis import DeploymentAnalysis
+from heat2arm.deployment_analysis import UNKNOWN_ORIGIN
+
+
+VNET = "Microsoft.Network/virtualNetworks"
+STORAGE = "Microsoft.Storage/storageAccounts"
+NIC = "Microsoft.Network/networkInterfaces"
+VM = "Microsoft.Compute/virtualMachines"
+
+# TIMES are the provisioning times of the resource types used in the tests:
+TIMES = {VNET: 10, STORAGE: 30, NIC: 5, VM: 60}
+
+# TEMPLATE is a template whose storage account and virtual network may be
+# provisioned concurrently; followed by the NIC and the VM:
+TEMPLATE = {
+    "resources": [{
+        "type": VNET,
+        "name": "vnet",
+    }, {
+        "type": STORAGE,
+        "name": "storage",
+    }, {
+        "type": NIC,
+        "name": "nic",
+        "dependsOn": ["%s/vnet" % VNET],
+    }, {
+        "type": VM,
+        "name": "vm",
+        "dependsOn": ["%s/nic" % NIC, "%s/storage" % STORAGE],
+    }],
+}
+
+VNET_NODE = (0, None)
+STORAGE_NODE = (1, None)
+NIC_NODE = (2, None)
+VM_NODE = (3, None)
+
+
+def make_analysis(concurrency=0, origins=None):
+    """ make_analysis returns the DeploymentAnalysis of the test template
+    with the given concurrency and dependency origins.
+    """
+    return DeploymentAnalysis(
+        TEMPLATE, dependency_origins=origins, provisioning_times=TIMES,
+        default_provisioning_time=1, concurrency=concurrency
+    )
+
+
+class TestDeploymentAnalysis(unittest.TestCase):
+    """ TestDeploymentAnalysis represents the set of tests for
+    the estimations of the deployment of templates.
+    """
+
+    def test_levels(self):
+        self.assertEqual(make_analysis().get_levels(), [
+            set([VNET_NODE, STORAGE_NODE]), set([NIC_NODE]), set([VM_NODE])
+        ])
+
+    def test_durations(self):
+        analysis = make_analysis()
+
+        self.assertEqual(analysis.get_duration(VM_NODE), 60)
+        self.assertEqual(DeploymentAnalysis(
+            {"resources": [{"type": "Unknown/type", "name": "x"}]},
+            provisioning_times={}, default_provisioning_time=7, concurrency=0
+        ).get_duration((0, None)), 7)
+
+    def test_critical_path(self):
+        # the storage account takes longer than the vnet and NIC together:
+        self.assertEqual(
+            make_analysis().get_critical_path(), [STORAGE_NODE, VM_NODE]
+        )
+
+    def test_delays(self):
+        analysis = make_analysis()
+
+        self.assertEqual(analysis.get_delay(VM_NODE, STORAGE_NODE), 15)
+        self.assertEqual(analysis.get_delay(VM_NODE, NIC_NODE), 0)
+        self.assertEqual(analysis.get_delay(NIC_NODE, VNET_NODE), 10)
+
+    def test_simulation_unlimited(self):
+        times = make_analysis().simulate()
+
+        self.assertEqual(times, {
+            VNET_NODE: (0, 10),
+            STORAGE_NODE: (0, 30),
+            NIC_NODE: (10, 15),
+            VM_NODE: (30, 90),
+        })
+
+    def test_simulation_serialized(self):
+        times = make_analysis(concurrency=1).simulate()
+
+        self.assertEqual(max(finish for _, finish in times.values()), 105)
+        intervals = sorted(times.values())
+        for (_, finish), (start, _) in zip(intervals, intervals[1:]):
+            self.assertLessEqual(finish, start)
+        self.assertEqual(times[VM_NODE], (45, 105))
+
+    def test_config_snapshot(self):
+        analysis = DeploymentAnalysis(TEMPLATE, config_snapshot=(
+            config.snapshot().replace(
+                arm_provisioning_times=TIMES, arm_deployment_concurrency=1
+            )
+        ))
+
+        self.assertEqual(analysis.get_duration(VM_NODE), 60)
+        self.assertEqual(analysis.simulate()[VM_NODE], (45, 105))
+
+    def test_report(self):
+        analysis = make_analysis(concurrency=1, origins={
+            ((VM.lower(), "vm"), (STORAGE.lower(), "storage")):
+                "VMTranslator.get_dependencies",
+        })
+        report = analysis.get_report()
+
+        self.assertEqual(report["resources"], 4)
+        self.assertEqual(report["dependencies"], 3)
+        self.assertEqual(report["depth"], 3)
+        self.assertEqual(report["width"], 2)
+        self.assertEqual(report["critical_path"]["duration"], 90)
+        self.assertEqual(report["simulation"], {
+            "concurrency": 1, "duration": 105, "peak_concurrency": 1
+        })
+        self.assertEqual(report["serialization"], [{
+            "origin": "VMTranslator.get_dependencies",
+            "dependencies": 1, "delay": 15, "critical_delay": 15,
+        }, {
+            "origin": UNKNOWN_ORIGIN,
+            "dependencies": 1, "delay": 10, "critical_delay": 0,
+        }])
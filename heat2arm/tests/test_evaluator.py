@@ -0,0 +1,101 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the StaticEvaluator.
+"""
+
+import unittest
+
+from heat2arm.evaluator import ExpressionEvaluationException
+from heat2arm.evaluator import StaticEvaluator
+
+
+class TestStaticEvaluator(unittest.TestCase):
+    """ TestStaticEvaluator represents the set of tests
+    for the static evaluation of ARM expressions.
+    """
+
+    def setUp(self):
+        self._evaluator = StaticEvaluator({
+            "vmName": "web",
+            "names": ["a", "b", "c"],
+            "prefixed": "[concat('vm-', variables('vmName'))]",
+            "settings": {"size": "Standard_A1"},
+        })
+
+    def _evaluate(self, value, copy_index=None):
+        return self._evaluator.evaluate(value, copy_index)
+
+    def test_literals(self):
+        self.assertEqual(self._evaluate("plain"), "plain")
+        self.assertEqual(self._evaluate(42), 42)
+        self.assertEqual(self._evaluate("[[escaped]"), "[escaped]")
+        self.assertEqual(self._evaluate("['it''s']"), "it's")
+        self.assertEqual(self._evaluate("[7]"), 7)
+        # unterminated expressions are plain strings:
+        self.assertEqual(self._evaluate("[unterminated"), "[unterminated")
+
+    def test_variables(self):
+        self.assertEqual(self._evaluate("[variables('vmName')]"), "web")
+        # variables referencing other variables are evaluated in turn:
+        self.assertEqual(self._evaluate("[variables('prefixed')]"), "vm-web")
+        self.assertEqual(
+            self._evaluate("[variables('settings')['size']]"), "Standard_A1"
+        )
+
+    def test_copy_index(self):
+        self.assertEqual(
+            self._evaluate("[variables('names')[copyIndex()]]", 1), "b"
+        )
+        self.assertEqual(
+            self._evaluate("[concat('vm', copyIndex(1))]", 1), "vm2"
+        )
+
+    def test_concat(self):
+        self.assertEqual(
+            self._evaluate("[concat('a', 'b', 3)]"), "ab3"
+        )
+        self.assertEqual(
+            self._evaluate("[concat(variables('names'), variables('names'))]"),
+            ["a", "b", "c", "a", "b", "c"]
+        )
+
+    def test_deployment_time_values(self):
+        self.assertEqual(
+            self._evaluate("[parameters('name')]"), "<parameters('name')>"
+        )
+        self.assertEqual(
+            self._evaluate("[resourceId('Microsoft.Network/networks',"
+                           " resourceGroup()['id'])]"),
+            "Microsoft.Network/networks/<resourceGroup().id>"
+        )
+
+    def test_nested_data(self):
+        self.assertEqual(
+            self._evaluate({"name": ["[variables('vmName')]"]}),
+            {"name": ["web"]}
+        )
+
+    def test_unevaluable_expressions(self):
+        for value in [
+                "[variables('missing')]",
+                "[reference('vm').id]",
+                "[copyIndex()]",
+                "[variables('names')[5]]",
+                "[concat('a' 'b')]",
+                "[concat('a')) ]"]:
+            with self.assertRaises(ExpressionEvaluationException):
+                self._evaluate(value)
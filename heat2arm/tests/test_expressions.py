@@ -0,0 +1,132 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the pool of the strings of a conversion.
+"""
+
+import gc
+import unittest
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from heat2arm.context import Context
+from heat2arm import expressions
+from heat2arm.parser.parsing import parse_template
+from heat2arm import translation_engine as engine
+
+
+def make_large_template(count):
+    """ make_large_template returns a template with the given number of
+    servers; each with its own port on the same network.
+    """
+    return (
+        "heat_template_version: 2013-05-23\n"
+        "parameters: {}\n"
+        "resources:\n"
+        "  net:\n"
+        "    type: OS::Neutron::Net\n"
+        "  subnet:\n"
+        "    type: OS::Neutron::Subnet\n"
+        "    properties:\n"
+        "      network: {get_resource: net}\n"
+        "      cidr: 10.0.0.0/24\n" + "".join(
+            "  server%d:\n"
+            "    type: OS::Nova::Server\n"
+            "    properties:\n"
+            "      flavor: m1.small\n"
+            "      image: ubuntu.12.04.LTS.x86_64\n"
+            "      networks: [{port: {get_resource: port%d}}]\n"
+            "  port%d:\n"
+            "    type: OS::Neutron::Port\n"
+            "    properties:\n"
+            "      network: {get_resource: net}\n" % (i, i, i)
+            for i in range(count)
+        )
+    )
+
+
+class TestStringPool(unittest.TestCase):
+    """ TestStringPool represents the set of tests for the pool of the
+    expressions and variable names of a conversion.
+    """
+
+    def test_intern(self):
+        pool = expressions.StringPool()
+        first = pool.variable("name")
+        second = pool.intern("".join(["[variables(", "'name')]"]))
+
+        self.assertIs(first, second)
+        self.assertEqual(first, expressions.variable("name"))
+        self.assertEqual(len(pool), 1)
+
+    def test_pool_per_conversion(self):
+        context = Context({})
+        nested = Context({}, parent=context)
+
+        self.assertIs(nested.strings, context.strings)
+        self.assertIsNot(Context({}).strings, context.strings)
+
+    def test_translated_expressions_shared(self):
+        template_data, _ = engine.translate_template(make_large_template(2))
+        resources = {
+            res["name"]: res for res in template_data["resources"]
+        }
+
+        first = resources["[variables('vmName_server0')]"]["dependsOn"]
+        second = resources["[variables('vmName_server1')]"]["dependsOn"]
+        shared = [dep for dep in first if dep in second]
+        self.assertTrue(shared)
+        for dep in shared:
+            self.assertIs(dep, second[second.index(dep)])
+
+    @unittest.skipIf(tracemalloc is None, "tracemalloc is unavailable")
+    def test_memory_delta(self):
+        # NOTE: the memory retained by the translated template data is
+        # compared against that of a translation whose pool interns nothing;
+        # after a first translation warming up all the lazily built caches:
+        stack = parse_template(make_large_template(200))
+
+        def _measure():
+            gc.collect()
+            tracemalloc.start()
+            try:
+                template_data = engine.translate_stack(
+                    engine.copy_stack(stack)
+                )[0]
+                gc.collect()
+                size, _ = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            self.assertTrue(template_data["resources"])
+            return size
+
+        _measure()
+        pooled = _measure()
+
+        intern = expressions.StringPool.intern
+        expressions.StringPool.intern = lambda self, string: string
+        try:
+            unpooled = _measure()
+        finally:
+            expressions.StringPool.intern = intern
+
+        print("\ninterning saved %d of %d bytes" % (
+            unpooled - pooled, unpooled
+        ))
+        self.assertLess(pooled, unpooled)
@@ -0,0 +1,193 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the splitting of ARM templates
+    into linked templates.
+"""
+
+import json
+import unittest
+
+from heat2arm import config
+from heat2arm.dependency_graph import DependencyGraph
+from heat2arm import linked_templates
+
+
+VNET = "Microsoft.Network/virtualNetworks"
+STORAGE = "Microsoft.Storage/storageAccounts"
+NIC = "Microsoft.Network/networkInterfaces"
+VM = "Microsoft.Compute/virtualMachines"
+
+
+def make_template(count):
+    """ make_template returns the data of an ARM template with a virtual
+    network and storage account shared by the given number of VMs; each
+    with their own NIC.
+    """
+    resources = [
+        {"type": VNET, "name": "vnet", "properties": {}},
+        {"type": STORAGE, "name": "storage", "properties": {}},
+    ]
+    for i in range(count):
+        resources.extend([{
+            "type": NIC,
+            "name": "nic%d" % i,
+            "dependsOn": ["%s/vnet" % VNET],
+            "properties": {"subnet": "[variables('subnetRef')]"},
+        }, {
+            "type": VM,
+            "name": "vm%d" % i,
+            "dependsOn": ["%s/nic%d" % (NIC, i), "%s/storage" % STORAGE],
+            "properties": {"size": "[parameters('vmSize')]"},
+        }])
+
+    return {
+        "parameters": {"vmSize": {"type": "string"}},
+        "variables": {"subnetRef": "[concat('vnet', '/subnet')]"},
+        "resources": resources,
+    }
+
+
+class TestTemplateSplitter(unittest.TestCase):
+    """ TestTemplateSplitter represents the set of tests for the
+    partitioning of templates into linked templates.
+    """
+
+    def _check_partitions(self, template_data, partitions):
+        """ _check_partitions checks that the given partitions hold each
+        resource exactly once and only depend on preceding partitions.
+        """
+        self.assertEqual(
+            sorted(index for part in partitions for index in part),
+            list(range(len(template_data["resources"])))
+        )
+
+        owners = {
+            index: i for i, part in enumerate(partitions) for index in part
+        }
+        graph = DependencyGraph(template_data)
+        for index, deps in graph.get_resource_dependencies().items():
+            for dep in deps:
+                self.assertLessEqual(owners[dep], owners[index])
+
+    def test_partitions_acyclic(self):
+        template_data = make_template(5)
+        partitions = linked_templates.TemplateSplitter(
+            template_data, max_resources=3
+        ).get_partitions()
+
+        self.assertGreater(len(partitions), 1)
+        self._check_partitions(template_data, partitions)
+
+    def test_resource_limit(self):
+        template_data = make_template(5)
+        partitions = linked_templates.TemplateSplitter(
+            template_data, max_resources=4
+        ).get_partitions()
+
+        self._check_partitions(template_data, partitions)
+        for partition in partitions:
+            self.assertLessEqual(len(partition), 4)
+
+    def test_config_snapshot_limits(self):
+        template_data = make_template(5)
+        config_snapshot = config.snapshot().replace(
+            linked_template_max_resources=2, arm_template_version="1.2.3.4"
+        )
+        master, linked = linked_templates.split_template(
+            template_data, config_snapshot
+        )
+
+        for template in linked.values():
+            self.assertLessEqual(len(template["resources"]), 2)
+            self.assertEqual(template["contentVersion"], "1.2.3.4")
+        self.assertEqual(master["contentVersion"], "1.2.3.4")
+
+    def test_size_limit(self):
+        template_data = make_template(4)
+        resources = template_data["resources"]
+        max_size = 3 * max(len(json.dumps(res)) for res in resources)
+        partitions = linked_templates.TemplateSplitter(
+            template_data, max_size=max_size
+        ).get_partitions()
+
+        self._check_partitions(template_data, partitions)
+        for partition in partitions:
+            self.assertLessEqual(
+                sum(len(json.dumps(resources[i])) for i in partition),
+                max_size
+            )
+
+    def test_resource_over_limits(self):
+        with self.assertRaises(linked_templates.LinkedTemplatesException):
+            linked_templates.TemplateSplitter(
+                make_template(1), max_size=10
+            ).get_partitions()
+
+    def test_cross_template_dependencies(self):
+        template_data = make_template(3)
+        master, linked = linked_templates.TemplateSplitter(
+            template_data, max_resources=2
+        ).split()
+
+        # all of the dependencies of the resources within each linked
+        # template must be satisfied within that template; the graph
+        # raising a DanglingDependencyException otherwise:
+        owners = {}
+        for name, template in linked.items():
+            DependencyGraph(template)
+            for resource in template["resources"]:
+                owners[resource["name"]] = name
+        self.assertEqual(len(owners), len(template_data["resources"]))
+
+        # while the deployments of the linked templates must transitively
+        # depend on the ones holding the dependencies of their resources:
+        graph = DependencyGraph(master)
+        indexes = {
+            deployment["name"]: index
+            for index, deployment in enumerate(master["resources"])
+        }
+        reach = {}
+        for node in graph.order:
+            reach[node[0]] = set([node[0]])
+            for dep in graph.edges[node]:
+                reach[node[0]].update(reach[dep[0]])
+
+        for resource in template_data["resources"]:
+            for entry in resource.get("dependsOn", []):
+                dep = owners[entry.rsplit("/", 1)[1]]
+                self.assertIn(
+                    indexes[dep], reach[indexes[owners[resource["name"]]]]
+                )
+
+    def test_references_kept(self):
+        master, linked = linked_templates.TemplateSplitter(
+            make_template(2), max_resources=2
+        ).split()
+
+        self.assertIn(
+            linked_templates.BASE_URI_PARAMETER, master["parameters"]
+        )
+        for name, template in linked.items():
+            text = json.dumps(template["resources"])
+            self.assertEqual(
+                "variables('subnetRef')" in text,
+                "subnetRef" in template["variables"]
+            )
+            self.assertEqual(
+                "parameters('vmSize')" in text,
+                "vmSize" in template["parameters"]
+            )
@@ -0,0 +1,141 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the translation engine.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from heat2arm import config
+from heat2arm.parser.parsing import parse_template
+from heat2arm import translation_engine as engine
+
+
+# CHILD_TEMPLATE is the provider template of the nested stacks of the tests:
+CHILD_TEMPLATE = """
+heat_template_version: 2013-05-23
+parameters:
+  flavor:
+    type: string
+  network:
+    type: string
+resources:
+  server:
+    type: OS::Nova::Server
+    properties:
+      image: ubuntu.12.04.LTS.x86_64
+      flavor: {get_param: flavor}
+      networks:
+        - port: {get_resource: port}
+  port:
+    type: OS::Neutron::Port
+    properties:
+      network: {get_param: network}
+"""
+
+# PARENT_TEMPLATE is a template with a nested stack, a ResourceGroup of
+# nested stacks of the same provider template and a ResourceGroup whose
+# nested template references the variables of the network of the template:
+PARENT_TEMPLATE = """
+heat_template_version: 2013-05-23
+parameters: {}
+resources:
+  net:
+    type: OS::Neutron::Net
+  subnet:
+    type: OS::Neutron::Subnet
+    properties:
+      network: {get_resource: net}
+      cidr: 10.0.0.0/24
+  web:
+    type: child.yaml
+    properties:
+      flavor: m1.small
+      network: {get_resource: net}
+  group:
+    type: OS::Heat::ResourceGroup
+    properties:
+      count: 2
+      resource_def:
+        type: child.yaml
+        properties:
+          flavor: m1.small
+          network: {get_resource: net}
+  ports:
+    type: OS::Heat::ResourceGroup
+    properties:
+      count: 2
+      resource_def:
+        type: OS::Neutron::Port
+        properties:
+          network: {get_resource: net}
+"""
+
+
+class TestTranslationEngine(unittest.TestCase):
+    """ TestTranslationEngine represents the set of tests for
+    the translation of templates with nested stacks.
+    """
+
+    def setUp(self):
+        self._base_path = tempfile.mkdtemp()
+        with open(os.path.join(self._base_path, "child.yaml"), "w") as f:
+            f.write(CHILD_TEMPLATE)
+
+    def tearDown(self):
+        shutil.rmtree(self._base_path)
+
+    def test_copy_stack(self):
+        heat_stack = parse_template(PARENT_TEMPLATE, self._base_path)
+        copied = engine.copy_stack(heat_stack)
+
+        self.assertEqual(sorted(copied), sorted(heat_stack))
+        for name, resource in heat_stack.items():
+            self.assertIsNot(copied[name], resource)
+        self.assertIsNot(copied["web"].stack, heat_stack["web"].stack)
+        for name, resource in heat_stack["web"].stack.items():
+            self.assertIsNot(copied["web"].stack[name], resource)
+
+        # rebinding the attributes of the copies leaves the originals be:
+        copied["web"].stack["server"].properties = {}
+        self.assertNotEqual(heat_stack["web"].stack["server"].properties, {})
+
+    def test_variants_match_conversion(self):
+        expected = engine.convert_template(
+            PARENT_TEMPLATE, base_path=self._base_path
+        )
+        results = engine.convert_template_variants(
+            PARENT_TEMPLATE, {"first": {}, "second": {}}, self._base_path
+        )
+
+        self.assertEqual(list(results), ["first", "second"])
+        for arm_template_data in results.values():
+            self.assertEqual(arm_template_data, expected)
+
+    def test_concurrent_matches_serial(self):
+        serial = engine.convert_template(
+            PARENT_TEMPLATE, config.snapshot().replace(translation_workers=1),
+            self._base_path
+        )
+        for _ in range(5):
+            self.assertEqual(engine.convert_template(
+                PARENT_TEMPLATE,
+                config.snapshot().replace(translation_workers=4),
+                self._base_path
+            ), serial)
@@ -0,0 +1,94 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the base of all the resource translators.
+"""
+
+import unittest
+
+from heat2arm.context import Context
+from heat2arm.parser.hot.resource import HeatResource
+from heat2arm.translators.base import BaseHeatARMTranslator
+from heat2arm.translators.base import memoized
+
+
+class _CountingTranslator(BaseHeatARMTranslator):
+    """ _CountingTranslator is a translator whose memoized method counts
+    the number of times it actually ran.
+    """
+
+    def __init__(self, heat_resource, context):
+        super(_CountingTranslator, self).__init__(heat_resource, context)
+        self.calls = 0
+
+    @memoized
+    def get_size(self, suffix=""):
+        """ get_size returns the size property with the given suffix. """
+        self.calls = self.calls + 1
+        return "%s%s" % (self._heat_resource.properties.get("size"), suffix)
+
+
+class TestMemoized(unittest.TestCase):
+    """ TestMemoized represents the set of tests for the caching of
+    the results of memoized translator methods.
+    """
+
+    def setUp(self):
+        self._resource = HeatResource("server", {
+            "type": "OS::Nova::Server",
+            "properties": {"size": "small"},
+        })
+        self._translator = _CountingTranslator(
+            self._resource, Context({"server": self._resource})
+        )
+
+    def test_computed_once(self):
+        self.assertEqual(self._translator.get_size(), "small")
+        self.assertEqual(self._translator.get_size(), "small")
+        self.assertEqual(self._translator.calls, 1)
+
+    def test_cached_per_arguments(self):
+        self.assertEqual(self._translator.get_size("-a"), "small-a")
+        self.assertEqual(self._translator.get_size("-b"), "small-b")
+        self.assertEqual(self._translator.get_size("-a"), "small-a")
+        self.assertEqual(self._translator.calls, 2)
+
+    def test_invalidated_on_rebind(self):
+        self.assertEqual(self._translator.get_size(), "small")
+
+        self._resource.properties = {"size": "large"}
+        self.assertEqual(self._translator.get_size(), "large")
+        self.assertEqual(self._translator.get_size(), "large")
+        self.assertEqual(self._translator.calls, 2)
+
+    def test_in_place_changes_need_invalidation(self):
+        self.assertEqual(self._translator.get_size(), "small")
+
+        self._resource.properties["size"] = "large"
+        self.assertEqual(self._translator.get_size(), "small")
+
+        self._translator.invalidate_memo()
+        self.assertEqual(self._translator.get_size(), "large")
+        self.assertEqual(self._translator.calls, 2)
+
+    def test_cache_per_translator(self):
+        other = _CountingTranslator(
+            self._resource, Context({"server": self._resource})
+        )
+
+        self._translator.get_size()
+        other.get_size()
+        self.assertEqual((self._translator.calls, other.calls), (1, 1))
@@ -0,0 +1,169 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the translation of the userdata of
+    instances into the customData of VMs.
+"""
+
+import base64
+import gzip
+import io
+import unittest
+
+from heat2arm import config
+from heat2arm.context import Context
+from heat2arm.parser.parsing import parse_template
+from heat2arm import translation_engine as engine
+from heat2arm.translators.instances import utils
+
+
+# USER_DATA is the userdata shared by the first two servers of TEMPLATE:
+USER_DATA = "#!/bin/sh\necho hello\n"
+
+TEMPLATE = """
+heat_template_version: 2013-05-23
+parameters: {}
+resources:
+  server0:
+    type: OS::Nova::Server
+    properties:
+      image: ubuntu.12.04.LTS.x86_64
+      flavor: m1.small
+      user_data: "#!/bin/sh\\necho hello\\n"
+  server1:
+    type: OS::Nova::Server
+    properties:
+      image: ubuntu.12.04.LTS.x86_64
+      flavor: m1.small
+      user_data: "#!/bin/sh\\necho hello\\n"
+  server2:
+    type: OS::Nova::Server
+    properties:
+      image: ubuntu.12.04.LTS.x86_64
+      flavor: m1.small
+      user_data: "#!/bin/sh\\necho world\\n"
+"""
+
+
+def decompress(value):
+    """ decompress returns the userdata compressed by compress_userdata. """
+    with gzip.GzipFile(
+            fileobj=io.BytesIO(base64.b64decode(value))) as source:
+        return source.read().decode("utf-8")
+
+
+class TestCustomData(unittest.TestCase):
+    """ TestCustomData represents the set of tests for the sharing and
+    compression of the customData of VMs.
+    """
+
+    def _convert(self, **overrides):
+        """ _convert returns the variables of the converted template along
+        with the list of the customData expressions of its VMs.
+        """
+        template = engine.convert_template(
+            TEMPLATE, config.snapshot().replace(**overrides)
+        )
+        return template["variables"], [
+            res["properties"]["osProfile"]["customData"]
+            for res in template["resources"]
+            if res["type"] == "Microsoft.Compute/virtualMachines"
+        ]
+
+    def _get_custom_data(self, variables):
+        return {
+            name: value for name, value in variables.items()
+            if name.startswith("customData")
+        }
+
+    def test_separate_custom_data(self):
+        variables, expressions = self._convert()
+
+        self.assertEqual(self._get_custom_data(variables), {
+            "customData_server0": USER_DATA,
+            "customData_server1": USER_DATA,
+            "customData_server2": "#!/bin/sh\necho world\n",
+        })
+        self.assertEqual(expressions, [
+            "[base64(variables('customData_server%d'))]" % i
+            for i in range(3)
+        ])
+
+    def test_shared_custom_data(self):
+        variables, expressions = self._convert(deduplicate_custom_data=True)
+
+        custom_data = self._get_custom_data(variables)
+        self.assertEqual(
+            sorted(custom_data.values()),
+            sorted([USER_DATA, "#!/bin/sh\necho world\n"])
+        )
+        self.assertEqual(expressions[0], expressions[1])
+        self.assertNotEqual(expressions[0], expressions[2])
+
+    def test_compressed_custom_data(self):
+        variables, expressions = self._convert(
+            deduplicate_custom_data=True, compress_custom_data=True
+        )
+
+        custom_data = self._get_custom_data(variables)
+        self.assertEqual(
+            sorted(decompress(value) for value in custom_data.values()),
+            sorted([USER_DATA, "#!/bin/sh\necho world\n"])
+        )
+        for expression in expressions:
+            self.assertTrue(expression.startswith("[variables('customData_"))
+
+        # the compression is deterministic:
+        self.assertEqual(self._convert(
+            deduplicate_custom_data=True, compress_custom_data=True
+        )[0], variables)
+
+    def test_rebound_properties(self):
+        stack = parse_template(TEMPLATE)
+        resource = stack["server0"]
+        translator = engine.get_resource_translator(resource, Context(stack))
+        self.assertEqual(
+            translator._get_base_variables()["customData_server0"], USER_DATA
+        )
+
+        resource.properties = dict(
+            resource.properties, user_data="#!/bin/sh\necho again\n"
+        )
+        self.assertEqual(
+            translator._get_base_variables()["customData_server0"],
+            "#!/bin/sh\necho again\n"
+        )
+
+        resource.properties = dict(resource.properties, user_data="")
+        self.assertNotIn(
+            "customData_server0", translator._get_base_variables()
+        )
+
+    def test_compress_userdata(self):
+        compressed = utils.compress_userdata(USER_DATA)
+
+        self.assertEqual(decompress(compressed), USER_DATA)
+        self.assertEqual(utils.compress_userdata(USER_DATA), compressed)
+
+    def test_userdata_digest(self):
+        self.assertEqual(
+            utils.get_userdata_digest({"a": 1, "b": [2]}),
+            utils.get_userdata_digest({"b": [2], "a": 1})
+        )
+        self.assertNotEqual(
+            utils.get_userdata_digest(USER_DATA),
+            utils.get_userdata_digest(USER_DATA + " ")
+        )
@@ -0,0 +1,123 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the factory of ARM resource fragments.
+"""
+
+import copy
+import unittest
+
+from heat2arm import config
+from heat2arm import translation_engine as engine
+from heat2arm.translators import fragments
+
+
+# TEMPLATE is a template with two ports on the same network and a server
+# whose NIC is attached to the default virtual network:
+TEMPLATE = {
+    "heat_template_version": "2013-05-23",
+    "parameters": {},
+    "resources": {
+        "net": {
+            "type": "OS::Neutron::Net",
+            "properties": {},
+        },
+        "first": {
+            "type": "OS::Neutron::Port",
+            "properties": {"network": {"get_resource": "net"}},
+        },
+        "second": {
+            "type": "OS::Neutron::Port",
+            "properties": {"network": {"get_resource": "net"}},
+        },
+        "server": {
+            "type": "OS::Nova::Server",
+            "properties": {
+                "image": "ubuntu.12.04.LTS.x86_64",
+                "flavor": "m1.small",
+            },
+        },
+    },
+}
+
+
+class TestARMFragmentFactory(unittest.TestCase):
+    """ TestARMFragmentFactory represents the set of tests for the
+    shared and stamped fragments of ARM resources.
+    """
+
+    def setUp(self):
+        self._config = config.snapshot()
+        self._factory = fragments.get_fragment_factory(self._config)
+
+    def test_storage_account_properties_shared(self):
+        properties = self._factory.storage_account_properties()
+
+        self.assertIs(self._factory.storage_account_properties(), properties)
+        self.assertIs(copy.deepcopy(properties), properties)
+        with self.assertRaises(TypeError):
+            properties["accountType"] = "Standard_GRS"
+
+    def test_ip_configurations_stamped(self):
+        first = self._factory.ip_configuration("first", "subnet")
+        second = self._factory.ip_configuration("second", "subnet")
+
+        self.assertIsNot(first, second)
+        self.assertIsNot(first["properties"], second["properties"])
+        self.assertIs(
+            first["properties"]["subnet"], second["properties"]["subnet"]
+        )
+        self.assertIsNot(
+            self._factory.subnet_reference("other"),
+            first["properties"]["subnet"]
+        )
+
+    def test_vm_fragments_stamped(self):
+        first = self._factory.os_disk("first")
+        second = self._factory.os_disk("second")
+
+        self.assertIsNot(first, second)
+        self.assertIs(first["caching"], second["caching"])
+        self.assertIs(first["createOption"], second["createOption"])
+        self.assertEqual(
+            self._factory.image_reference("p", "o", "s")["version"], "latest"
+        )
+
+    def test_translated_fragments(self):
+        template_data, _ = engine.translate_template(
+            TEMPLATE, self._config
+        )
+        by_name = {res["name"]: res for res in template_data["resources"]}
+
+        first, second = [
+            by_name["[variables('nicName_%s')]" % name]["properties"][
+                "ipConfigurations"][0]["properties"]["subnet"]
+            for name in ("first", "second")
+        ]
+        self.assertIs(first, second)
+
+        storage = by_name["[parameters('newStorageAccountName')]"]
+        self.assertIs(
+            storage["properties"],
+            self._factory.storage_account_properties()
+        )
+
+        server = by_name["[variables('vmName_server')]"]
+        self.assertEqual(len(server["dependsOn"]), 3)
+        self.assertEqual(
+            len(server["properties"]["networkProfile"]["networkInterfaces"]),
+            1
+        )
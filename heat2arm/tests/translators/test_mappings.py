@@ -0,0 +1,127 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the lookup tables of the mapping options
+    of instance translations.
+"""
+
+import unittest
+
+from heat2arm import config
+from heat2arm.translators.instances import ec2_utils
+from heat2arm.translators.instances import mappings
+from heat2arm.translators.instances import nova_utils
+
+
+class TestMappingTable(unittest.TestCase):
+    """ TestMappingTable represents the set of tests for the precedence
+    of exact names, glob patterns and regular expressions.
+    """
+
+    def setUp(self):
+        self._table = mappings.MappingTable({
+            "ubuntu.14.04.x86_64": "exact",
+            "ubuntu.*": "short glob",
+            "ubuntu.*.x86_64": "long glob",
+            "~ubuntu\\.1[0-9]\\..*": "regex",
+            "~centos": "anchored regex",
+        })
+
+    def test_exact_first(self):
+        self.assertEqual(self._table.get("ubuntu.14.04.x86_64"), "exact")
+
+    def test_longer_patterns_first(self):
+        # all the patterns match; the longest of them (the regex) wins:
+        self.assertEqual(self._table.get("ubuntu.12.04.x86_64"), "regex")
+        # only the globs match; the longer of them wins:
+        self.assertEqual(self._table.get("ubuntu.9.x86_64"), "long glob")
+        self.assertEqual(self._table.get("ubuntu.9.i386"), "short glob")
+
+    def test_full_match(self):
+        self.assertEqual(self._table.get("centos"), "anchored regex")
+        self.assertIsNone(self._table.get("centos7"))
+        self.assertIsNone(self._table.get("my.ubuntu.9"))
+        self.assertEqual(self._table.get("debian", "default"), "default")
+
+    def test_repeated_lookups(self):
+        for _ in range(2):
+            self.assertEqual(self._table.get("ubuntu.9.i386"), "short glob")
+            self.assertIsNone(self._table.get("fedora"))
+
+    def test_parsed_values(self):
+        table = mappings.MappingTable(
+            {"win*": "MicrosoftWindowsServer;WindowsServer;2012-R2"},
+            mappings.parse_image_info
+        )
+
+        self.assertEqual(table.get("win2012"), (
+            "MicrosoftWindowsServer", "WindowsServer", "2012-R2"
+        ))
+
+    def test_invalid_pattern(self):
+        with self.assertRaises(ValueError):
+            mappings.MappingTable({"~ubuntu(": "invalid"})
+
+    def test_uncombinable_patterns(self):
+        for key in ("~ubuntu(", "~(?P<release>ubuntu).*", "~(u)buntu\\1",
+                    "~(u)?(?(1)buntu|bunt)", "~(?i)ubuntu"):
+            with self.assertRaises(ValueError) as ctx:
+                mappings.MappingTable(
+                    {key: "invalid", "~centos": "valid"},
+                    option="nova_vm_image_map"
+                )
+            self.assertIn("'%s'" % key, str(ctx.exception))
+            self.assertIn('"nova_vm_image_map"', str(ctx.exception))
+
+    def test_combinable_patterns(self):
+        table = mappings.MappingTable({
+            "~(ubuntu|debian)\\.[0-9]+": "groups",
+            "~ubuntu\\\\1": "escaped backslash",
+            "win*server*": "glob",
+        })
+
+        self.assertEqual(table.get("debian.8"), "groups")
+        self.assertEqual(table.get("ubuntu\\1"), "escaped backslash")
+        self.assertEqual(table.get("win2012server-r2"), "glob")
+
+
+class TestImageMappingErrors(unittest.TestCase):
+    """ TestImageMappingErrors represents the set of tests for the errors
+    raised for images which are not mapped.
+    """
+
+    def setUp(self):
+        self._config = config.snapshot().replace(
+            nova_vm_image_map={}, ec2_vm_image_map={}
+        )
+
+    def test_nova_error_names_option(self):
+        with self.assertRaises(Exception) as ctx:
+            nova_utils.get_azure_image_info(self._config, "cirros")
+        self.assertIn('"nova_vm_image_map"', str(ctx.exception))
+
+    def test_ec2_error_names_option(self):
+        with self.assertRaises(Exception) as ctx:
+            ec2_utils.get_azure_image_info(self._config, "cirros")
+        self.assertIn('"ec2_vm_image_map"', str(ctx.exception))
+
+    def test_invalid_pattern_names_option(self):
+        snapshot = self._config.replace(
+            nova_vm_image_map={"~(u)buntu\\1": "a;b;c"}
+        )
+        with self.assertRaises(ValueError) as ctx:
+            nova_utils.get_azure_image_info(snapshot, "ubuntu")
+        self.assertIn('"nova_vm_image_map"', str(ctx.exception))
@@ -0,0 +1,162 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains tests for the solving of the Azure VM sizes of
+    instances out of a catalog of sizes.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from heat2arm import config
+from heat2arm.translators.instances import sizes
+from heat2arm.translators.instances.sizes import VMSize
+
+
+# SIZES is the catalog of the tests, from the cheapest size:
+SIZES = [
+    VMSize("A1", 1, 1792, 1, 2, 0, 0.06),
+    VMSize("D1", 1, 3584, 1, 2, 0, 0.08),
+    # D1_old costs more than D1 and has less memory; so is dropped:
+    VMSize("D1_old", 1, 2048, 1, 2, 0, 0.09),
+    VMSize("A2", 2, 3584, 2, 4, 0, 0.12),
+    # A2_old is more expensive than A2 for the same capacities:
+    VMSize("A2_old", 2, 3584, 2, 4, 0, 0.15),
+    VMSize("D2", 2, 7168, 2, 4, 500, 0.16),
+    # the sizes of unknown price come last; X1 being dropped as A1 is
+    # known to be cheaper and exceeds it:
+    VMSize("X1", 1, 1024, 1, 1, 0, None),
+    VMSize("X8", 8, 57344, 8, 32, 2000, None),
+]
+
+
+class TestSizeCatalog(unittest.TestCase):
+    """ TestSizeCatalog represents the set of tests for the pruning of the
+    catalog of sizes and for solving for the cheapest size.
+    """
+
+    def setUp(self):
+        self._catalog = sizes.SizeCatalog(list(reversed(SIZES)))
+
+    def test_pruning(self):
+        self.assertEqual(
+            [size.name for size in self._catalog.sizes],
+            ["A1", "D1", "A2", "D2", "X8"]
+        )
+
+    def test_cheapest_fit(self):
+        self.assertEqual(self._catalog.solve(1, 1024), "A1")
+        self.assertEqual(self._catalog.solve(1, 2048), "D1")
+        self.assertEqual(self._catalog.solve(1, 1024, nics=2), "A2")
+        self.assertEqual(self._catalog.solve(1, 1024, data_disks=3), "A2")
+        self.assertEqual(
+            self._catalog.solve(1, 1024, bandwidth_mbps=100), "D2"
+        )
+        self.assertEqual(self._catalog.solve(4, 1024), "X8")
+
+    def test_same_price_smallest_first(self):
+        catalog = sizes.SizeCatalog([
+            VMSize("big", 2, 4096, 1, 0, 0, 0.1),
+            VMSize("small", 1, 2048, 1, 0, 0, 0.1),
+        ])
+
+        self.assertEqual(catalog.solve(1, 1024), "small")
+        self.assertEqual(catalog.solve(1, 4096), "big")
+
+    def test_no_fit(self):
+        self.assertIsNone(self._catalog.solve(16, 1024))
+        self.assertIsNone(self._catalog.solve(1, 1024, nics=9))
+
+    def test_solved_once(self):
+        self.assertEqual(self._catalog.solve(2, 4096), "D2")
+        self._catalog.sizes = []
+        self.assertEqual(self._catalog.solve(2, 4096), "D2")
+        self.assertIsNone(self._catalog.solve(2, 4097))
+
+
+class TestSolveSize(unittest.TestCase):
+    """ TestSolveSize represents the set of tests for the loading of the
+    catalog of sizes and solving for the sizes of flavors.
+    """
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _write_catalog(self, data):
+        path = os.path.join(self._dir, "sizes.json")
+        with open(path, "w") as out:
+            out.write(json.dumps(data))
+        return path
+
+    def test_load_catalog(self):
+        catalog = sizes.load_catalog(self._write_catalog([
+            {"name": "A1", "vcpus": 1, "memory_mb": 1792, "price": 0.06},
+            {"name": "A2", "vcpus": 2, "memory_mb": 3584, "max_nics": 2},
+        ]))
+
+        self.assertEqual(catalog.sizes, [
+            VMSize("A1", 1, 1792, 1, 0, 0, 0.06),
+            VMSize("A2", 2, 3584, 2, 0, 0, None),
+        ])
+
+    def test_invalid_catalog(self):
+        for data in [{"name": "A1"}, [{"name": "A1", "vcpus": 1}]]:
+            with self.assertRaises(ValueError):
+                sizes.load_catalog(self._write_catalog(data))
+
+    def test_parse_flavor_specs(self):
+        self.assertEqual(sizes.parse_flavor_specs("2;4096"), (2, 4096, 0))
+        self.assertEqual(
+            sizes.parse_flavor_specs("2;4096;500"), (2, 4096, 500)
+        )
+        with self.assertRaises(ValueError):
+            sizes.parse_flavor_specs("2")
+
+    def test_solve_size(self):
+        config_snapshot = config.snapshot().replace(
+            vm_size_catalog=self._write_catalog([
+                {"name": "A1", "vcpus": 1, "memory_mb": 1792,
+                 "price": 0.06},
+                {"name": "A2", "vcpus": 2, "memory_mb": 3584,
+                 "max_nics": 2, "price": 0.12},
+            ]),
+            nova_flavor_specs={"small": "1;1024", "big": "4;8192"}
+        )
+
+        self.assertEqual(sizes.solve_size(
+            config_snapshot, "nova_flavor_specs", "small"
+        ), "A1")
+        self.assertEqual(sizes.solve_size(
+            config_snapshot, "nova_flavor_specs", "small", nics=2
+        ), "A2")
+        self.assertIsNone(sizes.solve_size(
+            config_snapshot, "nova_flavor_specs", "big"
+        ))
+        self.assertIsNone(sizes.solve_size(
+            config_snapshot, "nova_flavor_specs", "unknown"
+        ))
+
+    def test_no_catalog(self):
+        self.assertIsNone(sizes.solve_size(
+            config.snapshot().replace(vm_size_catalog=None),
+            "nova_flavor_specs", "m1.small"
+        ))
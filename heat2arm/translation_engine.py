@@ -18,17 +18,25 @@
 """
 
 import collections
+import copy
 import json
 import jsonschema
 import logging
 import requests
+from multiprocessing.pool import ThreadPool
 
-from heat2arm.config import CONF
+from heat2arm import canonical
+from heat2arm import optimizers
+from heat2arm import config
 from heat2arm.context import Context
+from heat2arm.parser.cache import StackCache
+from heat2arm.parser.common.diagnostics import collect
+from heat2arm.parser.hot.nested import NestedStackResource
 from heat2arm.parser.parsing import parse_template
 from heat2arm.translators import autoscaling
 from heat2arm.translators import instances
 from heat2arm.translators import networking
+from heat2arm.translators import stacks
 from heat2arm.translators import storage
 
 
@@ -58,15 +66,31 @@ RESOURCE_TRANSLATORS = [
     storage.EBSVolumeAttachmentARMTranslator,
     autoscaling.AWSAutoScalingGroupARMTranslator,
     autoscaling.AWSScalingPolicyARMTranslator,
-    autoscaling.AWSLaunchConfigurationARMTranslator
+    autoscaling.AWSLaunchConfigurationARMTranslator,
+    stacks.NestedStackARMTranslator
+]
+
+# TEMPLATE_OPTIMIZERS is the list of all the optimizer classes to be applied
+# in order over the resulting template data following the translation.
+# NOTE: security groups are deduplicated after their rules are compiled so
+# as to have equivalent sets of rules be considered identical, and variables
+# are deduplicated and dependencies reduced before folding copy loops so
+# as to have resources referencing identical variables or having identical
+# reduced dependencies be considered identical.
+TEMPLATE_OPTIMIZERS = [
+    optimizers.SecurityRuleCompiler,
+    optimizers.SecurityGroupDeduplicationOptimizer,
+    optimizers.VariableDeduplicationOptimizer,
+    optimizers.DependencyReductionOptimizer,
+    optimizers.CopyLoopOptimizer,
 ]
 
 
-def validate_template_data(template_data):
+def validate_template_data(template_data, schema_url):
     """ validate_template_data validates the given template against the ARM
     schema obtained through calling get_arm_schema.
     """
-    schema = get_arm_schema()
+    schema = get_arm_schema(schema_url)
     jsonschema.validate(template_data, schema)
 
 
@@ -75,6 +99,11 @@ def get_resource_translator(heat_resource, context):
     finds the appropriate one for the given heat resource type or logs a
     warning message if no translator is available.
     """
+    # NOTE: nested stacks whose type is a provider template
+    # are all translated by the same translator:
+    if isinstance(heat_resource, NestedStackResource):
+        return stacks.NestedStackARMTranslator(heat_resource, context)
+
     res_trans = None
     for trans in RESOURCE_TRANSLATORS:
         # TODO
@@ -90,9 +119,44 @@ def get_resource_translator(heat_resource, context):
         )
 
 
-def get_arm_schema():
-    """ get_arm_schema fetches the ARM schema from its default URL. """
-    response = requests.get(CONF.arm_schema_url)
+def get_resource_translators(heat_resources, context):
+    """ get_resource_translators returns the list of the translators of all
+    the given heat resources which have one within the given Context.
+
+    When collecting errors, the resources which reference failed ones are
+    skipped; and the ones whose translators cannot be created are failed.
+    """
+    diagnostics = context.diagnostics
+    if diagnostics is not None:
+        heat_resources = diagnostics.skip_dependents(list(heat_resources))
+
+    translators = []
+    for heat_resource in heat_resources:
+        with collect(diagnostics, "translate", heat_resource.name):
+            res_trans = get_resource_translator(heat_resource, context)
+            if res_trans:
+                translators.append(res_trans)
+
+    return translators
+
+
+def optimize_template_data(template_data, config_snapshot, diagnostics=None):
+    """ optimize_template_data runs all the template optimizers enabled within
+    the given ConfigSnapshot over the given template data.
+
+    If Diagnostics are given, the errors of the optimizers are recorded to
+    them and the failed optimizers skipped; rather than the first raised.
+    """
+    for opt in TEMPLATE_OPTIMIZERS:
+        with collect(diagnostics, "optimization"):
+            optimizer = opt(template_data, config_snapshot)
+            if optimizer.is_enabled():
+                optimizer.optimize()
+
+
+def get_arm_schema(schema_url):
+    """ get_arm_schema fetches the ARM schema from the given URL. """
+    response = requests.get(schema_url)
     response.raise_for_status()
     return json.loads(response.text)
 
@@ -101,49 +165,454 @@ def get_arm_template(resources, context):
     """ get_arm_template takes a list of resources and returns a dict which is
     directly renderable into the JSON of an ARM template.
     """
-    # run each resource translator:
-    for resource in resources:
-        resource.translate()
+    run_translators(resources, context)
 
-    # also, let all the resource translators apply any changes
-    # to the context they require:
-    remembs = []
-    for resource in resources:
-        try:
-            resource.update_context()
-        except:
-            remembs.append(resource)
+    template_data = context.get_template_data()
+    optimize_template_data(
+        template_data, context.config, context.diagnostics
+    )
 
-    for rem in remembs:
-        rem.update_context()
+    return make_arm_template(template_data, context.config)
 
-    template_data = context.get_template_data()
 
+def make_arm_template(template_data, config_snapshot):
+    """ make_arm_template returns the dict which is directly renderable into
+    the JSON of an ARM template with the given template data.
+    """
     return collections.OrderedDict([
-        ("contentVersion", CONF.arm_template_version),
-        ("$schema", CONF.arm_schema_url),
+        ("contentVersion", config_snapshot.arm_template_version),
+        ("$schema", config_snapshot.arm_schema_url),
         ("parameters", template_data["parameters"]),
         ("variables", template_data["variables"]),
         ("resources", template_data["resources"])
     ])
 
 
-def convert_template(heat_template_data):
+def run_translators(resources, context):
+    """ run_translators runs the translation of all the given resource
+    translators; followed by their updates of the given context.
+    """
+    if context.diagnostics is not None:
+        run_translators_collecting(resources, context)
+        return
+
+    workers = context.config.translation_workers
+    if workers > 1:
+        # run each resource translator concurrently; then let them all apply
+        # any changes to the context they require, again concurrently:
+        failed = run_concurrently(context, resources, "translate", workers)
+        if failed:
+            raise failed[0][1]
+
+        remembs = [
+            resource for resource, _ in run_concurrently(
+                context, resources, "update_context", workers
+            )
+        ]
+    else:
+        # run each resource translator:
+        # NOTE: the context is told which translator method is being run so
+        # as to attribute the dependencies declared in the meantime to it:
+        for resource in resources:
+            context.set_origin(get_origin(resource, "translate"))
+            resource.translate()
+
+        # also, let all the resource translators apply any changes
+        # to the context they require:
+        remembs = []
+        for resource in resources:
+            context.set_origin(get_origin(resource, "update_context"))
+            try:
+                resource.update_context()
+            except:
+                remembs.append(resource)
+
+    for rem in remembs:
+        context.set_origin(get_origin(rem, "update_context"))
+        rem.invalidate_memo()
+        rem.update_context()
+
+
+def get_origin(resource, method):
+    """ get_origin returns the origin which the dependencies declared by the
+    given method of the given resource translator are attributed to.
+    """
+    if method == "translate":
+        return resource.get_dependencies_origin()
+
+    return resource.get_origin(method)
+
+
+def run_concurrently(context, resources, method, workers):
+    """ run_concurrently runs the given method of all the given resource
+    translators on the given number of threads; with the changes each makes
+    to the context being committed in the order of the translators. It
+    returns the list of the (translator, exception) pairs of all the
+    translators whose method failed.
+
+    NOTE: the methods whose changes cannot be committed as they relied on
+    parts of the context which preceding translators have changed are run
+    again over the updated context, so the result is the same as running
+    them one by one; save for the changes made by the failed methods,
+    which are all discarded.
+    """
+    stages = run_staged(context, resources, method, workers)
+
+    failed = []
+    for resource, stage in zip(resources, stages):
+        if stage.exception is None and context.commit_stage(stage):
+            continue
+
+        LOG.debug("Running '%s' again over the updated context.",
+                  get_origin(resource, method))
+        resource.invalidate_memo()
+        stage = context.run_staged(stage.origin, getattr(resource, method))
+        if stage.exception is None:
+            context.commit_stage(stage)
+        else:
+            failed.append((resource, stage.exception))
+
+    return failed
+
+
+def run_staged(context, resources, method, workers):
+    """ run_staged runs the given method of all the given resource translators
+    staged against the given context on the given number of threads;
+    returning the list of their stages, which are yet to be committed.
+    """
+    if workers <= 1:
+        return [
+            context.run_staged(
+                get_origin(resource, method), getattr(resource, method)
+            ) for resource in resources
+        ]
+
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(
+            lambda resource: context.run_staged(
+                get_origin(resource, method), getattr(resource, method)
+            ), resources
+        )
+    finally:
+        pool.close()
+        pool.join()
+
+
+def run_translators_collecting(resources, context):
+    """ run_translators_collecting runs the translation of all the given
+    resource translators followed by their updates of the given context;
+    recording the errors of any of them to the Diagnostics of the context
+    rather than raising them.
+
+    The changes made by the failed methods are discarded and the translators
+    of the resources which reference failed ones are skipped altogether; so
+    that the resulting template lacks only the failed and skipped resources.
+
+    NOTE: as with run_translators, the updates which fail are only recorded
+    if they fail again once all the others were applied. The resources which
+    were translated before their update failed are kept.
+    """
+    diagnostics = context.diagnostics
+    workers = context.config.translation_workers
+
+    for method in ("translate", "update_context"):
+        resources = [
+            resource for resource in resources
+            if not diagnostics.is_excluded(resource.heat_resource.name)
+        ]
+        stages = run_staged(context, resources, method, workers)
+
+        retries = []
+        for resource, stage in zip(resources, stages):
+            if stage.exception is None:
+                continue
+            if method == "update_context":
+                retries.append(resource)
+            else:
+                diagnostics.record(
+                    method, stage.exception, resource.heat_resource.name
+                )
+        diagnostics.skip_dependents(
+            [resource.heat_resource for resource in resources]
+        )
+
+        for resource, stage in zip(resources, stages):
+            if resource in retries or diagnostics.is_excluded(
+                    resource.heat_resource.name):
+                continue
+            if not context.commit_stage(stage):
+                _run_again(resource, method, context)
+
+        for resource in retries:
+            _run_again(resource, method, context)
+
+
+def _run_again(resource, method, context):
+    """ _run_again is a helper function which runs the given method of the
+    given translator staged against the current state of the given context;
+    committing its changes or recording its error to the Diagnostics of the
+    context if it fails.
+    """
+    resource.invalidate_memo()
+    stage = context.run_staged(
+        get_origin(resource, method), getattr(resource, method)
+    )
+    if stage.exception is None:
+        context.commit_stage(stage)
+    else:
+        context.diagnostics.record(
+            method, stage.exception, resource.heat_resource.name
+        )
+
+
+def get_stack_cache(config_snapshot):
+    """ get_stack_cache returns the StackCache of parsed stacks
+    configured by the given ConfigSnapshot, if any.
+    """
+    if not config_snapshot.parsed_stack_cache_dir:
+        return None
+
+    return StackCache(config_snapshot.parsed_stack_cache_dir)
+
+
+def translate_template(heat_template_data, config_snapshot=None,
+                       base_path=None, diagnostics=None):
+    """ translate_template takes a heat template and translates it into an ARM
+    template; returning it along with the Context of the translation. Any
+    provider templates are looked up relative to the given base path.
+
+    If Diagnostics are given, all the errors of the parsing and translation
+    of the resources are recorded to them rather than the first one raised.
+    """
+    if config_snapshot is None:
+        config_snapshot = config.snapshot()
+
+    return translate_stack(
+        parse_template(
+            heat_template_data, base_path, diagnostics,
+            get_stack_cache(config_snapshot)
+        ),
+        config_snapshot, diagnostics
+    )
+
+
+def translate_stack(heat_stack, config_snapshot=None, diagnostics=None):
+    """ translate_stack takes the dict of parsed heat resources of a template
+    and translates it into an ARM template with the given ConfigSnapshot
+    (defaulting to a snapshot of the current configuration); returning it
+    along with the Context of the translation.
+
+    If Diagnostics are given, all the errors of the translation are
+    recorded to them rather than the first one raised.
+    """
+    context = Context(heat_stack, config_snapshot, diagnostics=diagnostics)
+
+    arm_template_data = translate_resources(heat_stack.values(), context)
+
+    return arm_template_data, context
+
+
+def translate_resources(heat_resources, context):
+    """ translate_resources translates the given heat resources into an ARM
+    template within the given Context; translating the templates of all the
+    nested stacks amongst them beforehand.
+    """
+    translate_nested_stacks(heat_resources, context)
+
+    return get_arm_template(
+        get_resource_translators(heat_resources, context), context
+    )
+
+
+def translate_nested_stacks(heat_resources, context):
+    """ translate_nested_stacks translates the templates of all the distinct
+    nested stacks amongst the given heat resources into the given Context;
+    concurrently if so configured.
+
+    NOTE: nested stacks with the same template and properties (ex: all the
+    members of a ResourceGroup) are only ever translated once.
+    """
+    diagnostics = context.diagnostics
+    if diagnostics is not None:
+        heat_resources = diagnostics.skip_dependents(list(heat_resources))
+
+    nested = collections.OrderedDict()
+    for resource in heat_resources:
+        if isinstance(resource, NestedStackResource) and (
+                resource.key not in context.nested_templates):
+            nested.setdefault(resource.key, resource)
+
+    if not nested:
+        return
+
+    LOG.info("Translating %d distinct nested stacks.", len(nested))
+
+    def _translate(resource):
+        """ _translate returns the translation of the nested stack of the
+        given resource; or None if it failed and errors are collected.
+        """
+        with collect(diagnostics, "translate", resource.name):
+            return translate_nested_stack(
+                resource.stack, context,
+                diagnostics.nested(resource.name)
+                if diagnostics is not None else None
+            )
+
+    workers = min(context.config.translation_workers, len(nested))
+    if workers > 1:
+        pool = ThreadPool(workers)
+        try:
+            results = pool.map(_translate, nested.values())
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_translate(resource) for resource in nested.values()]
+
+    context.nested_templates.update(
+        (key, result) for key, result in zip(nested.keys(), results)
+        if result is not None
+    )
+
+
+def copy_stack(heat_stack, copies=None):
+    """ copy_stack returns a dict of shallow copies of the given parsed heat
+    resources; with the stacks of any nested stacks amongst them being copied
+    recursively. Stacks which are shared between several nested stacks
+    remain shared between the copies of the latter.
+    """
+    if copies is None:
+        copies = {}
+    if id(heat_stack) in copies:
+        return copies[id(heat_stack)]
+
+    result = {}
+    copies[id(heat_stack)] = result
+    for name, resource in heat_stack.items():
+        result[name] = copy.copy(resource)
+        if isinstance(resource, NestedStackResource):
+            result[name].stack = copy_stack(resource.stack, copies)
+
+    return result
+
+
+def translate_nested_stack(heat_stack, parent_context, diagnostics=None):
+    """ translate_nested_stack translates the given dict of the parsed heat
+    resources of a nested stack into an ARM template within a Context nested
+    within the given one; returning it along with the list of 'dependsOn'
+    entries which were lifted out of it. The errors of the translation are
+    recorded to the given Diagnostics of the nested stack, if any.
+
+    The resources of the nested stack may reference any of the resources of
+    the stack they are nested within; but only the former get translated.
+    """
+    # NOTE: translators may rebind the attributes of the resources they
+    # are given; and nested stacks may be shared between several templates:
+    heat_stack = copy_stack(heat_stack)
+    stack = dict(parent_context.heat_resource_stack)
+    stack.update(heat_stack)
+
+    # NOTE: the resources of nested templates are never folded into copy
+    # loops, as their names all end up being suffixed through expressions:
+    context = Context(
+        stack, parent_context.config.replace(compact_copy_loops=False),
+        parent=parent_context, diagnostics=diagnostics
+    )
+
+    translate_nested_stacks(heat_stack.values(), context)
+    run_translators(
+        get_resource_translators(heat_stack.values(), context), context
+    )
+
+    template_data = context.get_template_data()
+    dependencies = stacks.isolate_nested_template(template_data)
+    optimize_template_data(template_data, context.config, diagnostics)
+
+    return make_arm_template(template_data, context.config), dependencies
+
+
+def convert_template(heat_template_data, config_snapshot=None,
+                     base_path=None, diagnostics=None):
     """ convert_template takes a heat template and converts it into an ARM
-    template.
+    template with the given ConfigSnapshot (defaulting to a snapshot of the
+    configuration taken beforehand). Any provider templates are looked up
+    relative to the given base path.
+
+    If Diagnostics are given, all the errors of the conversion are recorded
+    to them rather than the first one raised; with the template lacking all
+    the resources which failed, or None if the template could not be parsed.
     """
-    heat_stack = parse_template(heat_template_data)
+    if config_snapshot is None:
+        config_snapshot = config.snapshot()
+
+    heat_stack = None
+    with collect(diagnostics, "parsing"):
+        heat_stack = parse_template(
+            heat_template_data, base_path, diagnostics,
+            get_stack_cache(config_snapshot)
+        )
+    if heat_stack is None:
+        return None
 
-    context = Context(heat_stack)
+    arm_template_data, _ = translate_stack(
+        heat_stack, config_snapshot, diagnostics
+    )
 
-    arm_resources = []
-    for heat_resource in heat_stack.values():
-        res_trans = get_resource_translator(heat_resource, context)
-        if res_trans:
-            arm_resources.append(res_trans)
+    if config_snapshot.validate_arm_template_data:
+        with collect(diagnostics, "validation"):
+            validate_template_data(
+                arm_template_data, config_snapshot.arm_schema_url
+            )
 
-    arm_template_data = get_arm_template(arm_resources, context)
-    if CONF.validate_arm_template_data:
-        validate_template_data(arm_template_data)
+    if config_snapshot.canonical_output:
+        arm_template_data = canonical.canonicalize(arm_template_data)
 
     return arm_template_data
+
+
+def convert_template_variants(heat_template_data, variants, base_path=None):
+    """ convert_template_variants takes a heat template and converts it into
+    an ARM template for each of the given configuration variants; returning
+    the ordered dict between the names of the variants and their templates.
+
+    The variants are given as a dict between their names and the dicts of
+    the configuration options to be overridden for them. The template is only
+    parsed once, with the parsed resources being shared between all variants.
+    Any provider templates are looked up relative to the given base path.
+
+    NOTE: only options used during the translation may be overridden; as the
+    parsing of the template happens once, ahead of any overrides.
+    """
+    base = config.snapshot()
+    heat_stack = parse_template(
+        heat_template_data, base_path, cache=get_stack_cache(base)
+    )
+
+    results = collections.OrderedDict()
+    for name, overrides in variants.items():
+        try:
+            config_snapshot = base.replace(**overrides)
+        except ValueError as ex:
+            raise ValueError("Variant '%s': %s" % (name, ex))
+
+        LOG.info("Converting template for variant '%s'.", name)
+
+        # NOTE: translators may rebind the attributes of the resources
+        # they are given (ex: LaunchConfiguration's properties); so each
+        # variant is given copies of the parsed resources:
+        arm_template_data, _ = translate_stack(
+            copy_stack(heat_stack), config_snapshot
+        )
+
+        if config_snapshot.validate_arm_template_data:
+            validate_template_data(
+                arm_template_data, config_snapshot.arm_schema_url
+            )
+
+        if config_snapshot.canonical_output:
+            arm_template_data = canonical.canonicalize(arm_template_data)
+
+        results[name] = arm_template_data
+
+    return results
@@ -19,8 +19,7 @@
 
 import logging
 
-from heat2arm.config import CONF
-from heat2arm.translators.base import BaseHeatARMTranslator
+from heat2arm.translators.base import BaseHeatARMTranslator, memoized
 from heat2arm.translators.autoscaling import exceptions
 from heat2arm.translators.autoscaling import utils as autoscale_utils
 from heat2arm.translators.autoscaling import constants as autoscale_constants
@@ -86,7 +85,7 @@ class AWSAutoScalingGroupARMTranslator(BaseHeatARMTranslator):
                 self._heat_resource_name
             ),
             # NOTE: autoscaleSettings specifically require this API version:
-            "apiVersion": CONF.arm_autoscale_settings_api_version,
+            "apiVersion": self._config.arm_autoscale_settings_api_version,
             "type": self.arm_resource_type,
             "location": "[variables('location')]",
             # "tags": {},    # NOTE
@@ -112,20 +111,20 @@ class AWSAutoScalingGroupARMTranslator(BaseHeatARMTranslator):
         # add an availabilitySet especially for the instance which is the
         # target of this AutoScalingGroup, if required:
         if self._requires_own_avail_set:
-            # first; check whether the availability set already exists:
-            if (self._required_avail_set_name in
-                    self._context.availability_set_names):
+            # first; register the availability set, checking whether
+            # it already existed:
+            if not self._context.register_availability_set(
+                    self._required_avail_set_name):
                 # if so; return gracefully here:
                 return
             else:
-                # first; add the availabilitySet variables and resource,
-                # and register it to the list of availability sets:
+                # first; add the availabilitySet variables and resource:
                 self._context.add_variables({
                     "availabilitySetName_%s" % self._required_avail_set_name:
                         "availabilitySet_%s" % self._required_avail_set_name
                 })
                 self._context.add_resource({
-                    "apiVersion": CONF.arm_api_version,
+                    "apiVersion": self._config.arm_api_version,
                     "type": "Microsoft.Compute/availabilitySets",
                     "name": "[variables('availabilitySetName_%s')]" % (
                         self._required_avail_set_name
@@ -135,9 +134,6 @@ class AWSAutoScalingGroupARMTranslator(BaseHeatARMTranslator):
                         "platformFaultDomainCount": "2"
                     }
                 })
-                self._context.availability_set_names.append(
-                    self._required_avail_set_name
-                )
 
                 # then; also add it as a dependency and reference to the
                 # target instance itself:
@@ -162,6 +158,7 @@ class AWSAutoScalingGroupARMTranslator(BaseHeatARMTranslator):
                         )
                 }
 
+    @memoized
     def _get_target(self):
         """ _get_target returns the URI of the resource the autoscalingSettings
         should be applied to. The target is always an autoscalingSet which is
@@ -328,10 +325,17 @@ class AWSAutoScalingGroupARMTranslator(BaseHeatARMTranslator):
                 self._heat_resource_name
             )
 
-            rules = CONF.default_autoscaleSettings_rules
-            # add the appropriate target to the defaults and retun them:
-            for rule in rules:
+            # return copies of the defaults with the appropriate target:
+            # NOTE: the defaults themselves are read-only and shared
+            # between all the AutoScalingGroups being translated:
+            rules = []
+            for default in self._config.default_autoscaleSettings_rules:
+                rule = {
+                    key: dict(value) if isinstance(value, dict) else value
+                    for key, value in default.items()
+                }
                 rule["metricTrigger"]["metricResourceUri"] = self._get_target()
+                rules.append(rule)
             return rules
 
         # else; return all the translations for the given policies:
@@ -396,7 +400,7 @@ class AWSAutoScalingGroupARMTranslator(BaseHeatARMTranslator):
         if scale_value > 0:
             rule["metricTrigger"].update({
                 "operator": "GreaterThan",
-                "threshold": CONF.autoscaling_max_cpu_threshold
+                "threshold": self._config.autoscaling_max_cpu_threshold
             })
             rule["scaleAction"].update({
                 "direction": "Increase",
@@ -405,7 +409,7 @@ class AWSAutoScalingGroupARMTranslator(BaseHeatARMTranslator):
         else:
             rule["metricTrigger"].update({
                 "operator": "LessThan",
-                "threshold": CONF.autoscaling_min_cpu_threshold
+                "threshold": self._config.autoscaling_min_cpu_threshold
             })
             rule["scaleAction"].update({
                 "direction": "Decrease",
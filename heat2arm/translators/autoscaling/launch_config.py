@@ -17,8 +17,7 @@
     This module contains the definition of the AWS LaunchConfig translator.
 """
 
-import copy
-
+from heat2arm.parser.common.overlay import OverlayDict
 from heat2arm.translators.autoscaling import exceptions
 from heat2arm.translators.instances.ec2_instance import (
     EC2InstanceARMTranslator
@@ -34,6 +33,9 @@ class AWSLaunchConfigurationARMTranslator(EC2InstanceARMTranslator):
     """
     heat_resource_type = "AWS::AutoScaling::LaunchConfiguration"
 
+    # NOTE: the image and flavor may be those of the backing Instance:
+    required_properties = ()
+
     def __init__(self, heat_resource, context):
         """ Considering that AWS LaunchConfigurations may have an 'InstanceId'
         field specified which will act as a 'base' for all the settings of the
@@ -60,11 +62,11 @@ class AWSLaunchConfigurationARMTranslator(EC2InstanceARMTranslator):
             # TODO(aznashwan): account for BlockStorageProfile not being
             # overriden after it gets implemented in EC2InstanceARMTranslator.
 
-            # then, we must copy the Instance's properties and apply the diffs
-            # of the LaunchConfig's properties:
-            instance_props = copy.deepcopy(self._backing_instance.properties)
-            instance_props.update(heat_resource.properties)
-            heat_resource.properties = instance_props
+            # then, we must layer the diffs of the LaunchConfig's properties
+            # over the Instance's; which are thus shared instead of copied:
+            heat_resource.properties = OverlayDict(
+                self._backing_instance.properties, heat_resource.properties
+            )
 
         # lastly; go ahead and run the EC2InstanceARMTranslator's init:
         super(AWSLaunchConfigurationARMTranslator, self).__init__(
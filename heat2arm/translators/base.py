@@ -17,8 +17,33 @@
     Defines the base class for all the heat to ARM translators.
 """
 
+import functools
 import logging
 
+from heat2arm.translators import fragments
+
+
+def memoized(method):
+    """ memoized is a decorator for the helper methods of translators which
+    derive a fact about the translated resource from its properties and the
+    context. The result is cached on the translator for the given arguments;
+    so it is computed once for both the translate and update_context passes.
+
+    NOTE: the cache is dropped whenever the properties of the Heat resource
+    are rebound; methods which alter them in place must call invalidate_memo.
+    The arguments of memoized methods must all be hashable.
+    """
+    @functools.wraps(method)
+    def _memoized(self, *args):
+        """ _memoized returns the cached result of the method. """
+        memo = self._get_memo()
+        key = (method, args)
+        if key not in memo:
+            memo[key] = method(self, *args)
+        return memo[key]
+
+    return _memoized
+
 
 class BaseHeatARMTranslator(object):
     """ BaseHeatARMTranslator is the base class for all heat to ARM translators
@@ -30,18 +55,73 @@ class BaseHeatARMTranslator(object):
     heat_resource_type = None
     arm_resource_type = None
 
+    # required_properties is the tuple of the names of the properties of the
+    # heat resource which its translation cannot do without:
+    required_properties = ()
+
+    @classmethod
+    def check_resource(cls, heat_resource, config_snapshot):
+        """ check_resource returns the list of the (kind, message) pairs of
+        all the issues found with the given heat resource which would have its
+        translation within the given ConfigSnapshot fail; without translating
+        it (ex: a missing required property).
+        """
+        return [
+            ("missing_field", "'%s' has no '%s' property." % (
+                heat_resource.name, field
+            ))
+            for field in cls.required_properties
+            if field not in heat_resource.properties
+        ]
+
     def __init__(self, heat_resource, context):
         self._heat_resource = heat_resource
         self._heat_resource_name = self._heat_resource.name
         self._context = context
+        self._config = context.config
+        self._strings = context.strings
+        self._fragments = fragments.get_fragment_factory(self._config)
         self._logger = logging.getLogger("__heat2arm__.%s" % (self,))
 
+        # _memo is the dict of the results of the memoized methods, which
+        # were derived from the properties _memo_properties:
+        self._memo = {}
+        self._memo_properties = self._heat_resource.properties
+
     def __str__(self):
         """ __str__ returns a formatted string containing the translator's
         name and the resource assigned to the translator.
         """
         return "%s(%s)" % (self.__class__.__name__, self._heat_resource.name)
 
+    @property
+    def heat_resource(self):
+        """ heat_resource is the Heat resource being translated. """
+        return self._heat_resource
+
+    def get_origin(self, method):
+        """ get_origin returns the "<class>.<method>" name of the given method
+        of the translator after the class which actually defines it.
+        """
+        for cls in type(self).__mro__:
+            if method in vars(cls):
+                return "%s.%s" % (cls.__name__, method)
+
+        return "%s.%s" % (self.__class__.__name__, method)
+
+    def get_dependencies_origin(self):
+        """ get_dependencies_origin returns the name of the method which the
+        dependencies of the resources added by translate are attributed to.
+
+        NOTE: translators which do not override get_dependencies declare
+        the dependencies of their resources within get_resource_data.
+        """
+        origin = self.get_origin("get_dependencies")
+        if origin == "BaseHeatARMTranslator.get_dependencies":
+            return self.get_origin("get_resource_data")
+
+        return origin
+
     def get_parameters(self):
         """ get_parameters returns the dict of ARM template parameters
         associated with the Heat template's resource translation.
@@ -97,9 +177,35 @@ class BaseHeatARMTranslator(object):
             if resource:
                 self._context.add_resource(resource)
 
+    def _get_memo(self):
+        """ _get_memo is a helper method which returns the dict of the results
+        of the memoized methods; dropping them if the properties of the Heat
+        resource were rebound since.
+        """
+        if self._memo_properties is not self._heat_resource.properties:
+            self.invalidate_memo()
+
+        return self._memo
+
+    def invalidate_memo(self):
+        """ invalidate_memo drops the results of all the memoized methods;
+        for them to be derived anew from the current properties and context.
+
+        NOTE: it must be called before running any method of the translator
+        again after its changes to the context were discarded.
+        """
+        self._memo = {}
+        self._memo_properties = self._heat_resource.properties
+
     def _make_var_name(self, var):
         """ _get_var_name is a helper method which constructs the
         name to be used as an ARM template variable.
         The result is of the form <parameter_name>_<self._heat_resource_name>.
         """
-        return "%s_%s" % (var, self._heat_resource_name)
+        return self._strings.intern("%s_%s" % (var, self._heat_resource_name))
+
+    def _make_var_ref(self, var):
+        """ _make_var_ref is a helper method which returns the ARM expression
+        referencing the variable named by _make_var_name.
+        """
+        return self._strings.variable(self._make_var_name(var))
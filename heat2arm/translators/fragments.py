@@ -0,0 +1,150 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the factory for the recurring fragments of ARM resource
+    definitions (ex: the imageReference of a VM, the ipConfiguration of a NIC).
+
+    The fragments it hands out are of two kinds:
+        - shared: the sub-fragments which are the same for all the resources
+        of a configuration snapshot (ex: the properties of the default storage
+        account, the reference to a given subnet). These are built once, held
+        as read-only FrozenDicts and handed out as they are to every resource.
+        - stamped: the fragments holding per-resource fields (ex: the
+        resource definitions themselves, the imageReference and osDisk of a
+        VM, the ipConfigurations of a NIC). These are new dicts, whose
+        constant fields (ex: the imageReference's version, the osDisk's
+        caching and createOption) reference the same strings throughout.
+
+    Only the stamped fragments may be edited by update_context (ex: the
+    dependsOn list and networkProfile of a VM, the ipConfigurations of a NIC);
+    all the shared ones must be replaced rather than altered in place.
+"""
+
+from heat2arm.config import FrozenDict
+from heat2arm import expressions
+
+
+class ARMFragmentFactory(object):
+    """ ARMFragmentFactory holds the skeletons of all the ARM resource
+    fragments for a given ARM API version, stamps out the per-resource
+    fragments from them and hands out the shared ones.
+
+    NOTE: all skeletons list every field of the fragment (with a None for
+    the resource-specific ones) so as to fix the order of the fields in the
+    resulting template.
+    """
+
+    def __init__(self, api_version):
+        """ An ARMFragmentFactory is created from the ARM API version
+        to be used for all the resources it builds.
+        """
+        self._resource = {
+            "apiVersion": api_version,
+            "type": None,
+            "name": None,
+            "location": expressions.LOCATION,
+        }
+
+        self._image_reference = {
+            "publisher": None,
+            "offer": None,
+            "sku": None,
+            "version": "latest",
+        }
+
+        self._os_disk = {
+            "name": "osdisk",
+            "vhd": None,
+            "caching": "ReadWrite",
+            "createOption": "FromImage",
+        }
+
+        self._ip_configuration_properties = {
+            "privateIPAllocationMethod": "Dynamic",
+            "subnet": None,
+        }
+
+        # storage_account_properties are the shared properties
+        # of the default storage account:
+        self._storage_account_properties = FrozenDict({
+            "accountType": expressions.variable("storageAccountType"),
+        })
+
+        # subnet_references is the mapping between the ID of each subnet
+        # and the shared reference to it:
+        self._subnet_references = {}
+
+    def resource(self, resource_type, name, **fields):
+        """ resource returns the definition of a new resource of the given
+        type and name, with the given fields added after the common ones.
+        """
+        return dict(self._resource, type=resource_type, name=name, **fields)
+
+    def image_reference(self, publisher, offer, sku):
+        """ image_reference returns the imageReference of a VM
+        with the given publisher, offer and sku.
+        """
+        return dict(
+            self._image_reference, publisher=publisher, offer=offer, sku=sku
+        )
+
+    def os_disk(self, vhd_uri):
+        """ os_disk returns the osDisk of a VM which resides
+        in the blob with the given URI.
+        """
+        return dict(self._os_disk, vhd={"uri": vhd_uri})
+
+    def ip_configuration(self, name, subnet_id, **properties):
+        """ ip_configuration returns the definition of a NIC's ipConfiguration
+        with the given name, which is attached to the subnet with the given ID
+        and has the provided additional properties.
+        """
+        return {
+            "name": name,
+            "properties": dict(
+                self._ip_configuration_properties,
+                subnet=self.subnet_reference(subnet_id),
+                **properties
+            ),
+        }
+
+    def subnet_reference(self, subnet_id):
+        """ subnet_reference returns the shared reference
+        to the subnet with the given ID.
+        """
+        reference = self._subnet_references.get(subnet_id)
+        if reference is None:
+            reference = self._subnet_references.setdefault(
+                subnet_id, FrozenDict({"id": subnet_id})
+            )
+
+        return reference
+
+    def storage_account_properties(self):
+        """ storage_account_properties returns the shared properties
+        of the default storage account.
+        """
+        return self._storage_account_properties
+
+
+def get_fragment_factory(config):
+    """ get_fragment_factory returns the ARMFragmentFactory for the ARM API
+    version of the given ConfigSnapshot; which is created once per snapshot.
+    """
+    return config.get_derived(
+        "fragment_factory",
+        lambda snapshot: ARMFragmentFactory(snapshot.arm_api_version)
+    )
@@ -18,8 +18,10 @@
     both Nova and EC2 instance translators.
 """
 
-from heat2arm.config import CONF
+import json
+
 from heat2arm.translators.base import BaseHeatARMTranslator
+from heat2arm.translators.base import memoized
 from heat2arm.translators.instances import utils as instance_utils
 
 
@@ -30,6 +32,43 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
     """
     arm_resource_type = "Microsoft.Compute/virtualMachines"
 
+    # fields for keeping the type of the Heat resources attaching volumes to
+    # the instance and the name of their property referencing the instance:
+    volume_attachment_type = None
+    volume_attachment_instance_field = None
+
+    # fields for keeping the names of the properties of the instance holding
+    # its image and flavor; and the module mapping them to their Azure ones:
+    image_property = None
+    flavor_property = None
+    mapping_utils = None
+
+    @classmethod
+    def check_resource(cls, heat_resource, config_snapshot):
+        """ check_resource returns the list of the issues with the given
+        instance; including its image or flavor not being mapped.
+        """
+        issues = super(BaseInstanceARMTranslator, cls).check_resource(
+            heat_resource, config_snapshot
+        )
+
+        properties = heat_resource.properties
+        checks = [
+            ("unmapped_image", cls.image_property,
+             cls.mapping_utils.get_azure_image_info),
+            ("unmapped_flavor", cls.flavor_property,
+             cls.mapping_utils.get_azure_flavor),
+        ]
+        for kind, field, check in checks:
+            if field not in properties:
+                continue
+            try:
+                check(config_snapshot, properties[field])
+            except Exception as ex:
+                issues.append((kind, str(ex)))
+
+        return issues
+
     def __init__(self, heat_resource, context):
         super(BaseInstanceARMTranslator, self).__init__(heat_resource, context)
         self._context.set_storage_account_required()
@@ -68,14 +107,53 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
 
         # NOTE: in order to avoid Linux userdata escaping problems, we simply
         # put the userdata of the VM within a variable we later reference:
-        user_data = self._get_userdata()
-        if user_data:
-            base_vars.update({
-                self._make_var_name("customData"): user_data
-            })
+        custom_data = self._get_custom_data()
+        if custom_data:
+            var_name, value, _ = custom_data
+            base_vars.update({var_name: value})
 
         return base_vars
 
+    @memoized
+    def _get_custom_data(self):
+        """ _get_custom_data is a helper method which returns the name and
+        value of the variable holding the customData of the VM, along with
+        the expression referencing it; or None if the VM has no userdata.
+
+        When so configured, VMs with identical userdata all share the same
+        variable, and string userdata gets gzip-compressed and encoded
+        beforehand.
+        """
+        user_data = self._get_userdata()
+        if not user_data:
+            return None
+
+        var_name = self._make_var_name("customData")
+        if self._config.deduplicate_custom_data:
+            var_name = self._strings.intern("customData_%s" % (
+                instance_utils.get_userdata_digest(user_data)[:12]
+            ))
+
+        if self._config.compress_custom_data and isinstance(user_data, str):
+            value = instance_utils.compress_userdata(user_data)
+            size = len(value) * 3 // 4
+            expression = self._strings.variable(var_name)
+        else:
+            value = user_data
+            size = len(user_data.encode("utf-8")) if isinstance(
+                user_data, str) else len(json.dumps(user_data))
+            expression = self._strings.intern(
+                "[base64(variables('%s'))]" % var_name
+            )
+
+        if size > instance_utils.CUSTOM_DATA_MAX_SIZE:
+            self._logger.warning(
+                "customData of about %d bytes exceeds Azure's limit of %d"
+                " bytes.", size, instance_utils.CUSTOM_DATA_MAX_SIZE
+            )
+
+        return (var_name, value, expression)
+
     def _get_ref_port_resource_names(self):
         """ _get_ref_port_resource_names is a helper method which returns a
         list of all the Neutron port resource names which either are referenced
@@ -85,6 +163,27 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
         """
         pass
 
+    def _get_attachment_counts(self):
+        """ _get_attachment_counts is a helper method which returns the number
+        of NICs and data disks which are to be attached to the instance; as
+        required for solving for its VM size.
+
+        NOTE: the attachments are only counted if a catalog of VM sizes
+        is configured, as they are otherwise irrelevant.
+        """
+        if not self._config.vm_size_catalog:
+            return 1, 0
+
+        nics = len(self._get_ref_port_resource_names() or [])
+        data_disks = len([
+            resource for resource in self._context.heat_resources
+            if resource.type == self.volume_attachment_type and
+            resource.properties.get(self.volume_attachment_instance_field) ==
+            self._heat_resource_name
+        ])
+
+        return max(nics, 1), data_disks
+
     def _get_userdata(self):
         """ _get_userdata is a helper method which returns the userdata from
         the instance's definition, if any.
@@ -101,8 +200,10 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
 
         for port_resource_name in self._get_ref_port_resource_names():
             network_interfaces_data.append({
-                "id": "[resourceId('Microsoft.Network/networkInterfaces', "
-                      "variables('nicName_%s'))]" % port_resource_name
+                "id": self._strings.resource_id(
+                    "Microsoft.Network/networkInterfaces",
+                    "variables('nicName_%s')" % port_resource_name
+                )
             })
 
         if not network_interfaces_data:
@@ -119,8 +220,8 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
             "computerName": instance_utils.filter_non_alnum(
                 "vmName%s" % self._heat_resource_name.capitalize()
             ),
-            "adminUsername": "[parameters('adminUsername')]",
-            "adminPassword": "[parameters('adminPassword')]",
+            "adminUsername": self._strings.parameter("adminUsername"),
+            "adminPassword": self._strings.parameter("adminPassword"),
         }
 
     def _get_vm_properties(self):
@@ -130,34 +231,22 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
         # list the properties all instances must have:
         vm_properties = {
             "hardwareProfile": {
-                "vmSize": "[variables('vmSize_%s')]" % self._heat_resource_name
+                "vmSize": self._make_var_ref("vmSize")
             },
             "storageProfile": {
-                "imageReference": {
-                    "publisher": "[variables('imgPublisher_%s')]" % (
-                        self._heat_resource_name
-                    ),
-                    "offer": "[variables('imgOffer_%s')]" % (
-                        self._heat_resource_name
-                    ),
-                    "sku": "[variables('imgSku_%s')]" % (
-                        self._heat_resource_name
-                    ),
-                    "version": "latest"
-                },
-                "osDisk": {
-                    "name": "osdisk",
-                    "vhd": {
-                        "uri": "[concat('http://',"
-                               "parameters('newStorageAccountName'),"
-                               "'.blob.core.windows.net/',variables("
-                               "'vmStorageAccountContainerName'),'/',"
-                               "variables('vmName_%s'),'_root.vhd')]" %
-                               self._heat_resource_name
-                    },
-                    "caching": "ReadWrite",
-                    "createOption": "FromImage"
-                }
+                "imageReference": self._fragments.image_reference(
+                    self._make_var_ref("imgPublisher"),
+                    self._make_var_ref("imgOffer"),
+                    self._make_var_ref("imgSku"),
+                ),
+                "osDisk": self._fragments.os_disk(
+                    "[concat('http://',"
+                    "parameters('newStorageAccountName'),"
+                    "'.blob.core.windows.net/',variables("
+                    "'vmStorageAccountContainerName'),'/',"
+                    "variables('vmName_%s'),'_root.vhd')]" %
+                    self._heat_resource_name
+                ),
             },
             "networkProfile": {},
         }
@@ -167,11 +256,9 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
 
         # NOTE: in order to avoid any templating laguage escaping problems; we
         # must put the [eventual] userdata into a variable which we reference:
-        user_data = self._get_userdata()
-        if user_data:
-            os_profile_data["customData"] = (
-                "[base64(variables('%s'))]" % self._make_var_name("customData")
-            )
+        custom_data = self._get_custom_data()
+        if custom_data:
+            os_profile_data["customData"] = custom_data[2]
 
         vm_properties.update({
             "osProfile": os_profile_data,
@@ -191,14 +278,17 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
         super(BaseInstanceARMTranslator, self).get_dependencies()
 
         depends_on = [
-            "[concat('Microsoft.Storage/storageAccounts/', "
-            "parameters('newStorageAccountName'))]"
+            self._strings.dependency(
+                "Microsoft.Storage/storageAccounts",
+                "parameters('newStorageAccountName')"
+            )
         ]
 
         for port_resource_name in self._get_ref_port_resource_names():
-            depends_on.append(
-                "[concat('Microsoft.Network/networkInterfaces/', "
-                "variables('nicName_%s'))]" % port_resource_name)
+            depends_on.append(self._strings.dependency(
+                "Microsoft.Network/networkInterfaces",
+                "variables('nicName_%s')" % port_resource_name
+            ))
 
         return depends_on
 
@@ -209,14 +299,12 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
         """
         super(BaseInstanceARMTranslator, self).get_resource_data()
 
-        return [{
-            "apiVersion": CONF.arm_api_version,
-            "type": self.arm_resource_type,
-            "name": "[variables('vmName_%s')]" % self._heat_resource.name,
-            "location": "[variables('location')]",
-            "properties": self._get_vm_properties(),
-            "dependsOn": self.get_dependencies(),
-        }]
+        return [self._fragments.resource(
+            self.arm_resource_type,
+            self._make_var_ref("vmName"),
+            properties=self._get_vm_properties(),
+            dependsOn=self.get_dependencies(),
+        )]
 
     def update_context(self):
         """ update_context updates the context to add the necessary parameters,
@@ -231,48 +319,49 @@ class BaseInstanceARMTranslator(BaseHeatARMTranslator):
             return
 
         self._context.add_variables({
-            "nicName_VM_%s" % self._heat_resource_name:
+            self._make_var_name("nicName_VM"):
                 "nic_VM_%s" % self._heat_resource_name,
         })
 
         res = self._context.get_arm_resource({
-            "name": "[variables('vmName_%s')]" % self._heat_resource.name,
+            "name": self._make_var_ref("vmName"),
             "type": self.arm_resource_type
         })
 
         # add the default VN and the NIC as dependencies:
         res["dependsOn"].extend([
-            "[concat('Microsoft.Network/virtualNetworks/', "
-            "parameters('newVirtualNetworkName'))]",
-            "[concat('Microsoft.Network/networkInterfaces/', "
-            "variables('nicName_VM_%s'))]" % self._heat_resource_name
+            self._strings.dependency(
+                "Microsoft.Network/virtualNetworks",
+                "parameters('newVirtualNetworkName')"
+            ),
+            self._strings.dependency(
+                "Microsoft.Network/networkInterfaces",
+                "variables('%s')" % self._make_var_name("nicName_VM")
+            )
         ])
 
         res["properties"]["networkProfile"].update({
             "networkInterfaces": [{
-                "id": "[resourceId('Microsoft.Network/networkInterfaces', "
-                      "variables('nicName_VM_%s'))]" % self._heat_resource_name
+                "id": self._strings.resource_id(
+                    "Microsoft.Network/networkInterfaces",
+                    "variables('%s')" % self._make_var_name("nicName_VM")
+                )
             }]
         })
 
-        self._context.add_resource({
-            "name": "[variables('nicName_VM_%s')]" % self._heat_resource_name,
-            "apiVersion": CONF.arm_api_version,
-            "location": "[variables('location')]",
-            "type": "Microsoft.Network/networkInterfaces",
-            "dependsOn": [
-                "[concat('Microsoft.Network/virtualNetworks/', "
-                "parameters('newVirtualNetworkName'))]"
+        self._context.add_resource(self._fragments.resource(
+            "Microsoft.Network/networkInterfaces",
+            self._make_var_ref("nicName_VM"),
+            dependsOn=[
+                self._strings.dependency(
+                    "Microsoft.Network/virtualNetworks",
+                    "parameters('newVirtualNetworkName')"
+                )
             ],
-            "properties": {
-                "ipConfigurations": [{
-                    "name": "ipConfig_nic_VM_%s" % self._heat_resource_name,
-                    "properties": {
-                        "subnet": {
-                            "id": "[variables('defaultSubnetRef')]"
-                        },
-                        "privateIPAllocationMethod": "Dynamic",
-                    }
-                }]
+            properties={
+                "ipConfigurations": [self._fragments.ip_configuration(
+                    "ipConfig_nic_VM_%s" % self._heat_resource_name,
+                    self._strings.variable("defaultSubnetRef"),
+                )]
             }
-        })
+        ))
@@ -17,7 +17,7 @@
     Defines the translator and auxiliary functions for EC2 instances.
 """
 
-from heat2arm.config import CONF
+from heat2arm.translators.base import memoized
 from heat2arm.translators.instances import ec2_utils as utils
 from heat2arm.translators.instances.base_instance import (
     BaseInstanceARMTranslator
@@ -33,6 +33,12 @@ class EC2InstanceARMTranslator(BaseInstanceARMTranslator):
     of each instance.
     """
     heat_resource_type = "AWS::EC2::Instance"
+    volume_attachment_type = "AWS::EC2::VolumeAttachment"
+    volume_attachment_instance_field = "InstanceId"
+    image_property = "ImageId"
+    flavor_property = "InstanceType"
+    mapping_utils = utils
+    required_properties = (image_property, flavor_property)
 
     # NOTE:the following methods are inherited from BaseInstanceARMTranslator:
     #   - get_parameters.
@@ -46,12 +52,14 @@ class EC2InstanceARMTranslator(BaseInstanceARMTranslator):
         base_vars = self._get_base_variables()
 
         (publisher, offer, sku) = utils.get_azure_image_info(
-            self._heat_resource.properties["ImageId"]
+            self._config, self._heat_resource.properties[self.image_property]
         )
 
         base_vars.update({
             self._make_var_name("vmSize"): utils.get_azure_flavor(
-                self._heat_resource.properties["InstanceType"]
+                self._config,
+                self._heat_resource.properties[self.flavor_property],
+                *self._get_attachment_counts()
             ),
             self._make_var_name("imgPublisher"): publisher,
             self._make_var_name("imgOffer"): offer,
@@ -68,44 +76,42 @@ class EC2InstanceARMTranslator(BaseInstanceARMTranslator):
 
         res = self._context.get_arm_resource({
             "type": self.arm_resource_type,
-            "name": "[variables('vmName_%s')]" % self._heat_resource.name,
+            "name": self._make_var_ref("vmName"),
         })
 
         # check for the existence of an AvailabilityZone set for the instance:
         avail_zone = self._get_availability_zone()
         if avail_zone:
             # if present, add the availabilitySet as a dependency:
-            res["dependsOn"].append(
-                "[concat('Microsoft.Compute/availabilitySets/',"
-                "variables('availabilitySetName_%s'))]" % avail_zone
-            )
-
-            # also, check to ensure the availabilitySet is defined:
-            if avail_zone not in self._context.availability_set_names:
-                # add the name and resource data of the availabilitySet
-                # to the overall translation:
+            res["dependsOn"].append(self._strings.dependency(
+                "Microsoft.Compute/availabilitySets",
+                "variables('availabilitySetName_%s')" % avail_zone
+            ))
+
+            # also, ensure the availabilitySet is defined by registering its
+            # name and, if it was not registered before; add the name and
+            # resource data of the availabilitySet to the overall translation:
+            if self._context.register_availability_set(avail_zone):
                 self._context.add_variables({
-                    "availabilitySetName_%s" % avail_zone:
-                        "availabilitySet_%s" % avail_zone
+                    self._strings.intern(
+                        "availabilitySetName_%s" % avail_zone
+                    ): "availabilitySet_%s" % avail_zone
                 })
 
                 self._context.add_resource({
-                    "apiVersion": CONF.arm_api_version,
+                    "apiVersion": self._config.arm_api_version,
                     "type": "Microsoft.Compute/availabilitySets",
-                    "name": "[variables('availabilitySetName_%s')]" %
-                            avail_zone,
-                    "location": "[variables('location')]",
+                    "name": self._strings.variable(
+                        "availabilitySetName_%s" % avail_zone
+                    ),
+                    "location": self._strings.LOCATION,
                     "properties": {
                         "platformFaultDomainCount": "%s" % (
-                            CONF.arm_fault_domain_count
+                            self._config.arm_fault_domain_count
                         )
                     }
                 })
 
-                # and finally; register the name of the availabilitySet
-                # which will be created:
-                self._context.availability_set_names.append(avail_zone)
-
     def _get_vm_properties(self):
         """ _get_vm_properties is a helper method which returns all the
         properties of the instance's ARM translation.
@@ -117,13 +123,16 @@ class EC2InstanceARMTranslator(BaseInstanceARMTranslator):
         if avail_zone:
             base_props.update({
                 "availabilitySet": {
-                    "id": "[resourceId('Microsoft.Compute/availabilitySets',"
-                          "variables('availabilitySetName_%s'))]" % avail_zone
+                    "id": self._strings.resource_id(
+                        "Microsoft.Compute/availabilitySets",
+                        "variables('availabilitySetName_%s')" % avail_zone
+                    )
                 }
             })
 
         return base_props
 
+    @memoized
     def _get_ref_port_resource_names(self):
         """ _get_ref_port_resource_name is a helper method which returns a list
         of all the Neurton port resources wich reference this EC2 instance.
@@ -146,6 +155,7 @@ class EC2InstanceARMTranslator(BaseInstanceARMTranslator):
 
         return port_resource_names
 
+    @memoized
     def _get_availability_zone(self):
         """ _get_availability_zone is a helper method which returns the
         AvailabilityZone this instance is located in, if any.
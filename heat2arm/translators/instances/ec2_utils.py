@@ -18,38 +18,51 @@
     which aid in instance translations.
 """
 
-from heat2arm.config import CONF
+from heat2arm.translators.instances import mappings
+from heat2arm.translators.instances import sizes
 
 
-def get_azure_flavor(flavor):
+def get_azure_flavor(config, flavor, nics=1, data_disks=0):
     """ get_azure_flavor is a helper function which returns the
     appropriate Azure VM size corresponding to the given Amazon
-    image flavor or a the pre-set sensible default.
+    image flavor within the given ConfigSnapshot.
+
+    When a catalog of VM sizes is configured, the cheapest size satisfying
+    the specs of the flavor along with the given numbers of NICs and data
+    disks takes precedence over the mapped one.
     """
-    if flavor not in CONF.ec2_flavor_to_size_map:
+    size = sizes.solve_size(
+        config, "ec2_flavor_specs", flavor, nics, data_disks
+    )
+    if size is not None:
+        return size
+
+    size = mappings.get_table(config, "ec2_flavor_to_size_map").get(flavor)
+    if size is None:
         raise Exception("Could not find mapping for the EC2 image size "
                         "'%s', please edit 'ec2_flavor_to_size_map' in the "
                         "configuration." % (flavor))
 
-    return CONF.ec2_flavor_to_size_map[flavor]
+    return size
 
 
-def get_azure_image_info(ec2_image):
+def get_azure_image_info(config, ec2_image):
     """ get_azure_image_info is a helper function which returns
     the info of the image.
     """
-    azure_image_info_str = CONF.ec2_vm_image_map.get(ec2_image, None)
+    azure_image_info = mappings.get_table(
+        config, "ec2_vm_image_map", mappings.parse_image_info
+    ).get(ec2_image)
 
-    if not azure_image_info_str:
+    if not azure_image_info:
         raise Exception(
             'EC2 image "%s" cannot be mapped to an Azure equivalent. Please '
-            'update the "EC2_TO_ARM_IMAGE_MAPPINGS" configuration option.' %
+            'update the "ec2_vm_image_map" configuration option.' %
             ec2_image)
 
-    azure_image_info = tuple(azure_image_info_str.split(";"))
     if len(azure_image_info) != 3:
         raise Exception(
             '"%s" does not contain valid Azure image data. The required '
-            'format is "publisher;offer;sku"')
+            'format is "publisher;offer;sku"' % ";".join(azure_image_info))
 
     return azure_image_info
@@ -0,0 +1,166 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the compiled lookup tables of the mapping options of instance
+    translations (ex: between the names of images and Azure images).
+"""
+
+import fnmatch
+import re
+
+
+# REGEX_PREFIX is the prefix of the keys of mapping options
+# which are regular expressions matching full names:
+# NOTE: it may not contain ':', which separates keys from values:
+REGEX_PREFIX = "~"
+
+# GLOB_CHARACTERS are the characters which mark the keys of
+# mapping options as glob patterns (ex: "ubuntu.*.x86_64"):
+GLOB_CHARACTERS = "*?["
+
+# _BACKREFERENCE_REGEX matches the numbered backreferences and conditionals
+# of regular expressions; which cannot be combined with other expressions:
+_BACKREFERENCE_REGEX = re.compile(r"(?<!\\)(?:\\\\)*(?:\\[1-9]|\\g<|\(\?\()")
+
+# _ALTERNATIVE is the format of the alternative of the combined regular
+# expression of a MappingTable for the pattern with the given index:
+_ALTERNATIVE = r"(?P<_%d>(?:%s)\Z)"
+
+
+class MappingTable(object):
+    """ MappingTable is the compiled lookup table of a mapping option; whose
+    keys may be exact names, glob patterns or regular expressions prefixed
+    with REGEX_PREFIX.
+
+    Exact names always take precedence over patterns; which are all combined
+    into a single regular expression so that looking up any name takes one
+    scan. Longer patterns are tried first, as they are more specific.
+
+    NOTE: regular expressions may thus not hold named groups, backreferences
+    or conditionals; which are rejected with a ValueError.
+    """
+
+    def __init__(self, mapping, parse=None, option=None):
+        """ A MappingTable is created from the mapping to be compiled, the
+        function all of its values are to be parsed with, if any, and the name
+        of the mapping option it originates from, if any, to be given in the
+        errors about it.
+        """
+        # exact is the dict between exact names and their parsed values:
+        self._exact = {}
+
+        patterns = []
+        for key, value in mapping.items():
+            if parse is not None:
+                value = parse(value)
+
+            if key.startswith(REGEX_PREFIX):
+                regex = key[len(REGEX_PREFIX):]
+                _check_regex(key, regex, option)
+            elif any(char in key for char in GLOB_CHARACTERS):
+                regex = fnmatch.translate(key)
+            else:
+                self._exact[key] = value
+                continue
+
+            patterns.append((key, regex, value))
+
+        patterns.sort(key=lambda pattern: (-len(pattern[0]), pattern[0]))
+
+        # values is the list of the parsed values of the patterns, in
+        # the order of the alternatives of the matcher:
+        self._values = [value for _, _, value in patterns]
+        # matched is the mapping between all the names matched against the
+        # patterns so far and the index of the matching one, if any:
+        self._matched = {}
+        self._matcher = None
+        if patterns:
+            self._matcher = re.compile("|".join(
+                _ALTERNATIVE % (index, regex)
+                for index, (_, regex, _) in enumerate(patterns)
+            ))
+
+    def get(self, name, default=None):
+        """ get returns the parsed value of the given name; be it mapped
+        exactly or matched by a pattern. The given default is returned for
+        names which are not mapped.
+        """
+        if name in self._exact:
+            return self._exact[name]
+
+        if self._matcher is None or not isinstance(name, str):
+            return default
+
+        if name not in self._matched:
+            match = self._matcher.match(name)
+            # NOTE: the group wrapping each alternative is the outermost one,
+            # so it is always the last one matched:
+            self._matched[name] = int(match.lastgroup[1:]) if match else None
+
+        index = self._matched[name]
+        if index is None:
+            return default
+
+        return self._values[index]
+
+
+def _check_regex(key, regex, option):
+    """ _check_regex is a helper function which raises a ValueError naming
+    the given key and mapping option if the given regular expression is
+    invalid on its own or may not be combined with others.
+    """
+    def _fail(reason):
+        """ _fail raises the ValueError with the given reason. """
+        raise ValueError("Invalid pattern '%s'%s: %s" % (
+            key, ' of mapping option "%s"' % option if option else "", reason
+        ))
+
+    try:
+        compiled = re.compile(regex)
+    except re.error as ex:
+        _fail(ex)
+
+    if compiled.groupindex:
+        _fail("named groups are not supported; use (?:...) instead")
+    if _BACKREFERENCE_REGEX.search(regex):
+        _fail("backreferences and conditionals are not supported")
+
+    # NOTE: some constructs (ex: global flags) are only valid at the start
+    # of the expression, and thus not within the combined one:
+    try:
+        re.compile(_ALTERNATIVE % (0, regex))
+    except re.error as ex:
+        _fail(ex)
+
+
+def parse_image_info(value):
+    """ parse_image_info returns the tuple of the parts of the given
+    "publisher;offer;sku" value of an image mapping option.
+    """
+    return tuple(value.split(";"))
+
+
+def get_table(config, option, parse=None):
+    """ get_table returns the MappingTable of the given mapping option of the
+    given ConfigSnapshot; which is compiled once per snapshot, with all of its
+    values being parsed with the given function.
+    """
+    return config.get_derived(
+        ("mapping_table", option),
+        lambda snapshot: MappingTable(
+            getattr(snapshot, option), parse, option
+        )
+    )
@@ -18,6 +18,7 @@
     a Nova server to an Azure VM.
 """
 
+from heat2arm.translators.base import memoized
 from heat2arm.translators.instances.base_instance import (
     BaseInstanceARMTranslator
 )
@@ -30,6 +31,12 @@ class NovaServerARMTranslator(BaseInstanceARMTranslator):
     It processes the fields and parameters of a Nova server defined in Heat.
     """
     heat_resource_type = "OS::Nova::Server"
+    volume_attachment_type = "OS::Cinder::VolumeAttachment"
+    volume_attachment_instance_field = "instance_uuid"
+    image_property = "image"
+    flavor_property = "flavor"
+    mapping_utils = utils
+    required_properties = (image_property, flavor_property)
 
     def get_variables(self):
         """ get_variables returns the dict of ARM template variables
@@ -38,15 +45,17 @@ class NovaServerARMTranslator(BaseInstanceARMTranslator):
         base_vars = self._get_base_variables()
 
         (publisher, offer, sku) = utils.get_azure_image_info(
-            self._heat_resource.properties['image']
+            self._config, self._heat_resource.properties[self.image_property]
         )
 
         base_vars.update({
-            "vmSize_%s" % self._heat_resource_name: utils.get_azure_flavor(
-                self._heat_resource.properties['flavor']),
-            "imgPublisher_%s" % self._heat_resource_name: publisher,
-            "imgOffer_%s" % self._heat_resource_name: offer,
-            "imgSku_%s" % self._heat_resource_name: sku,
+            self._make_var_name("vmSize"): utils.get_azure_flavor(
+                self._config,
+                self._heat_resource.properties[self.flavor_property],
+                *self._get_attachment_counts()),
+            self._make_var_name("imgPublisher"): publisher,
+            self._make_var_name("imgOffer"): offer,
+            self._make_var_name("imgSku"): sku,
         })
 
         return base_vars
@@ -57,6 +66,7 @@ class NovaServerARMTranslator(BaseInstanceARMTranslator):
     #   - get_resource_data.
     #   - update_context.
 
+    @memoized
     def _get_ref_port_resource_names(self):
         """ _get_ref_port_resource_names is a helper method which returns a
         list containing the names of all port resources which are referenced
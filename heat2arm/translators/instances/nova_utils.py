@@ -18,38 +18,51 @@
     which aid in instance translations.
 """
 
-from heat2arm.config import CONF
+from heat2arm.translators.instances import mappings
+from heat2arm.translators.instances import sizes
 
 
-def get_azure_flavor(flavor):
+def get_azure_flavor(config, flavor, nics=1, data_disks=0):
     """ get_azure_flavor is a helper function which returns the
     appropriate Azure VM size corresponding to the given image flavor
-    or a the pre-set sensible default.
+    within the given ConfigSnapshot.
+
+    When a catalog of VM sizes is configured, the cheapest size satisfying
+    the specs of the flavor along with the given numbers of NICs and data
+    disks takes precedence over the mapped one.
     """
-    if flavor not in CONF.nova_flavor_to_size_map:
-        raise Exception("Could not find mapping for the EC2 image size "
+    size = sizes.solve_size(
+        config, "nova_flavor_specs", flavor, nics, data_disks
+    )
+    if size is not None:
+        return size
+
+    size = mappings.get_table(config, "nova_flavor_to_size_map").get(flavor)
+    if size is None:
+        raise Exception("Could not find mapping for the Nova flavor "
                         "'%s', please edit 'nova_flavor_to_size_map' in the "
                         "configuration." % flavor)
 
-    return CONF.nova_flavor_to_size_map[flavor]
+    return size
 
 
-def get_azure_image_info(nova_image):
+def get_azure_image_info(config, nova_image):
     """ get_azure_image_info is a helper function which returns
     the info of the image.
     """
-    azure_image_info_str = CONF.nova_vm_image_map.get(nova_image, None)
+    azure_image_info = mappings.get_table(
+        config, "nova_vm_image_map", mappings.parse_image_info
+    ).get(nova_image)
 
-    if not azure_image_info_str:
+    if not azure_image_info:
         raise Exception(
             'Nova image "%s" cannot be mapped to an Azure equivalent. Please '
-            'update the "CONF.nova_vm_image_map" configuration option' %
+            'update the "nova_vm_image_map" configuration option.' %
             nova_image)
 
-    azure_image_info = tuple(azure_image_info_str.split(";"))
     if len(azure_image_info) != 3:
         raise Exception(
             '"%s" does not contain valid Azure image data. The required '
-            'format is "publisher;offer;sku"')
+            'format is "publisher;offer;sku"' % ";".join(azure_image_info))
 
     return azure_image_info
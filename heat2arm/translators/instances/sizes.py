@@ -0,0 +1,197 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    Contains the solver which picks the Azure VM size of instances out of a
+    local catalog of Azure VM sizes, based on the capacity they require.
+"""
+
+import collections
+import logging
+
+import yaml
+
+from heat2arm.parser.common import files
+from heat2arm.translators.instances import mappings
+
+
+LOG = logging.getLogger("__heat2arm__.%s" % __name__)
+
+# VMSize is the type of the entries of the catalog of Azure VM sizes.
+# Its fields are:
+#   - name - the name of the size (ex: "Standard_D2_v2").
+#   - vcpus - the number of virtual CPUs.
+#   - memory_mb - the amount of memory in MB.
+#   - max_nics - the maximum number of network interfaces.
+#   - max_data_disks - the maximum number of data disks.
+#   - bandwidth_mbps - the expected network bandwidth in Mbps.
+#   - price - the hourly price of the size, if known.
+VMSize = collections.namedtuple(
+    "VMSize",
+    "name vcpus memory_mb max_nics max_data_disks bandwidth_mbps price"
+)
+
+# _CAPACITIES are the fields of VMSizes which are capacities of the size:
+_CAPACITIES = (
+    "vcpus", "memory_mb", "max_nics", "max_data_disks", "bandwidth_mbps"
+)
+
+
+class SizeCatalog(object):
+    """ SizeCatalog is a catalog of Azure VM sizes which solves for the
+    cheapest size satisfying given requirements.
+
+    The sizes are ordered by price once (sizes of unknown price coming last,
+    ordered by their capacities) and all the sizes which a cheaper one matches
+    or exceeds in all capacities are dropped; as they can never be the
+    cheapest fit. Each distinct set of requirements is only solved once.
+    """
+
+    def __init__(self, sizes):
+        """ A SizeCatalog is created from the list of VMSizes it holds. """
+        ordered = sorted(sizes, key=lambda size: (
+            size.price is None, size.price or 0,
+            tuple(getattr(size, field) for field in _CAPACITIES), size.name
+        ))
+
+        # sizes is the list of the sizes which may be the cheapest fit for
+        # some requirements, ordered from the cheapest one:
+        self.sizes = []
+        for size in ordered:
+            if not any(_fits(size, cheaper) for cheaper in self.sizes):
+                self.sizes.append(size)
+
+        # solved is the mapping between the requirements solved
+        # so far and the names of the sizes which satisfy them:
+        self._solved = {}
+
+    def solve(self, vcpus, memory_mb, nics=1, data_disks=0,
+              bandwidth_mbps=0):
+        """ solve returns the name of the cheapest size with at least the given
+        capacities; or None if no size within the catalog satisfies them.
+        """
+        requirements = VMSize(
+            None, vcpus, memory_mb, nics, data_disks, bandwidth_mbps, None
+        )
+        if requirements not in self._solved:
+            self._solved[requirements] = next((
+                size.name for size in self.sizes
+                if _fits(requirements, size)
+            ), None)
+
+        return self._solved[requirements]
+
+
+def _fits(requirements, size):
+    """ _fits is a helper function which returns whether the given size
+    has at least all the capacities of the given requirements.
+    """
+    return all(
+        getattr(size, field) >= getattr(requirements, field)
+        for field in _CAPACITIES
+    )
+
+
+def load_catalog(path):
+    """ load_catalog returns the SizeCatalog of the sizes listed within the
+    JSON or YAML file at the given path. Each size is a dict holding its
+    'name', 'vcpus' and 'memory_mb' along with its optional 'max_nics' (1),
+    'max_data_disks' (0), 'bandwidth_mbps' (0) and 'price'.
+
+    It raises a ValueError for any invalid size.
+    """
+    data = yaml.safe_load(files.get_file_contents(path))
+    if not isinstance(data, list):
+        raise ValueError(
+            "VM size catalog '%s' must hold a list of sizes." % path
+        )
+
+    sizes = []
+    for entry in data:
+        try:
+            sizes.append(VMSize(
+                str(entry["name"]),
+                int(entry["vcpus"]),
+                int(entry["memory_mb"]),
+                int(entry.get("max_nics", 1)),
+                int(entry.get("max_data_disks", 0)),
+                int(entry.get("bandwidth_mbps", 0)),
+                float(entry["price"]) if "price" in entry else None
+            ))
+        except (KeyError, TypeError, ValueError, AttributeError) as ex:
+            raise ValueError(
+                "VM size catalog '%s' has an invalid size '%s': %s" % (
+                    path, entry, ex
+                )
+            )
+
+    LOG.info("Loaded %d VM sizes from '%s'.", len(sizes), path)
+    return SizeCatalog(sizes)
+
+
+def parse_flavor_specs(value):
+    """ parse_flavor_specs returns the (vcpus, memory_mb, bandwidth_mbps)
+    tuple of the given "vcpus;memory_mb[;bandwidth_mbps]" value of a
+    flavor specs mapping option.
+    """
+    specs = tuple(int(spec) for spec in value.split(";"))
+    if len(specs) not in (2, 3):
+        raise ValueError(
+            "Invalid flavor specs '%s'; the required format is"
+            " 'vcpus;memory_mb[;bandwidth_mbps]'." % value
+        )
+
+    return specs + (0,) * (3 - len(specs))
+
+
+def get_catalog(config):
+    """ get_catalog returns the SizeCatalog loaded from the catalog file
+    of the given ConfigSnapshot; or None if none is configured.
+    """
+    if not config.vm_size_catalog:
+        return None
+
+    return config.get_derived(
+        ("vm_size_catalog",),
+        lambda snapshot: load_catalog(snapshot.vm_size_catalog)
+    )
+
+
+def solve_size(config, specs_option, flavor, nics=1, data_disks=0):
+    """ solve_size returns the name of the cheapest Azure VM size of the
+    catalog of the given ConfigSnapshot which satisfies the specs of the
+    given flavor within the given specs option, along with the given number
+    of NICs and data disks. It returns None if no catalog is configured, the
+    flavor has no specs or no size satisfies them.
+    """
+    catalog = get_catalog(config)
+    if catalog is None:
+        return None
+
+    specs = mappings.get_table(
+        config, specs_option, parse_flavor_specs
+    ).get(flavor)
+    if specs is None:
+        return None
+
+    vcpus, memory_mb, bandwidth_mbps = specs
+    size = catalog.solve(vcpus, memory_mb, nics, data_disks, bandwidth_mbps)
+    if size is None:
+        LOG.warning(
+            "No VM size within the catalog satisfies flavor '%s' with %d"
+            " NICs and %d data disks.", flavor, nics, data_disks
+        )
+
+    return size
@@ -18,6 +18,17 @@
     generally useful for translating instances.
 """
 
+import base64
+import gzip
+import hashlib
+import io
+import json
+
+
+# CUSTOM_DATA_MAX_SIZE is the maximum size in bytes of the
+# decoded customData of a VM, as imposed by Azure:
+CUSTOM_DATA_MAX_SIZE = 65535
+
 
 def filter_non_alnum(string):
     """ filter_non_alnum is a helper function which, given a string, returns it
@@ -25,3 +36,26 @@ def filter_non_alnum(string):
     in ARM which don't accept any special characters.
     """
     return ''.join([c for c in string if c.isalnum()])
+
+
+def get_userdata_digest(user_data):
+    """ get_userdata_digest returns the digest of the given userdata; which
+    is the same for all identical userdata.
+    """
+    return hashlib.sha1(
+        json.dumps(user_data, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def compress_userdata(user_data):
+    """ compress_userdata returns the base64 encoding of the gzip-compressed
+    given userdata string; which cloud-init decompresses on its own.
+
+    NOTE: the compressed data bears no timestamp; so that the same userdata
+    is always compressed to the same result.
+    """
+    buf = io.BytesIO()
+    with gzip.GzipFile(filename="", mode="wb", fileobj=buf, mtime=0) as gz:
+        gz.write(user_data.encode("utf-8"))
+
+    return base64.b64encode(buf.getvalue()).decode("ascii")
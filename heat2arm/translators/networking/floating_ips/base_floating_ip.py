@@ -17,7 +17,6 @@
     Defines the base translator for floating IP resource types.
 """
 
-from heat2arm.config import CONF
 from heat2arm.translators.base import BaseHeatARMTranslator
 
 
@@ -35,7 +34,7 @@ class BaseFloatingIPARMTranslator(BaseHeatARMTranslator):
         super(BaseFloatingIPARMTranslator, self).get_parameters()
 
         return {
-            "dnsNameForPublicIP_%s" % self._heat_resource_name: {
+            self._make_var_name("dnsNameForPublicIP"): {
                 "type": "string",
                 "metadata": {
                     "description": "Unique DNS name for public IP address."
@@ -48,7 +47,7 @@ class BaseFloatingIPARMTranslator(BaseHeatARMTranslator):
         with the Neutron Floating IP's translation.
         """
         return {
-            "publicIPAddressName_%s" % self._heat_resource_name:
+            self._make_var_name("publicIPAddressName"):
                 self._heat_resource_name,
         }
 
@@ -60,20 +59,17 @@ class BaseFloatingIPARMTranslator(BaseHeatARMTranslator):
         super(BaseFloatingIPARMTranslator, self).get_resource_data
 
         return [{
-            "apiVersion": CONF.arm_api_version,
+            "apiVersion": self._config.arm_api_version,
             "type": "Microsoft.Network/publicIPAddresses",
-            "name": "[variables('publicIPAddressName_%s')]" % (
-                self._heat_resource_name
-            ),
-            "location": "[variables('location')]",
+            "name": self._make_var_ref("publicIPAddressName"),
+            "location": self._strings.LOCATION,
             "properties": {
                 # TODO: Add support for static IPs
                 "publicIPAllocationMethod": "Dynamic",
                 "dnsSettings": {
-                    "domainNameLabel":
-                        "[parameters('dnsNameForPublicIP_%s')]" % (
-                            self._heat_resource_name
-                        )
-                    }
+                    "domainNameLabel": self._strings.parameter(
+                        self._make_var_name("dnsNameForPublicIP")
+                    )
                 }
-            }]
+            }
+        }]
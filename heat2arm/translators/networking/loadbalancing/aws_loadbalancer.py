@@ -33,6 +33,7 @@ class AWSLoadBalancerARMTranslator(BaseLoadBalancerARMTranslator):
     """
 
     heat_resource_type = "AWS::ElasticLoadBalancing::LoadBalancer"
+    required_properties = ("Listeners",)
 
     _mandatory_rule_fields = ['LoadBalancerPort', 'InstancePort', 'Protocol']
 
@@ -118,9 +119,9 @@ class AWSLoadBalancerARMTranslator(BaseLoadBalancerARMTranslator):
             # it means that there are no nic-like resources defined on the
             # instance itself, so thus a default one will be created and we
             # will reference that:
-            return "[variables('nicName_VM_%s')]" % instance_name
+            return self._strings.variable("nicName_VM_%s" % instance_name)
         elif len(nics) == 1:
-            return "[variables('nicName_%s')]" % nics[0]
+            return self._strings.variable("nicName_%s" % nics[0])
 
         # else, due to the fact that we cannot accurately deduce which is the
         # network interface we must apply the load balancing behind, we log a
@@ -130,7 +131,7 @@ class AWSLoadBalancerARMTranslator(BaseLoadBalancerARMTranslator):
             "can be balanced on. Defaulting to using '%s'.",
             instance_name, nics[0]
         )
-        return "[variables('nicName_%s')]" % nics[0]
+        return self._strings.variable("nicName_%s" % nics[0])
 
     def _get_nic(self):
         """ _get_nic is a helper method which returns the name of the
@@ -17,7 +17,6 @@
     This module contains the definition of the base load balancer translator.
 """
 
-from heat2arm.config import CONF
 from heat2arm.translators.base import BaseHeatARMTranslator
 from heat2arm.translators.networking.loadbalancing import exceptions
 
@@ -41,9 +40,9 @@ class BaseLoadBalancerARMTranslator(BaseHeatARMTranslator):
         super(BaseLoadBalancerARMTranslator, self).get_variables()
 
         return {
-            "loadBalancerName_%s" % self._heat_resource_name:
+            self._make_var_name("loadBalancerName"):
                 "loadBalancer_%s" % self._heat_resource_name,
-            "frontendIPConfigID_%s" % self._heat_resource_name:
+            self._make_var_name("frontendIPConfigID"):
                 "[concat(resourceId('Microsoft.Network/loadBalancers', "
                 "variables('loadBalancerName_%s')),'/frontendIPConfigurations"
                 "/frontendIP_%s')]" % ((self._heat_resource_name, ) * 2)
@@ -53,10 +52,10 @@ class BaseLoadBalancerARMTranslator(BaseHeatARMTranslator):
         """ get_dependencies returns the list of the resources
         this load balancer directly depends on.
         """
-        return [
-            "[concat('Microsoft.Network/publicIPAddresses/', "
-            "variables('publicIPName_%s'))]" % self._heat_resource_name
-        ]
+        return [self._strings.dependency(
+            "Microsoft.Network/publicIPAddresses",
+            "variables('%s')" % self._make_var_name("publicIPName")
+        )]
 
     def get_resource_data(self):
         """ get_resource_data returns the dict representing the data of the
@@ -64,23 +63,21 @@ class BaseLoadBalancerARMTranslator(BaseHeatARMTranslator):
         """
         super(BaseLoadBalancerARMTranslator, self).get_resource_data()
 
-        return [{
-            "apiVersion": CONF.arm_api_version,
-            "type": self.arm_resource_type,
-            "name": "[variables('loadBalancerName_%s')]" %
-                    self._heat_resource_name,
-            "location": "[variables('location')]",
-            "dependsOn": self.get_dependencies(),
-            "properties": {
+        return [self._fragments.resource(
+            self.arm_resource_type,
+            self._make_var_ref("loadBalancerName"),
+            dependsOn=self.get_dependencies(),
+            properties={
                 "frontendIPConfigurations": [{
                     "name": "frontendIP_%s" % self._heat_resource_name,
                     "properties": {
                         "publicIPAddress": {
                             # TODO: ok?
-                            "id":
-                                "[resourceId('Microsoft.Network/publicIP"
-                                "Addresses',variables('publicIPName_%s'))]" %
-                                self._heat_resource_name
+                            "id": self._strings.resource_id(
+                                "Microsoft.Network/publicIPAddresses",
+                                "variables('%s')" %
+                                self._make_var_name("publicIPName")
+                            )
                         }
                     }
                 }],
@@ -89,7 +86,7 @@ class BaseLoadBalancerARMTranslator(BaseHeatARMTranslator):
                 }],
                 "inboundNatRules": self._get_nat_rules(),
             }
-        }]
+        )]
 
     def update_context(self):
         """ update_context updates the translation context with all the details
@@ -98,14 +95,14 @@ class BaseLoadBalancerARMTranslator(BaseHeatARMTranslator):
         super(BaseLoadBalancerARMTranslator, self).update_context()
 
         # first; create the new public IP resource:
-        pub_ip_name = 'publicIPName_%s' % self._heat_resource_name
+        pub_ip_name = self._make_var_name("publicIPName")
 
         self._context.add_variables({
             pub_ip_name: "publicIP_%s" % self._heat_resource_name
         })
 
         self._context.add_parameters({
-            "dnsNameForLoadBalancerPublicIP_%s" % self._heat_resource_name: {
+            self._make_var_name("dnsNameForLoadBalancerPublicIP"): {
                 "type": "string",
                 "metadata": {
                     "description": "Unique DNS name for the LoadBalancer "
@@ -115,21 +112,18 @@ class BaseLoadBalancerARMTranslator(BaseHeatARMTranslator):
             }
         })
 
-        self._context.add_resource({
-            "apiVersion": CONF.arm_api_version,
-            "name": "[variables('%s')]" % pub_ip_name,
-            "type": "Microsoft.Network/publicIPAddresses",
-            "location": "[variables('location')]",
-            "properties": {
+        self._context.add_resource(self._fragments.resource(
+            "Microsoft.Network/publicIPAddresses",
+            self._strings.variable(pub_ip_name),
+            properties={
                 "publicIPAllocationMethod": "Dynamic",
                 "dnsSettings": {
-                    "domainNameLabel":
-                        "[parameters('dnsNameForLoadBalancerPublicIP_%s')]" % (
-                            self._heat_resource_name
-                        )
+                    "domainNameLabel": self._strings.parameter(
+                        self._make_var_name("dnsNameForLoadBalancerPublicIP")
+                    )
                 }
             }
-        })
+        ))
 
         # now, we must go ahead and find the required NIC:
         nic = self._context.get_arm_resource({
@@ -21,7 +21,6 @@
 https://azure.microsoft.com/en-gb/documentation/articles/resource-groups-networking/
 """
 
-from heat2arm.config import CONF
 from heat2arm.translators.base import BaseHeatARMTranslator
 
 
@@ -44,14 +43,16 @@ class NeutronNetARMTranslator(BaseHeatARMTranslator):
         super(NeutronNetARMTranslator, self).get_variables()
 
         return {
-            "virtualNetworkName_%s" % self._heat_resource_name:
+            self._make_var_name("virtualNetworkName"):
                 self._heat_resource_name,
-            "virtualNetworkSubnetName_%s" % self._heat_resource_name:
+            self._make_var_name("virtualNetworkSubnetName"):
             "%s_subnet1" % self._heat_resource_name,
-            "virtualNetworkName_ref_%s" % self._heat_resource_name:
-            "[resourceId('Microsoft.Network/virtualNetworks', "
-            "variables('virtualNetworkName_%s'))]" % self._heat_resource_name,
-            "virtualNetworkSubnetName_ref_%s" % self._heat_resource_name:
+            self._make_var_name("virtualNetworkName_ref"):
+            self._strings.resource_id(
+                "Microsoft.Network/virtualNetworks",
+                "variables('%s')" % self._make_var_name("virtualNetworkName")
+            ),
+            self._make_var_name("virtualNetworkSubnetName_ref"):
             "[concat(variables('virtualNetworkName_ref_%(net_name)s'),"
             "'/subnets/',variables('virtualNetworkSubnetName_%(net_name)s'))]"
             % {"net_name": self._heat_resource_name}
@@ -67,6 +68,7 @@ class NeutronSubnetARMTranslator(BaseHeatARMTranslator):
     """
     heat_resource_type = "OS::Neutron::Subnet"
     arm_resource_type = "Microsoft.Network/virtualNetworks"
+    required_properties = ("cidr", "network")
 
     def get_variables(self):
         """ get_variables resurns the dict of ARM template
@@ -77,7 +79,7 @@ class NeutronSubnetARMTranslator(BaseHeatARMTranslator):
 
         cidr = self._heat_resource.properties['cidr']
         return {
-            "subNetAddressPrefix_%s" % self._heat_resource_name: cidr
+            self._make_var_name("subNetAddressPrefix"): cidr
         }
 
     def get_resource_data(self):
@@ -92,18 +94,16 @@ class NeutronSubnetARMTranslator(BaseHeatARMTranslator):
         ].name
 
         return [{
-            "apiVersion": CONF.arm_api_version,
+            "apiVersion": self._config.arm_api_version,
             "type": "Microsoft.Network/virtualNetworks",
             "name":
-            "[variables('virtualNetworkName_%s')]" % net_name,
-            "location": "[variables('location')]",
+            self._strings.variable("virtualNetworkName_%s" % net_name),
+            "location": self._strings.LOCATION,
             "properties": {
                 "addressSpace": {
                     "addressPrefixes": [
                         # TODO: support multiple subnets
-                        "[variables('subNetAddressPrefix_%s')]" % (
-                            self._heat_resource_name
-                        )
+                        self._make_var_ref("subNetAddressPrefix")
                     ]
                 },
                 "subnets": [{
@@ -111,13 +111,12 @@ class NeutronSubnetARMTranslator(BaseHeatARMTranslator):
                     # Main issue here is that ARM networkInterfaces contain a
                     # reference to a subnet, while a Neutron port contains a
                     # reference to a network
-                    "name":
-                    "[variables('virtualNetworkSubnetName_%s')]" % net_name,
+                    "name": self._strings.variable(
+                        "virtualNetworkSubnetName_%s" % net_name
+                    ),
                     "properties": {
                         "addressPrefix":
-                        "[variables('subNetAddressPrefix_%s')]" % (
-                            self._heat_resource_name
-                        )
+                        self._make_var_ref("subNetAddressPrefix")
                     }
                 }]
             }
@@ -17,7 +17,6 @@
     Defines the base implementation for ARM NIC resource translators.
 """
 
-from heat2arm.config import CONF
 from heat2arm.translators.base import BaseHeatARMTranslator
 
 
@@ -35,7 +34,7 @@ class BaseNICARMTranslator(BaseHeatARMTranslator):
         super(BaseNICARMTranslator, self).get_variables()
 
         return {
-            "nicName_%s" % self._heat_resource_name: self._heat_resource_name,
+            self._make_var_name("nicName"): self._heat_resource_name,
         }
 
     def _get_floating_ip_resource_name(self):
@@ -66,22 +65,22 @@ class BaseNICARMTranslator(BaseHeatARMTranslator):
         heat_net_resource = self._get_ref_network()
         if heat_net_resource:
             net_name = heat_net_resource.name
-            dependencies = [
-                "[concat('Microsoft.Network/virtualNetworks/', "
-                "variables('virtualNetworkName_%s'))]" % net_name
-            ]
+            dependencies = [self._strings.dependency(
+                "Microsoft.Network/virtualNetworks",
+                "variables('virtualNetworkName_%s')" % net_name
+            )]
         else:
-            dependencies = [
-                "[concat('Microsoft.Network/virtualNetworks/', "
-                "parameters('newVirtualNetworkName'))]"
-            ]
+            dependencies = [self._strings.dependency(
+                "Microsoft.Network/virtualNetworks",
+                "parameters('newVirtualNetworkName')"
+            )]
 
         if floating_ip_resource_name:
-            dependencies.append(
-                "[concat('Microsoft.Network/publicIPAddresses/', "
-                "variables('publicIPAddressName_%s'))]" %
+            dependencies.append(self._strings.dependency(
+                "Microsoft.Network/publicIPAddresses",
+                "variables('publicIPAddressName_%s')" %
                 floating_ip_resource_name
-            )
+            ))
 
         return dependencies
 
@@ -94,36 +93,33 @@ class BaseNICARMTranslator(BaseHeatARMTranslator):
         heat_net_resource = self._get_ref_network()
         if heat_net_resource:
             net_name = heat_net_resource.name
-            subnet_id = ("[variables('virtualNetworkSubnetName_ref_%s')]" %
-                         net_name)
+            subnet_id = self._strings.variable(
+                "virtualNetworkSubnetName_ref_%s" % net_name
+            )
         else:
-            subnet_id = "[variables('defaultSubnetRef')]"
+            subnet_id = self._strings.variable("defaultSubnetRef")
 
-        nic_properties_data = {
-            "privateIPAllocationMethod": "Dynamic",
-            "subnet": {
-                "id": subnet_id
-            }
-        }
+        nic_properties_data = {}
 
         floating_ip_resource_name = self._get_floating_ip_resource_name()
         if floating_ip_resource_name:
             nic_properties_data["publicIPAddress"] = {
-                "id": "[resourceId('Microsoft.Network/publicIPAddresses', "
-                      "variables('publicIPAddressName_%s'))]" %
-                      floating_ip_resource_name
+                "id": self._strings.resource_id(
+                    "Microsoft.Network/publicIPAddresses",
+                    "variables('publicIPAddressName_%s')" %
+                    floating_ip_resource_name
+                )
             }
 
-        return [{
-            "apiVersion": CONF.arm_api_version,
-            "type": "Microsoft.Network/networkInterfaces",
-            "name": "[variables('nicName_%s')]" % self._heat_resource_name,
-            "location": "[variables('location')]",
-            "dependsOn": self.get_dependencies(),
-            "properties": {
-                "ipConfigurations": [{
-                    "name": "ipconfig%s" % self._heat_resource_name,
-                    "properties": nic_properties_data,
-                }]
+        return [self._fragments.resource(
+            "Microsoft.Network/networkInterfaces",
+            self._make_var_ref("nicName"),
+            dependsOn=self.get_dependencies(),
+            properties={
+                "ipConfigurations": [self._fragments.ip_configuration(
+                    "ipconfig%s" % self._heat_resource_name,
+                    subnet_id,
+                    **nic_properties_data
+                )]
             }
-        }]
+        )]
@@ -17,6 +17,7 @@
     Defines the translator for a EC2 elastic IP resource.
 """
 
+from heat2arm.translators.base import memoized
 from heat2arm.translators.networking.nics.base_nic import BaseNICARMTranslator
 
 
@@ -34,6 +35,7 @@ class EC2eipAssocARMTranslator(BaseNICARMTranslator):
     #   - get_dependencies
     #   - get_resource_data
 
+    @memoized
     def _get_floating_ip_resource_name(self):
         """ _get_floating_ip_resource_name is a helper function which
         returns the name of the floating IP resource associated to
@@ -44,6 +46,7 @@ class EC2eipAssocARMTranslator(BaseNICARMTranslator):
         if "EIP" in self._heat_resource.properties:
             return self._heat_resource.properties["EIP"]
 
+    @memoized
     def _get_ref_network(self):
         """ _get_ref_network is a helper function which returns the name
         of the network which references this NIC-like resource.
@@ -17,6 +17,7 @@
     Defines the translator for a Neutron port resource.
 """
 
+from heat2arm.translators.base import memoized
 from heat2arm.translators.networking.nics.base_nic import BaseNICARMTranslator
 
 
@@ -34,6 +35,7 @@ class NeutronPortARMTranslator(BaseNICARMTranslator):
     #   - get_dependencies
     #   - get_resource_data
 
+    @memoized
     def _get_floating_ip_resource_name(self):
         """ _get_floating_ip_resource_name is a helper function which
         returns the name of the floating IP resource associated to
@@ -47,6 +49,7 @@ class NeutronPortARMTranslator(BaseNICARMTranslator):
                 if port_resource is self._heat_resource:
                     return heat_resource.name
 
+    @memoized
     def _get_ref_network(self):
         """ _get_ref_network is a helper function which returns the name
         of the network which references this NIC-like resource.
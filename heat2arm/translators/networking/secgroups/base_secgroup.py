@@ -19,7 +19,6 @@
 """
 
 
-from heat2arm.config import CONF
 from heat2arm.translators.base import BaseHeatARMTranslator
 from heat2arm.translators.networking.secgroups import exceptions
 
@@ -56,11 +55,10 @@ class BaseSecurityGroupARMTranslator(BaseHeatARMTranslator):
         super(BaseSecurityGroupARMTranslator, self).get_resource_data()
 
         return [{
-            "apiVersion": CONF.arm_api_version,
+            "apiVersion": self._config.arm_api_version,
             "type": self.arm_resource_type,
-            "name": ("[variables('secGroupName_%s')]" %
-                     self._heat_resource.name),
-            "location": "[variables('location')]",
+            "name": self._make_var_ref("secGroupName"),
+            "location": self._strings.LOCATION,
             "properties": {
                 "securityRules": self._get_rules()
             }
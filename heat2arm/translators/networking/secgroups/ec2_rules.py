@@ -38,6 +38,7 @@ class BaseEC2SecurityGroupRuleARMTranslator(BaseHeatARMTranslator):
     # NOTE: stand-alone security group rules get 'injected' into security
     # groups themselves, so they will not have a resulting translation:
     arm_resource_type = ""
+    required_properties = ("IpProtocol", "FromPort", "ToPort")
 
     # _rule_direction denotes the direction of traffic the translated
     # security rule group is meant to regulate:
@@ -55,7 +56,9 @@ class BaseEC2SecurityGroupRuleARMTranslator(BaseHeatARMTranslator):
 
         secgroup = self._context.get_arm_resource({
             "type": "Microsoft.Network/networkSecurityGroups",
-            "name": "[variables('secGroupName_%s')]" % self._get_target(),
+            "name": self._strings.variable(
+                "secGroupName_%s" % self._get_target()
+            ),
         })
 
         rule = self._get_rule()
@@ -72,9 +75,7 @@ class BaseEC2SecurityGroupRuleARMTranslator(BaseHeatARMTranslator):
         """ _validate_input_rule is a helper method which checks the provided
         SecurityGroupRule resource's fields for all the mandatory ones.
         """
-        mandatories = ["IpProtocol", "FromPort", "ToPort"]
-
-        for field in mandatories:
+        for field in self.required_properties:
             if field not in self._heat_resource.properties:
                 raise exceptions.SecurityGroupMissingFieldException(
                     "'%s': security group rule resource '%s' has no '%s' "
@@ -245,6 +246,10 @@ class EC2SecurityGroupRuleEgressARMTranslator(
     """
 
     heat_resource_type = "AWS::EC2::SecurityGroupEgress"
+    required_properties = (
+        BaseEC2SecurityGroupRuleARMTranslator.required_properties +
+        ("GroupId",)
+    )
 
     _rule_direction = "Outbound"
 
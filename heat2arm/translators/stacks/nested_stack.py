@@ -0,0 +1,258 @@
+# Copyright 2015 Cloudbase Solutions Srl
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+    This module contains the translator for nested stacks; be they resources
+    whose type is a provider template or OS::Heat::ResourceGroups.
+"""
+
+import re
+
+from heat2arm.evaluator import ExpressionEvaluationException
+from heat2arm.evaluator import StaticEvaluator
+from heat2arm.optimizers import utils
+from heat2arm.parser.hot.nested import RESOURCE_GROUP_TYPE
+from heat2arm.translators.base import BaseHeatARMTranslator
+
+
+# NAME_SUFFIX_PARAMETER is the name of the parameter of nested templates
+# holding the suffix appended to the names of their resources:
+NAME_SUFFIX_PARAMETER = "nameSuffix"
+
+# _VARIABLE_NAME_REGEX matches resource names which are
+# simply a reference to a variable; capturing its name:
+_VARIABLE_NAME_REGEX = re.compile(r"^\[variables\('([^']*)'\)\]$")
+
+
+def isolate_nested_template(template_data):
+    """ isolate_nested_template prepares the given template data of a nested
+    stack to be deployed any number of times from within another template;
+    returning the list of the 'dependsOn' entries which were lifted out of it.
+
+    The 'dependsOn' entries of its resources which do not point to any
+    resource of the nested template itself are removed; as these have to be
+    declared by the nested deployment instead. All variables which name its
+    resources and hold plain names get suffixed with the value of the
+    NAME_SUFFIX_PARAMETER parameter, which is added to the template.
+
+    NOTE: resources named through any other kind of
+    expression are left named as they are.
+    """
+    evaluator = StaticEvaluator(template_data["variables"])
+
+    names = set()
+    for resource in template_data["resources"]:
+        copy_indexes = [None]
+        if "copy" in resource:
+            names.add(resource["copy"].get("name", "").lower())
+            count = _evaluate(evaluator, resource["copy"].get("count"))
+            copy_indexes = range(count) if isinstance(count, int) else []
+
+        for copy_index in copy_indexes:
+            name = _evaluate(evaluator, resource.get("name"), copy_index)
+            if isinstance(name, str):
+                names.add(name.lower())
+                names.add(("%s/%s" % (resource.get("type"), name)).lower())
+
+    lifted = []
+    for resource in template_data["resources"]:
+        if "dependsOn" not in resource:
+            continue
+
+        entries = []
+        copy_index = 0 if "copy" in resource else None
+        for entry in resource["dependsOn"]:
+            value = _evaluate(evaluator, entry, copy_index)
+            if isinstance(value, str) and (
+                    value.rsplit("/providers/", 1)[-1].lower() in names):
+                entries.append(entry)
+            elif entry not in lifted:
+                lifted.append(entry)
+        resource["dependsOn"] = entries
+
+    variables = template_data["variables"]
+    for resource in template_data["resources"]:
+        match = _VARIABLE_NAME_REGEX.match(resource.get("name", ""))
+        if not match:
+            continue
+
+        value = variables.get(match.group(1))
+        if isinstance(value, str) and not value.startswith("["):
+            variables[match.group(1)] = "[concat('%s', parameters('%s'))]" % (
+                value.replace("'", "''"), NAME_SUFFIX_PARAMETER
+            )
+
+    template_data["parameters"][NAME_SUFFIX_PARAMETER] = {
+        "type": "string",
+        "defaultValue": "",
+        "metadata": {
+            "description": "Suffix appended to the names of all the"
+                           " resources of the nested deployment."
+        }
+    }
+
+    return lifted
+
+
+def _evaluate(evaluator, value, copy_index=None):
+    """ _evaluate is a helper function which returns the statically evaluated
+    value of the given expression or None if it cannot be evaluated.
+    """
+    try:
+        return evaluator.evaluate(value, copy_index)
+    except ExpressionEvaluationException:
+        return None
+
+
+class NestedStackARMTranslator(BaseHeatARMTranslator):
+    """ NestedStackARMTranslator is the translator for nested stacks; which
+    are deployed through a nested deployment of the ARM template their
+    resources were translated into. The members of an OS::Heat::ResourceGroup
+    are all deployed through a copy loop of such deployments.
+
+    The nested templates are translated beforehand by the translation engine,
+    with the Context holding each of them along with the 'dependsOn' entries
+    which were lifted out of it.
+
+    NOTE: the parameters of the nested templates are passed through from
+    the parameters of the same name of the outer template, while any of
+    the variables of the outer template their resources reference are
+    copied within them; as nested templates are scoped on their own.
+    """
+    heat_resource_type = RESOURCE_GROUP_TYPE
+    arm_resource_type = "Microsoft.Resources/deployments"
+
+    def __init__(self, heat_resource, context):
+        super(NestedStackARMTranslator, self).__init__(heat_resource, context)
+        self._template, self._dependencies = context.nested_templates[
+            heat_resource.key
+        ]
+
+    def get_parameters(self):
+        """ get_parameters returns the parameters of the nested template; as
+        they are passed through from the ones of the outer template.
+        """
+        return {
+            name: value
+            for name, value in self._template["parameters"].items()
+            if name != NAME_SUFFIX_PARAMETER
+        }
+
+    def get_resource_data(self):
+        """ get_resource_data returns the nested deployment of the template
+        of the nested stack; looped over all the members of ResourceGroups.
+        """
+        count = self._heat_resource.count
+        if count == 0:
+            self._logger.warning(
+                "ResourceGroup has no members; it will not be translated."
+            )
+            return []
+
+        # NOTE: the nested template is shared between all the deployments of
+        # the same nested stack; so its parts altered by update_context
+        # are copied beforehand:
+        template = dict(
+            self._template,
+            parameters=dict(self._template["parameters"]),
+            variables=dict(self._template["variables"])
+        )
+
+        parameters = {
+            name: {"value": self._strings.parameter(name)}
+            for name in self.get_parameters()
+        }
+        parameters[NAME_SUFFIX_PARAMETER] = {"value": self._get_name_suffix()}
+
+        resource = {
+            "apiVersion": self._config.arm_nested_deployments_api_version,
+            "type": self.arm_resource_type,
+            "name": self._get_name(),
+            "dependsOn": list(self._dependencies),
+            "properties": {
+                "mode": "Incremental",
+                "expressionEvaluationOptions": {"scope": "inner"},
+                "template": template,
+                "parameters": parameters,
+            },
+        }
+        if count is not None:
+            resource["copy"] = {
+                "name": self._heat_resource_name,
+                "count": count,
+            }
+
+        return [resource]
+
+    def update_context(self):
+        """ update_context copies all the variables of the outer template
+        which are referenced within the nested template into it; along with
+        the parameters referenced by them.
+        """
+        resource = self._context.get_arm_resource({
+            "type": self.arm_resource_type,
+            "name": self._get_name(),
+        })
+        if resource is None:
+            return
+
+        template = resource["properties"]["template"]
+        outer_variables = self._context.get_variables()
+        outer_parameters = self._context.get_parameters()
+        known = dict(outer_variables, **template["variables"])
+        variable_names, parameter_names = utils.get_references(
+            [template["resources"], template["variables"]], known
+        )
+
+        for name in sorted(variable_names):
+            if name not in template["variables"] and name in outer_variables:
+                template["variables"][name] = outer_variables[name]
+
+        for name in sorted(parameter_names):
+            if name in template["parameters"]:
+                continue
+            if name in outer_parameters:
+                template["parameters"][name] = outer_parameters[name]
+                resource["properties"]["parameters"][name] = {
+                    "value": self._strings.parameter(name)
+                }
+
+    def _get_name(self):
+        """ _get_name is a helper method which returns the name of the nested
+        deployment; which is suffixed with the copy index for ResourceGroups.
+        """
+        if self._heat_resource.count is None:
+            return self._heat_resource_name
+
+        return "[concat('%s-', copyIndex())]" % (
+            self._heat_resource_name.replace("'", "''")
+        )
+
+    def _get_name_suffix(self):
+        """ _get_name_suffix is a helper method which returns the suffix of
+        the names of the resources of the nested deployment.
+
+        NOTE: the single member of the nested stack of a ResourceGroup of plain
+        resources is already named after the ResourceGroup itself.
+        """
+        if self._heat_resource.count is None:
+            return "-%s" % self._heat_resource_name
+
+        if self._heat_resource.provider is None:
+            return "[concat('-', copyIndex())]"
+
+        return "[concat('-%s-', copyIndex())]" % (
+            self._heat_resource_name.replace("'", "''")
+        )
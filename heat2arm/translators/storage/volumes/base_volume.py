@@ -56,7 +56,7 @@ class BaseVolumeARMTranslator(BaseHeatARMTranslator):
         super(BaseVolumeARMTranslator, self).get_variables()
 
         return {
-            "diskUri_%s" % self._heat_resource_name:
+            self._make_var_name("diskUri"):
                 "[concat('http://',parameters('newStorageAccountName'),"
                 "'.blob.core.windows.net/',"
                 "variables('vmStorageAccountContainerName'),"
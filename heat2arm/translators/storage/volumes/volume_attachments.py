@@ -54,7 +54,9 @@ class BaseVolumeAttachmentTranslator(BaseHeatARMTranslator):
 
         res = self._context.get_arm_resource({
             "type": "Microsoft.Compute/virtualMachines",
-            "name":  "[variables('vmName_%s')]" % self._get_instance_name()
+            "name": self._strings.variable(
+                "vmName_%s" % self._get_instance_name()
+            )
         })
         if not res:
             raise VolumeTargetInstanceNotFoundException(
@@ -69,13 +71,11 @@ class BaseVolumeAttachmentTranslator(BaseHeatARMTranslator):
 
         res["properties"]["storageProfile"]["dataDisks"].append({
             "name": volume_name,
-            "diskSizeGB": "[parameters('size_%s')]" %
-                          volume_name,
+            "diskSizeGB": self._strings.parameter("size_%s" % volume_name),
             # NOTE: the following always makes the lun the first one available:
             "lun": len(res["properties"]["storageProfile"]["dataDisks"]),
             "vhd": {
-                "Uri": "[variables('diskUri_%s')]" %
-                       volume_name,
+                "Uri": self._strings.variable("diskUri_%s" % volume_name),
                 },
             "createOption": "Empty"
         })
@@ -87,6 +87,7 @@ class CinderVolumeAttachmentARMTranslator(BaseVolumeAttachmentTranslator):
     """
     heat_resource_type = "OS::Cinder::VolumeAttachment"
     arm_resource_type = ""
+    required_properties = ("volume_id", "instance_uuid")
 
     # NOTE: update_context is inherited from BaseVolumeAttachmentTranslator.
 
@@ -109,6 +110,7 @@ class EBSVolumeAttachmentARMTranslator(BaseVolumeAttachmentTranslator):
     """
     heat_resource_type = "AWS::EC2::VolumeAttachment"
     arm_resource_type = ""
+    required_properties = ("VolumeId", "InstanceId")
 
     # NOTE: update_context is inherited from BaseVolumeAttachmentTranslator.
 